@@ -0,0 +1,173 @@
+import queue
+import threading
+
+from SolverSession import *
+
+# Macros / Global Constants
+COMPLETED_RESULTS_LIMIT = 64
+
+
+# Background solver class.
+class BackgroundSolver:
+
+    def __init__(self, session=None, on_result=None, time_budget=None):
+        """
+        :param session: The SolverSession to make suggestions with. It is only used by the worker thread from now on.
+                        None creates a new one.
+        :param on_result: A function taking no arguments, called from the worker thread whenever a requested result
+                          becomes available, for example to wake up an event loop. None to only poll.
+        :param time_budget: The amount of seconds to search each suggestion for, or None for no limit. With a budget,
+                            every better word found while searching is reported as well, and a suggestion that ran
+                            out of time is not kept for later requests.
+
+        Suggestions are calculated on a worker thread, so a user interface stays responsive while the kernels run.
+        Requests are identified by the constraints key and the words to exclude, so a speculative request and a later
+        real request for the same state share one calculation.
+        """
+
+        self.session = SolverSession() if session is None else session
+        self.on_result = on_result
+        self.time_budget = time_budget
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.pending_keys = set()
+        self.completed_results = {}
+        self.wanted_key = None
+        self.error = None
+
+        # Launch Numba's thread pool from this thread. A pool first launched from the worker thread hangs on exit.
+        encoded_word = self.session.lexicon.encoded_words[:1]
+        enc_get_pattern_matrix(encoded_word, encoded_word)
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def get_request_key(constraints, words_to_exclude):
+        """
+        :param constraints: An object of type Constraints, as defined in BasicStructures.
+        :param words_to_exclude: A set containing words that are not allowed to be guessed, or None.
+        :return: A hashable key identifying the suggestion for these constraints and exclusions.
+        """
+
+        return constraints.get_key(), frozenset(words_to_exclude or ())
+
+    def submit(self, constraints, words_to_exclude=None, speculative=False):
+        """
+        :param constraints: An object of type Constraints, as defined in BasicStructures. A copy is taken, so the
+                            caller may keep editing it.
+        :param words_to_exclude: A set containing words that are not allowed to be guessed.
+        :param speculative: A boolean corresponding to whether the result is only calculated ahead of time. The
+                            result of a speculative request is kept but not reported, until the same state is
+                            requested for real.
+        :return: None
+        """
+
+        key = self.get_request_key(constraints, words_to_exclude)
+        with self.lock:
+            if not speculative:
+                self.wanted_key = key
+            if key in self.completed_results:
+                if not speculative:
+                    self.report(self.completed_results[key])
+                return
+            if key in self.pending_keys:
+                return
+            self.pending_keys.add(key)
+            self.requests.put((self.generation, key, constraints.copy(), set(words_to_exclude or ())))
+
+    def cancel(self):
+        """
+        :return: None
+
+        Drops every request that has not started yet, and stops the result of a running request from being reported.
+        A running kernel is not interrupted, but its result is still kept for any later request of the same state.
+        """
+
+        with self.lock:
+            self.generation += 1
+            self.pending_keys.clear()
+            self.wanted_key = None
+
+    def poll(self):
+        """
+        :return: The most recent word string reported for a real request, or None if nothing new is available.
+                 Results reported before the last call to cancel are discarded. A request that raised an exception
+                 reports NULL_WORD, and the exception is kept in self.error until the next result is collected.
+        """
+
+        word = None
+        while True:
+            try:
+                generation, result_word, error = self.results.get_nowait()
+            except queue.Empty:
+                return word
+            if generation == self.generation:
+                word, self.error = result_word, error
+
+    def report(self, word, error=None):
+        """
+        :param word: The word string to hand to the user interface thread.
+        :param error: The exception raised while calculating the word, or None.
+        :return: None
+
+        Must be called while holding self.lock, so the result is tagged with the generation it belongs to.
+        """
+
+        self.results.put((self.generation, word, error))
+        if self.on_result is not None:
+            self.on_result()
+
+    def report_interim(self, generation, key, word):
+        """
+        :param generation: The generation of the request being calculated.
+        :param key: The key of the request being calculated.
+        :param word: The best word string found so far.
+        :return: None
+
+        Called from the worker thread while a request with a time budget is calculated. The word is reported if the
+        request is wanted and was not cancelled, without ending the request.
+        """
+
+        with self.lock:
+            if generation == self.generation and key == self.wanted_key:
+                self.report(word)
+
+    def run(self):
+        """
+        :return: None
+
+        The worker thread loop. Requests from earlier generations were cancelled and are skipped, as are requests
+        whose result was already calculated by an earlier copy of the same request. A request that raises an exception
+        is reported with it and not kept, and the loop goes on with the next request.
+        """
+
+        while True:
+            generation, key, constraints, words_to_exclude = self.requests.get()
+            with self.lock:
+                if generation != self.generation:
+                    continue
+                if key in self.completed_results:
+                    self.pending_keys.discard(key)
+                    continue
+            finished, error = True, None
+            try:
+                if self.time_budget is None:
+                    word = self.session.choose_word(constraints, words_to_exclude)
+                else:
+                    word, finished = self.session.choose_word_within(
+                        constraints, self.time_budget, words_to_exclude,
+                        lambda interim_word, _: self.report_interim(generation, key, interim_word))
+            except Exception as exception:
+                word, finished, error = NULL_WORD, False, exception
+            with self.lock:
+                self.pending_keys.discard(key)
+                if finished:
+                    if len(self.completed_results) >= COMPLETED_RESULTS_LIMIT:
+                        self.completed_results.pop(next(iter(self.completed_results)))
+                    self.completed_results[key] = word
+                if key == self.wanted_key:
+                    self.wanted_key = None
+                    self.report(word, error)
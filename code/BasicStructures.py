@@ -1,3 +1,8 @@
+import os
+import ast
+import bisect
+import threading
+import contextlib
 import numpy as np
 from enum import Enum
 
@@ -8,6 +13,95 @@ COLUMNS = 5
 
 NULL_CHAR = '*'
 
+WORD_LENGTH = COLUMNS
+ALPHABET_LENGTH = 26
+FULL_LETTER_MASK = (1 << ALPHABET_LENGTH) - 1
+
+NULL_INTEGER = -1
+NULL_WORD = NULL_CHAR * WORD_LENGTH
+
+
+# File Functions
+@contextlib.contextmanager
+def open_for_replace(directory, mode='wb'):
+    """
+    :param directory: A string representing the pathway to the file to write.
+    :param mode: The mode to open the file in, 'wb' or 'w'.
+    :return: A context manager giving a file object to write the whole file to. It is written under a temporary name
+             unique to this process and thread, and renamed to directory once the body finishes, so readers never see
+             a partial file and concurrent writers of the same file never write to the same temporary file. If the
+             body raises, the temporary file is removed and directory is left as it was.
+    """
+
+    temporary_directory = directory + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+    try:
+        with open(temporary_directory, mode) as f:
+            yield f
+        os.replace(temporary_directory, directory)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporary_directory)
+        raise
+
+
+# Conversion Functions
+def char_to_int(input_char):
+    return ord(input_char) - ord('a')
+
+
+def int_to_char(input_int):
+    return chr(ord('a') + input_int)
+
+
+def get_square_code(color_value, char, column):
+    """
+    :param color_value: The value of a Color.
+    :param char: A lowercase letter.
+    :param column: The column the square is in.
+    :return: An integer in range(SQUARE_CODE_COUNT) identifying the (color, char, column) triple. Codes are ordered the
+             same way as the triples.
+    """
+
+    return (color_value * ALPHABET_LENGTH + char_to_int(char)) * COLUMNS + column
+
+
+def pack_square_codes(square_codes):
+    """
+    :param square_codes: An iterable of codes returned by get_square_code, in any order.
+    :return: A non-negative integer which is the same for any ordering of square_codes. The sorted codes are packed
+             KEY_BITS bits at a time, offset by one so that no code packs to zero.
+    """
+
+    key = 0
+    for code in sorted(square_codes):
+        key = (key << KEY_BITS) | (code + 1)
+    return key
+
+
+def key_to_string(key):
+    """
+    :param key: An integer as returned by Constraints.get_key.
+    :return: The string that str(constraints) returns for the same constraints.
+    """
+
+    square_triples = []
+    while key:
+        code = (key & ((1 << KEY_BITS) - 1)) - 1
+        key >>= KEY_BITS
+        square_triples.append((code // (ALPHABET_LENGTH * COLUMNS), int_to_char(code // COLUMNS % ALPHABET_LENGTH),
+                               code % COLUMNS))
+    return str(tuple(reversed(square_triples)))
+
+
+def key_from_string(constraints_string):
+    """
+    :param constraints_string: A string as returned by str(constraints), such as the keys of opening_book.json.
+    :return: The integer that constraints.get_key() returns for the same constraints.
+    """
+
+    return pack_square_codes(get_square_code(color_value, char, column)
+                             for color_value, char, column in ast.literal_eval(constraints_string))
+
 
 # Color class.
 class Color(Enum):
@@ -31,50 +125,208 @@ class Color(Enum):
         return self.value < other.value
 
 
-# Cell class.
-class Square:
+# Amount of distinct (color, char, column) triples, and the bits needed to store one in a key.
+SQUARE_CODE_COUNT = len(Color) * ALPHABET_LENGTH * COLUMNS
+KEY_BITS = SQUARE_CODE_COUNT.bit_length()
+
+
+# Constraints class.
+class Constraints:
+
+    __slots__ = ("chars", "colors", "codes", "key", "solver_arrays", "first_blank", "last_char")
+
+    def __init__(self):
+        """
+        The grid is stored as two int8 arrays size=(ROWS, COLUMNS). chars holds the letter of each square (a=0, b=1,
+        ...), or NULL_INTEGER if the square is blank, and colors holds the value of its Color. The sorted square codes
+        of the filled squares, and the flat indexes of the first blank and last filled square, are updated as squares
+        change, so keys, cursors and copies never walk the grid. The key and solver arrays are kept until the next
+        change.
+        """
 
-    def __init__(self, color=Color.GREY, char=NULL_CHAR):
-        self.color = color
-        self.char = char
+        self.chars = np.full((ROWS, COLUMNS), NULL_INTEGER, dtype=np.int8)
+        self.colors = np.zeros((ROWS, COLUMNS), dtype=np.int8)
+        self.codes = []
+        self.key = 0
+        self.solver_arrays = None
+        self.first_blank = 0
+        self.last_char = NULL_INTEGER
 
     def __str__(self):
-        return str(self.color) + str(self.char)
+        return key_to_string(self.get_key())
 
-    def __repr__(self):
-        return str(self)
+    def copy(self):
+        """
+        :return: A new Constraints with the same squares, which can be changed without affecting this one.
+        """
 
-    def __hash__(self):
-        return hash(self.color) + len(Color)*hash(self.char)
+        constraints = Constraints.__new__(Constraints)
+        constraints.chars = self.chars.copy()
+        constraints.colors = self.colors.copy()
+        constraints.codes = self.codes[:]
+        constraints.key = self.key
+        constraints.solver_arrays = self.solver_arrays
+        constraints.first_blank = self.first_blank
+        constraints.last_char = self.last_char
+        return constraints
 
+    def get_key(self):
+        """
+        :return: A compact canonical integer for these constraints. Two Constraints have the same key exactly when they
+                 have the same string, but the key is far cheaper to hash and to store. It is packed at most once
+                 between changes.
+        """
 
-# Constraints class.
-class Constraints:
+        if self.key is None:
+            self.key = pack_square_codes(self.codes)
+        return self.key
 
-    def __init__(self):
-        self.grid = np.array([[Square() for _ in range(COLUMNS)] for _ in range(ROWS)])
+    def get_char(self, row, column):
+        """
+        :param row: The row of the square.
+        :param column: The column of the square.
+        :return: The lowercase letter in the square, or NULL_CHAR if it is blank.
+        """
 
-    def __str__(self):
-        hashable = []
-        for r in range(ROWS):
-            for c in range(COLUMNS):
-                if self.grid[r][c].char != NULL_CHAR:
-                    color = self.grid[r][c].color
-                    char = self.grid[r][c].char
-                    hashable.append((color, char, c))
-        hashable.sort()
-        return str(tuple(hashable))
+        char_int = self.chars[row, column]
+        return NULL_CHAR if char_int == NULL_INTEGER else int_to_char(char_int)
+
+    def get_color(self, row, column):
+        """
+        :param row: The row of the square.
+        :param column: The column of the square.
+        :return: The Color of the square. Blank squares are Color.GREY.
+        """
+
+        return Color(int(self.colors[row, column]))
+
+    def set_square(self, row, column, char, color=Color.GREY):
+        """
+        :param row: The row of the square.
+        :param column: The column of the square.
+        :param char: A lowercase letter, or NULL_CHAR to blank the square.
+        :param color: The Color of the square. Blank squares are always Color.GREY.
+        :return: None
+        """
+
+        # Forget the old square.
+        index = row * COLUMNS + column
+        if self.chars[row, column] != NULL_INTEGER:
+            self.codes.remove(get_square_code(int(self.colors[row, column]), self.get_char(row, column), column))
+        self.key = None
+        self.solver_arrays = None
+
+        # Blank the square, moving the cursors back if needed.
+        if char == NULL_CHAR:
+            self.chars[row, column] = NULL_INTEGER
+            self.colors[row, column] = Color.GREY.value
+            self.first_blank = min(self.first_blank, index)
+            while self.last_char >= 0 and self.chars.flat[self.last_char] == NULL_INTEGER:
+                self.last_char -= 1
+            return
+
+        # Fill the square, moving the cursors forward if needed.
+        self.chars[row, column] = char_to_int(char)
+        self.colors[row, column] = color.value
+        bisect.insort(self.codes, get_square_code(color.value, char, column))
+        while self.first_blank < ROWS * COLUMNS and self.chars.flat[self.first_blank] != NULL_INTEGER:
+            self.first_blank += 1
+        self.last_char = max(self.last_char, index)
+
+    def set_color(self, row, column, color):
+        """
+        :param row: The row of the square.
+        :param column: The column of the square.
+        :param color: The new Color of the square. Blank squares are left unchanged.
+        :return: None
+        """
+
+        if self.chars[row, column] != NULL_INTEGER:
+            self.set_square(row, column, self.get_char(row, column), color)
+
+    def set_row(self, row, word, colors):
+        """
+        :param row: The index of the row to fill.
+        :param word: A word string of length COLUMNS.
+        :param colors: An iterable of Color objects with length=COLUMNS.
+        :return: None
+        """
+
+        for c, color in enumerate(colors):
+            self.set_square(row, c, word[c], color)
 
     def get_first_blank(self):
-        for r in range(ROWS):
-            for c in range(COLUMNS):
-                if self.grid[r][c].char == NULL_CHAR:
-                    return r, c
-        return None
+        """
+        :return: A tuple (row, column) of the first blank square, reading rows from the top, or None if every square is
+                 filled.
+        """
+
+        if self.first_blank == ROWS * COLUMNS:
+            return None
+        return divmod(self.first_blank, COLUMNS)
 
     def get_last_char(self):
-        for r in range(ROWS - 1, 0 - 1, -1):
-            for c in range(COLUMNS - 1, 0 - 1, -1):
-                if self.grid[r][c].char != NULL_CHAR:
-                    return r, c
-        return None
+        """
+        :return: A tuple (row, column) of the last filled square, reading rows from the top, or None if every square is
+                 blank.
+        """
+
+        if self.last_char == NULL_INTEGER:
+            return None
+        return divmod(self.last_char, COLUMNS)
+
+    def get_rows(self):
+        """
+        :return: A list of (word, pattern) tuples, one for each complete row from the top, where pattern encodes the
+                 colors as a base-3 number like colors_to_pattern does. Rows after the first blank row are ignored.
+                 None is returned if the first row that is not complete is partly filled in, since a partial row does
+                 not form a guess.
+        """
+
+        filled = self.chars != NULL_INTEGER
+        complete = np.all(filled, axis=1)
+        row_count = ROWS if np.all(complete) else int(np.argmin(complete))
+        if row_count < ROWS and np.any(filled[row_count]):
+            return None
+        patterns = self.colors[:row_count].astype(np.int64) @ len(Color) ** np.arange(COLUMNS)
+        return [("".join(int_to_char(char_int) for char_int in self.chars[r]), int(patterns[r]))
+                for r in range(row_count)]
+
+    def to_solver_arrays(self):
+        """
+        :return: A tuple (allowed_masks, min_counts, max_counts) describing the constraints with Wordle's rules for
+                 repeated letters. allowed_masks is a 1-D uint32 array size=WORD_LENGTH, where bit c of element i is
+                 set if letter c (a=0, b=1, ...) may be at index i of the underlying word. min_counts and max_counts
+                 are 1-D int8 arrays size=ALPHABET_LENGTH giving the smallest and largest amount of times each letter
+                 may appear.
+
+        Within a row, the green and yellow squares of a letter show how many times it appears at least. A grey square
+        of that same letter shows the underlying word has exactly that many, which is how a grey repeat after a green
+        or yellow is handled. Every row up to the last filled square is converted at once with array operations. The
+        arrays are shared with copies and must not be modified.
+        """
+
+        if self.solver_arrays is not None:
+            return self.solver_arrays
+        row_count = self.last_char // COLUMNS + 1
+        chars, colors = self.chars[:row_count], self.colors[:row_count]
+        filled = chars != NULL_INTEGER
+        char_ints = np.where(filled, chars, 0)
+        grey = colors == Color.GREY.value
+
+        # Combine the allowed letters of every square in each column.
+        char_bits = np.left_shift(np.uint32(1), char_ints.astype(np.uint32))
+        square_masks = np.where(colors == Color.GREEN.value, char_bits, np.uint32(FULL_LETTER_MASK) ^ char_bits)
+        allowed_masks = np.bitwise_and.reduce(np.where(filled, square_masks, np.uint32(FULL_LETTER_MASK)), axis=0,
+                                              initial=np.uint32(FULL_LETTER_MASK))
+
+        # Count the present and grey letters of each row.
+        char_squares = filled[:, :, None] & (char_ints[:, :, None] == np.arange(ALPHABET_LENGTH))
+        present_counts = np.sum(char_squares & ~grey[:, :, None], axis=1)
+        grey_chars = np.any(char_squares & grey[:, :, None], axis=1)
+        min_counts = np.max(present_counts, axis=0, initial=0).astype(np.int8)
+        max_counts = np.min(np.where(grey_chars, present_counts, WORD_LENGTH), axis=0,
+                            initial=WORD_LENGTH).astype(np.int8)
+
+        self.solver_arrays = allowed_masks.astype(np.uint32), min_counts, max_counts
+        return self.solver_arrays
@@ -0,0 +1,1001 @@
+import os
+import sys
+import glob
+import json
+import time
+import queue
+import socket
+import threading
+import subprocess
+import argparse
+import multiprocessing
+
+from numba import njit, prange
+
+from SolverService import *
+from MultiBoardSession import *
+
+# Session used by the games played in this process. Pool workers create their own so it stays warm between games.
+worker_session = None
+
+# Instrumentation records of this process not yet returned with a game.
+worker_records = []
+
+
+@njit(cache=True, nogil=True)
+def enc_copy_constraints(chars_not_present, char_placements, char_nonplacements, new_chars_not_present,
+                         new_char_placements, new_char_nonplacements):
+    """
+    :param chars_not_present: A 1-D boolean Array size=ALPHABET_LENGTH, as used by enc_update_constraints.
+    :param char_placements: A 2-D integer Array size=(ALPHABET_LENGTH, WORD_LENGTH), as used by
+                            enc_update_constraints.
+    :param char_nonplacements: A 2-D integer Array size=(ALPHABET_LENGTH, WORD_LENGTH), as used by
+                               enc_update_constraints.
+    :param new_chars_not_present: An array of the same size as chars_not_present to copy it into.
+    :param new_char_placements: An array of the same size as char_placements to copy it into.
+    :param new_char_nonplacements: An array of the same size as char_nonplacements to copy it into.
+    :return: None
+    """
+
+    for c in range(len(chars_not_present)):
+        new_chars_not_present[c] = chars_not_present[c]
+        for k in range(char_placements.shape[1]):
+            new_char_placements[c][k] = char_placements[c][k]
+            new_char_nonplacements[c][k] = char_nonplacements[c][k]
+
+
+@njit(parallel=True, cache=True, nogil=True)
+def enc_get_scratch_scores(encoded_words, chars_not_present, char_placements, char_nonplacements, threads,
+                           word_length=WORD_LENGTH, alphabet_length=ALPHABET_LENGTH, null_integer=NULL_INTEGER):
+    """
+    :param encoded_words: A 2-D integer array size=(unknown, WORD_LENGTH), as used by enc_get_scores.
+    :param chars_not_present: A 1-D boolean Array size=ALPHABET_LENGTH, as used by enc_get_scores.
+    :param char_placements: A 2-D integer Array size=(ALPHABET_LENGTH, WORD_LENGTH), as used by enc_get_scores.
+    :param char_nonplacements: A 2-D integer Array size=(ALPHABET_LENGTH, WORD_LENGTH), as used by enc_get_scores.
+    :param threads: The amount of sets of scratch arrays, which should be the amount of threads running the kernel, as
+                    returned by get_num_threads. Any positive amount gives the same scores.
+    :param word_length: Same value as the macro WORD_LENGTH. Inputted to avoid drawing upon global variables.
+    :param alphabet_length: Same value as the macro ALPHABET_LENGTH. Inputted to avoid drawing upon global variables.
+    :param null_integer: Same value as the macro NULL_INTEGER. Inputted to avoid drawing upon global variables.
+
+    :return: A 1-D integer Array size=len(encoded_words), the same scores as enc_get_scores.
+
+    enc_get_scores copies the three constraint arrays for every pair of guess word and underlying word, and the heap
+    allocations serialize its threads on the allocator. Here each thread is given one set of scratch arrays before the
+    loop, which it copies the constraints into instead, so nothing is allocated while scoring. Thread t scores guess
+    words t, t + threads, t + 2 * threads, ..., so every thread gets an even share of the work.
+    """
+
+    # Create relevant data structures.
+    consistent_words = enc_get_consistent_words(encoded_words, chars_not_present, char_placements, char_nonplacements,
+                                                word_length, alphabet_length, null_integer)
+    scores = np.full(len(encoded_words), null_integer, dtype=np.int32)
+
+    # Create the scratch constraints of every thread.
+    threads = max(1, min(threads, len(encoded_words)))
+    scratch_chars_not_present = np.empty((threads, alphabet_length), dtype=chars_not_present.dtype)
+    scratch_char_placements = np.empty((threads, alphabet_length, word_length), dtype=char_placements.dtype)
+    scratch_char_nonplacements = np.empty((threads, alphabet_length, word_length), dtype=char_nonplacements.dtype)
+
+    # Iterate through guess_words, striped over the threads.
+    for t in prange(threads):
+        new_chars_not_present = scratch_chars_not_present[t]
+        new_char_placements = scratch_char_placements[t]
+        new_char_nonplacements = scratch_char_nonplacements[t]
+        for i in range(t, len(encoded_words), threads):
+            guess_word = encoded_words[i]
+            score = 0
+
+            for underlying_word in consistent_words:
+
+                # Calculate updated constraints.
+                enc_copy_constraints(chars_not_present, char_placements, char_nonplacements, new_chars_not_present,
+                                     new_char_placements, new_char_nonplacements)
+                enc_update_constraints(guess_word, underlying_word, new_chars_not_present, new_char_placements,
+                                       new_char_nonplacements, word_length)
+
+                # Calculate score increment.
+                score_increment = 0
+                for new_word in consistent_words:
+                    if enc_is_word_consistent(new_word, new_chars_not_present, new_char_placements,
+                                              new_char_nonplacements, word_length, alphabet_length):
+                        score_increment += 1
+                score += max(0, score_increment - 1)
+
+            # Slightly bias the score to favour consistent guess words.
+            if not enc_is_word_consistent(guess_word, chars_not_present, char_placements, char_nonplacements,
+                                          word_length, alphabet_length):
+                score += 1
+            scores[i] = score
+
+    return scores
+
+
+def create_random_state(rng, all_words, dictionary_size, max_guesses):
+    """
+    :param rng: The numpy random number generator to sample with.
+    :param all_words: A 1-D array of word strings to sample the dictionary from.
+    :param dictionary_size: The amount of words to sample.
+    :param max_guesses: The most random guess words to play against a random underlying word. The amount is random.
+    :return: A tuple (words, int_words, chars_not_present, char_placements, char_nonplacements) of the sorted sampled
+             words, their encoding and the constraints left by the guesses, as used by enc_get_scores.
+    """
+
+    words = np.sort(rng.choice(all_words, size=min(dictionary_size, len(all_words)), replace=False))
+    int_words = np.array([[char_to_int(c) for c in word] for word in words], dtype=np.int8)
+    chars_not_present = np.full(ALPHABET_LENGTH, False, dtype=np.int8)
+    char_placements = np.full((ALPHABET_LENGTH, WORD_LENGTH), NULL_INTEGER, dtype=np.int8)
+    char_nonplacements = np.full((ALPHABET_LENGTH, WORD_LENGTH), NULL_INTEGER, dtype=np.int8)
+    underlying_word = int_words[rng.integers(len(int_words))]
+    for _ in range(rng.integers(max_guesses + 1)):
+        enc_update_constraints(int_words[rng.integers(len(int_words))], underlying_word, chars_not_present,
+                               char_placements, char_nonplacements)
+    return words, int_words, chars_not_present, char_placements, char_nonplacements
+
+
+def verify_pattern_scores(states=20, dictionary_size=400, seed=0, distinct_letters=False, print_progress=True):
+    """
+    :param states: The amount of random constraint states to compare the scoring kernels on.
+    :param dictionary_size: The amount of words randomly sampled from the word list for each state. The reference
+                            kernel is cubic in this value, so it should be kept small.
+    :param seed: The seed for the random number generator, so that runs can be repeated.
+    :param distinct_letters: A boolean corresponding to whether to only sample words without repeated letters.
+    :param print_progress: A boolean corresponding to whether to print a message for every state compared.
+    :return: A dictionary with the amount of states compared, the amount of states where every score matched, the
+             amount of states where the best guess word matched, and the amount of individual scores that matched.
+
+    This function checks enc_get_pattern_scores against the reference kernel enc_get_scores. Each state is created by
+    playing between zero and two random guess words against a random underlying word with enc_update_constraints.
+    Scores can only differ when repeated letters are involved, since the reference kernel does not track letter counts
+    (a green letter that appears again in the underlying word is recorded as both placed and not placed there), so
+    with distinct_letters=True every score must match.
+    """
+
+    rng = np.random.default_rng(seed)
+    all_words = np.array([word for word in get_lexicon().words if not distinct_letters or len(set(word)) == len(word)])
+    results = {"states": 0, "matching_states": 0, "matching_best_words": 0, "matching_scores": 0, "scores": 0}
+
+    for state in range(states):
+
+        # Create a random state.
+        words, int_words, chars_not_present, char_placements, char_nonplacements = create_random_state(
+            rng, all_words, dictionary_size, 2)
+
+        # Score the state with both kernels.
+        reference_scores = enc_get_scores(int_words, chars_not_present, char_placements, char_nonplacements)
+        consistency = enc_get_consistency_mask(int_words, chars_not_present, char_placements, char_nonplacements)
+        pattern_matrix = enc_get_pattern_matrix(int_words, int_words)
+        pattern_scores = enc_get_pattern_scores(pattern_matrix, np.flatnonzero(consistency), consistency,
+                                                get_num_threads())
+
+        # Record the comparison.
+        matching_scores = int(np.sum(reference_scores == pattern_scores))
+        results["states"] += 1
+        results["matching_states"] += int(matching_scores == len(words))
+        results["matching_best_words"] += int(np.argmin(reference_scores) == np.argmin(pattern_scores))
+        results["matching_scores"] += matching_scores
+        results["scores"] += len(words)
+        if print_progress:
+            print("State", str(state + 1) + "/" + str(states) + ":", np.sum(consistency), "consistent words,",
+                  matching_scores, "/", len(words), "scores match, best words:", words[np.argmin(reference_scores)],
+                  words[np.argmin(pattern_scores)])
+
+    return results
+
+
+def get_scaling_thread_counts():
+    """
+    :return: The thread counts to benchmark: 1, 2, 4 and 8 where Numba has that many threads, and every thread.
+    """
+
+    return sorted({threads for threads in (1, 2, 4, 8) if threads <= config.NUMBA_NUM_THREADS}
+                  | {config.NUMBA_NUM_THREADS})
+
+
+def time_kernel(kernel, arguments, threads, repeats):
+    """
+    :param kernel: A compiled kernel.
+    :param arguments: A tuple of the arguments to call it with.
+    :param threads: The amount of threads to run it on.
+    :param repeats: The amount of times to run it.
+    :return: A tuple (seconds, result), the fastest time of a run and the result of the last run.
+    """
+
+    best_time = np.inf
+    with limit_threads(threads):
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            result = kernel(*arguments)
+            best_time = min(best_time, time.perf_counter() - start_time)
+    return best_time, result
+
+
+def get_production_kernels(lexicon, pattern_matrix, answer_indexes, threads):
+    """
+    :param lexicon: An object of type Lexicon, as defined in Lexicon.
+    :param pattern_matrix: The pattern matrix of lexicon, as returned by load_pattern_matrix.
+    :param answer_indexes: A sorted 1-D integer array listing the possible underlying words.
+    :param threads: The amount of threads the kernels will run on.
+    :return: A list of (name, kernel, arguments) tuples, one for every scoring kernel the solver runs, each scoring
+             every lexicon word against answer_indexes. The pruned kernel is given an infinite bound, so it abandons no
+             word, and the multi board kernel splits answer_indexes over two boards.
+    """
+
+    consistency = np.full(len(lexicon), False)
+    consistency[answer_indexes] = True
+    board_starts = np.array([0, len(answer_indexes) // 2, len(answer_indexes)])
+    inconsistent_boards = 2 - np.bincount(answer_indexes, minlength=len(lexicon))
+    return [
+        ("enc_get_pattern_scores", enc_get_pattern_scores, (pattern_matrix, answer_indexes, consistency, threads)),
+        ("enc_get_metric_scores", enc_get_metric_scores,
+         (pattern_matrix, answer_indexes, get_answer_weights(lexicon, answer_indexes, "entropy"), consistency,
+          SCORING_METRICS["entropy"], threads)),
+        ("enc_get_pruned_pattern_scores", enc_get_pruned_pattern_scores,
+         (pattern_matrix, answer_indexes, np.arange(len(lexicon)), consistency, lexicon.frequencies, np.inf, threads)),
+        ("enc_get_multi_board_scores", enc_get_multi_board_scores,
+         (pattern_matrix, answer_indexes, board_starts, inconsistent_boards, threads)),
+    ]
+
+
+def run_scaling_benchmark(dictionary_sizes=(50, 100, 200), thread_counts=None, repeats=3, seed=0,
+                          print_progress=True, answer_counts=(100, 1000, 10000)):
+    """
+    :param dictionary_sizes: The amounts of words to sample from the word list, one state for each. The kernels are
+                             cubic in this value.
+    :param thread_counts: The thread counts to run the kernels on, or None for get_scaling_thread_counts.
+    :param repeats: The amount of runs to take the fastest of.
+    :param seed: The seed for the random number generator, so that runs can be repeated.
+    :param print_progress: A boolean corresponding to whether to print a line for every result.
+    :param answer_counts: The amounts of possible underlying words to sample from the lexicon, one state for each, to
+                          time the kernels the solver runs with. They are clamped to the size of the lexicon.
+    :return: A dictionary with two lists. "reference" has one dictionary per dictionary size and thread count, with
+             the seconds taken by enc_get_scores ("reference_s") and by enc_get_scratch_scores ("scratch_s"), the
+             speedup of each over its own run on one thread, the speedup of the scratch kernel over the reference
+             kernel, and whether their scores matched. "production" has one dictionary per answer count, thread count
+             and kernel of get_production_kernels, with its seconds, its speedup over its own run on one thread, and
+             whether its scores matched those of the run on one thread.
+
+    Each reference state is an empty grid, so every sampled word is consistent and the work is cubic in the dictionary
+    size. The production kernels score every word of the lexicon through the cached pattern matrix. The kernels are
+    compiled before timing. Thread counts are clamped to the threads Numba started with, and speedups beyond the
+    amount of cores of the machine are not expected.
+    """
+
+    if thread_counts is None:
+        thread_counts = get_scaling_thread_counts()
+    rng = np.random.default_rng(seed)
+    lexicon = get_lexicon()
+    all_words = lexicon.words
+    thread_counts = sorted({max(1, min(threads, config.NUMBA_NUM_THREADS)) for threads in thread_counts})
+    results = {"reference": [], "production": []}
+
+    for dictionary_size in dictionary_sizes:
+        words, int_words, chars_not_present, char_placements, char_nonplacements = create_random_state(
+            rng, all_words, dictionary_size, 0)
+        constraints = (chars_not_present, char_placements, char_nonplacements)
+        enc_get_scores(int_words[:1], *constraints)
+        enc_get_scratch_scores(int_words[:1], *constraints, 1)
+
+        single_thread_times = None
+        for threads in thread_counts:
+            reference_time, reference_scores = time_kernel(enc_get_scores, (int_words, *constraints), threads,
+                                                           repeats)
+            scratch_time, scratch_scores = time_kernel(enc_get_scratch_scores, (int_words, *constraints, threads),
+                                                       threads, repeats)
+            if single_thread_times is None:
+                single_thread_times = (reference_time, scratch_time)
+            result = {"dictionary_size": len(words), "threads": threads, "reference_s": reference_time,
+                      "scratch_s": scratch_time, "reference_speedup": single_thread_times[0] / reference_time,
+                      "scratch_speedup": single_thread_times[1] / scratch_time,
+                      "scratch_over_reference": reference_time / scratch_time,
+                      "matching": bool(np.array_equal(reference_scores, scratch_scores))}
+            results["reference"].append(result)
+            if print_progress:
+                print(json.dumps(result))
+
+    pattern_matrix = load_pattern_matrix(lexicon)
+    for answer_count in answer_counts:
+        answer_indexes = np.sort(rng.choice(len(lexicon), size=min(answer_count, len(lexicon)), replace=False))
+        for _, kernel, arguments in get_production_kernels(lexicon, pattern_matrix, answer_indexes[:1], 1):
+            kernel(*arguments)
+
+        single_thread_runs = {}
+        for threads in thread_counts:
+            for name, kernel, arguments in get_production_kernels(lexicon, pattern_matrix, answer_indexes, threads):
+                kernel_time, scores = time_kernel(kernel, arguments, threads, repeats)
+                if name not in single_thread_runs:
+                    single_thread_runs[name] = (kernel_time, scores)
+                result = {"kernel": name, "answers": len(answer_indexes), "threads": threads, "seconds": kernel_time,
+                          "speedup": single_thread_runs[name][0] / kernel_time,
+                          "matching": bool(np.array_equal(single_thread_runs[name][1], scores))}
+                results["production"].append(result)
+                if print_progress:
+                    print(json.dumps(result))
+
+    return results
+
+
+def fill_row(constraints, row, word, pattern):
+    """
+    :param constraints: An object of type Constraints, as defined in BasicStructures.
+    :param row: The index of the row to fill.
+    :param word: The guessed word string.
+    :param pattern: An integer in range(PATTERN_COUNT), the colors shown for the guess.
+    :return: None
+    """
+
+    constraints.set_row(row, word, pattern_to_colors(pattern))
+
+
+def verify_constraint_masks(states=200, seed=0, print_progress=True):
+    """
+    :param states: The amount of random constraint states to compare.
+    :param seed: The seed for the random number generator, so that runs can be repeated.
+    :param print_progress: A boolean corresponding to whether to print a message for every mismatching state.
+    :return: A dictionary with the amount of states compared, the amount of states where the mask filter found exactly
+             the words a SolverSession keeps, and the total time in seconds spent by the mask filter and by the
+             reference filter enc_get_consistency_mask.
+
+    Each state plays between one and five random guess words against a random underlying word. A SolverSession
+    filters by feedback pattern, which applies Wordle's rules for repeated letters exactly, so the two must agree.
+    """
+
+    rng = np.random.default_rng(seed)
+    lexicon = get_lexicon()
+    session = SolverSession()
+    results = {"states": 0, "matching_states": 0, "mask_time": 0.0, "reference_time": 0.0}
+
+    # Compile both kernels before timing them.
+    allowed_masks, min_counts, max_counts = Constraints().to_solver_arrays()
+    enc_get_mask_consistency(lexicon.encoded_words, allowed_masks, min_counts, max_counts)
+    enc_get_consistency_mask(lexicon.encoded_words, np.full(ALPHABET_LENGTH, False, dtype=np.int8),
+                             np.full((ALPHABET_LENGTH, WORD_LENGTH), NULL_INTEGER, dtype=np.int8),
+                             np.full((ALPHABET_LENGTH, WORD_LENGTH), NULL_INTEGER, dtype=np.int8))
+
+    for state in range(states):
+
+        # Create a random state.
+        constraints = Constraints()
+        underlying_word = lexicon.encoded_words[rng.integers(len(lexicon))]
+        for row in range(rng.integers(1, ROWS)):
+            guess_index = rng.integers(len(lexicon))
+            fill_row(constraints, row, lexicon.words[guess_index],
+                     enc_get_pattern(lexicon.encoded_words[guess_index], underlying_word))
+        session.sync(constraints)
+
+        # Filter with the mask kernel.
+        start_time = time.perf_counter()
+        allowed_masks, min_counts, max_counts = constraints.to_solver_arrays()
+        consistency = enc_get_mask_consistency(lexicon.encoded_words, allowed_masks, min_counts, max_counts)
+        results["mask_time"] += time.perf_counter() - start_time
+
+        # Filter with the reference kernel, using the constraints it would see from the same rows.
+        chars_not_present = np.full(ALPHABET_LENGTH, False, dtype=np.int8)
+        char_placements = np.full((ALPHABET_LENGTH, WORD_LENGTH), NULL_INTEGER, dtype=np.int8)
+        char_nonplacements = np.full((ALPHABET_LENGTH, WORD_LENGTH), NULL_INTEGER, dtype=np.int8)
+        for word, _ in session.rows:
+            enc_update_constraints(lexicon.encoded_words[lexicon.indexes[word]], underlying_word, chars_not_present,
+                                   char_placements, char_nonplacements)
+        start_time = time.perf_counter()
+        enc_get_consistency_mask(lexicon.encoded_words, chars_not_present, char_placements, char_nonplacements)
+        results["reference_time"] += time.perf_counter() - start_time
+
+        # Record the comparison.
+        matching = np.array_equal(np.flatnonzero(consistency), session.candidates)
+        results["states"] += 1
+        results["matching_states"] += int(matching)
+        if print_progress and not matching:
+            print("State", str(state + 1) + ":", session.rows, np.sum(consistency), "!=", len(session.candidates))
+
+    return results
+
+
+def verify_pruning(states=50, seed=0, print_progress=True):
+    """
+    :param states: The amount of random constraint states to compare.
+    :param seed: The seed for the random number generator, so that runs can be repeated.
+    :param print_progress: A boolean corresponding to whether to print a message for every mismatching state.
+    :return: A dictionary with the amount of states compared, the amount of states where the pruned search chose the
+             same word as full scoring, the amount where rank_candidates gave the same RANKING_SIZE words both ways,
+             the total time in seconds spent choosing each way, and the pruning_statistics gathered by the pruned
+             searches.
+
+    Each state plays between zero and three random guess words against a random underlying word, and excludes a few
+    random words from being guessed, so ties and exclusions are exercised as well.
+    """
+
+    rng = np.random.default_rng(seed)
+    lexicon = get_lexicon()
+    session = SolverSession()
+    results = {"states": 0, "matching_states": 0, "matching_rankings": 0, "pruned_time": 0.0, "full_time": 0.0}
+
+    # Compile both paths before timing them.
+    choose_from_candidates(lexicon, np.arange(2), prune=True)
+    choose_from_candidates(lexicon, np.arange(2), prune=False)
+    for key in pruning_statistics:
+        pruning_statistics[key] = 0
+
+    for state in range(states):
+
+        # Create a random state.
+        session.reset()
+        underlying_word = lexicon.encoded_words[rng.integers(len(lexicon))]
+        for _ in range(rng.integers(0, 4)):
+            guess_index = rng.integers(len(lexicon))
+            session.commit_row(lexicon.words[guess_index],
+                               enc_get_pattern(lexicon.encoded_words[guess_index], underlying_word))
+        words_to_exclude = set(lexicon.words[rng.integers(len(lexicon), size=rng.integers(0, 20))])
+        words_to_exclude.update(lexicon.words[session.candidates[:rng.integers(0, 3)]])
+
+        # Choose a word with and without pruning.
+        start_time = time.perf_counter()
+        pruned_word = choose_from_candidates(lexicon, session.candidates, words_to_exclude, prune=True)
+        results["pruned_time"] += time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        full_word = choose_from_candidates(lexicon, session.candidates, words_to_exclude, prune=False)
+        results["full_time"] += time.perf_counter() - start_time
+
+        # Rank words with and without pruning.
+        pruned_ranking = rank_candidates(lexicon, session.candidates, RANKING_SIZE, words_to_exclude, prune=True)
+        full_ranking = rank_candidates(lexicon, session.candidates, RANKING_SIZE, words_to_exclude, prune=False)
+
+        # Record the comparison.
+        results["states"] += 1
+        results["matching_states"] += int(pruned_word == full_word)
+        results["matching_rankings"] += int(pruned_ranking == full_ranking)
+        if print_progress and pruned_word != full_word:
+            print("State", str(state + 1) + ":", session.rows, pruned_word, "!=", full_word)
+        if print_progress and pruned_ranking != full_ranking:
+            print("State", str(state + 1) + ":", session.rows, pruned_ranking, "!=", full_ranking)
+
+    results.update(pruning_statistics)
+    return results
+
+
+def initialize_worker(opening_book_directory="../files/opening_book.json", metric=DEFAULT_METRIC, instrument=False,
+                      answer_threshold=None, ranking_cache_directory=None):
+    """
+    :param opening_book_directory: A string representing the pathway to the opening book the games are played with.
+    :param metric: A key of SCORING_METRICS, the score the session chooses words by.
+    :param instrument: A boolean corresponding to whether to record every suggestion with instrumentation.
+    :param answer_threshold: The answer_threshold of the answer pool the session scores against, or None.
+    :param ranking_cache_directory: A string representing the pathway to the ranking cache file the session starts
+                                    from, or None.
+    :return: None
+
+    Creates the session of this process and warms it up with SolverSession.warm_up, so that the lexicon, pattern
+    matrix, opening book and compiled kernels are all loaded before the first game is timed. The loading is recorded
+    as well when instrumenting, and returned with the first game.
+    """
+
+    global worker_session
+    if instrument:
+        instrumentation.enable()
+    worker_session = SolverSession(opening_book_directory=opening_book_directory, metric=metric,
+                                   answer_threshold=answer_threshold, ranking_cache_directory=ranking_cache_directory)
+    worker_session.warm_up()
+    if instrument:
+        worker_records.append(instrumentation.take_last_record())
+
+
+def play_game(underlying_word):
+    """
+    :param underlying_word: The word string the solver has to find.
+    :return: A dictionary with the underlying word, the list of words guessed, whether the word was found within ROWS
+             guesses, the time in seconds each guess took to choose, the instrumentation record of each guess if
+             instrumentation is enabled, and the ranking cache statistics and entries added during the game.
+
+    The game is played through SolverSession.choose_word, the same path main.py uses, so the opening book is used.
+    """
+
+    if worker_session is None:
+        initialize_worker()
+    lexicon = worker_session.lexicon
+    encoded_underlying_word = np.array([char_to_int(c) for c in underlying_word], dtype=np.int8)
+    constraints = Constraints()
+    game = {"word": underlying_word, "guesses": [], "solved": False, "turn_times": []}
+    ranking_cache = get_ranking_cache(lexicon, worker_session.ranking_cache_directory)
+    ranking_statistics = dict(ranking_cache.statistics)
+
+    for row in range(ROWS):
+        start_time = time.perf_counter()
+        guess = worker_session.choose_word(constraints)
+        game["turn_times"].append(time.perf_counter() - start_time)
+        if instrumentation.enabled:
+            worker_records.append(instrumentation.take_last_record())
+        if guess == NULL_WORD:
+            break
+        game["guesses"].append(guess)
+        pattern = enc_get_pattern(lexicon.encoded_words[lexicon.indexes[guess]], encoded_underlying_word)
+        if pattern == ALL_GREEN_PATTERN:
+            game["solved"] = True
+            break
+        fill_row(constraints, row, guess, pattern)
+
+    game["records"] = worker_records[:]
+    worker_records.clear()
+    game["ranking_cache"] = {name: ranking_cache.statistics[name] - ranking_statistics[name]
+                             for name in ranking_statistics}
+    game["ranking_cache_changes"] = ranking_cache.take_changes()
+    return game
+
+
+def run_self_play(sample_size=None, seed=0, processes=None, opening_book_directory="../files/opening_book.json",
+                  results_directory=None, print_progress=True, games_directory=None, metric=DEFAULT_METRIC,
+                  instrument=False, answer_threshold=None, ranking_cache_directory=None):
+    """
+    :param sample_size: The amount of underlying words to play, sampled with seed. None plays every word of the answer
+                        pool.
+    :param seed: The seed for the random number generator, so that runs can be repeated.
+    :param processes: The amount of worker processes to play games in. None uses one per CPU.
+    :param opening_book_directory: A string representing the pathway to the opening book the games are played with.
+    :param results_directory: A string representing the pathway to write the results to as json, or None.
+    :param print_progress: A boolean corresponding to whether to print a message every 100 games.
+    :param games_directory: A string representing the pathway to record every game to as json lines, for
+                            replay_games, or None.
+    :param metric: A key of SCORING_METRICS, the score the solver chooses words by.
+    :param instrument: A boolean corresponding to whether to record every suggestion with instrumentation, and add a
+                       summary of where the time went to the results.
+    :param answer_threshold: The answer_threshold of the answer pool the solver scores against and the underlying
+                             words are chosen from, as passed to Lexicon.get_answer_pool, or None for every word.
+    :param ranking_cache_directory: A string representing the pathway to a .npz ranking cache. Every worker starts
+                                    from the rankings stored there, and the rankings they add are saved back to it.
+    :return: A dictionary summarising the run: the distribution of guess counts, the failure rate, percentiles of the
+             time taken per guess in milliseconds, the amount of games played per second, and the hits, misses and
+             evictions of the ranking caches of the workers.
+    """
+
+    # Choose underlying words.
+    lexicon = get_lexicon()
+    words = lexicon.words[lexicon.get_answer_pool(answer_threshold)]
+    if sample_size is not None and sample_size < len(words):
+        words = np.sort(np.random.default_rng(seed).choice(words, size=sample_size, replace=False))
+    words = [str(word) for word in words]
+
+    # Play every game.
+    games = []
+    start_time = time.perf_counter()
+    with multiprocessing.Pool(processes, initializer=initialize_worker,
+                              initargs=(opening_book_directory, metric, instrument, answer_threshold,
+                                        ranking_cache_directory)) as pool:
+        for game in pool.imap_unordered(play_game, words, chunksize=8):
+            games.append(game)
+            if print_progress and len(games) % 100 == 0:
+                print("Games played:", "(" + str(len(games)) + "/" + str(len(words)) + ")")
+    total_time = time.perf_counter() - start_time
+
+    # Summarise results.
+    guess_counts = {}
+    for game in games:
+        outcome = str(len(game["guesses"])) if game["solved"] else "failed"
+        guess_counts[outcome] = guess_counts.get(outcome, 0) + 1
+    solved_guesses = [len(game["guesses"]) for game in games if game["solved"]]
+    turn_times = np.array([turn_time for game in games for turn_time in game["turn_times"]]) * 1000
+    results = {
+        "games": len(games),
+        "sample_size": sample_size,
+        "seed": seed,
+        "processes": processes if processes is not None else multiprocessing.cpu_count(),
+        "opening_book": opening_book_directory,
+        "metric": metric,
+        "answer_threshold": answer_threshold,
+        "guess_distribution": dict(sorted(guess_counts.items())),
+        "failure_rate": guess_counts.get("failed", 0) / max(1, len(games)),
+        "mean_guesses": float(np.mean(solved_guesses)) if solved_guesses else None,
+        "turn_latency_ms": {name: float(np.percentile(turn_times, percentile)) if len(turn_times) else None
+                            for name, percentile in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+        "games_per_second": len(games) / total_time,
+        "total_time": total_time,
+        "failed_words": sorted(game["word"] for game in games if not game["solved"]),
+        "ranking_cache": {name: sum(game["ranking_cache"][name] for game in games)
+                          for name in ("hits", "misses", "evictions")},
+    }
+    if instrument:
+        instrumentation.reset()
+        for record in (record for game in games for record in game["records"]):
+            instrumentation.add_record(record)
+        results["instrumentation"] = instrumentation.get_summary()
+
+    if ranking_cache_directory is not None:
+        ranking_cache = get_ranking_cache(lexicon, ranking_cache_directory)
+        for game in games:
+            ranking_cache.update(game["ranking_cache_changes"])
+        ranking_cache.save(ranking_cache_directory)
+        results["ranking_cache"]["entries"] = len(ranking_cache)
+
+    if results_directory is not None:
+        with open(results_directory, 'w') as f:
+            f.write(json.dumps(results, indent=2))
+    if games_directory is not None:
+        with open(games_directory, 'w') as f:
+            for game in sorted(games, key=lambda game: game["word"]):
+                f.write(json.dumps({"word": game["word"], "guesses": game["guesses"]}) + "\n")
+    return results
+
+
+def time_multi_board_kernels(session, repeats):
+    """
+    :param session: A MultiBoardSession with at least two unsolved boards.
+    :param repeats: The amount of runs to take the fastest of.
+    :return: A tuple (shared_seconds, separate_seconds, matching), the time to score the unsolved boards with one call
+             of enc_get_multi_board_scores and with one call of enc_get_pattern_scores per board, and whether both
+             gave the same scores.
+    """
+
+    lexicon = session.lexicon
+    pattern_matrix = load_pattern_matrix(lexicon, session.pattern_directory)
+    board_answers = [session.answers[b] for b in session.get_unsolved_boards()]
+    answer_indexes = np.concatenate(board_answers)
+    board_starts = np.concatenate(([0], np.cumsum([len(answers) for answers in board_answers])))
+    inconsistent_boards = len(board_answers) - np.bincount(answer_indexes, minlength=len(lexicon))
+    with limit_threads(session.threads):
+        threads = get_num_threads()
+    shared_time, shared_scores = time_kernel(enc_get_multi_board_scores, (pattern_matrix, answer_indexes, board_starts,
+                                                                          inconsistent_boards, threads),
+                                             threads, repeats)
+
+    separate_time, separate_scores = 0.0, np.zeros(len(lexicon), dtype=np.int64)
+    for answers in board_answers:
+        guess_consistency = np.zeros(len(lexicon), dtype=np.bool_)
+        guess_consistency[answers] = True
+        board_time, board_scores = time_kernel(enc_get_pattern_scores,
+                                               (pattern_matrix, answers, guess_consistency, threads), threads, repeats)
+        separate_time += board_time
+        separate_scores += board_scores
+    return shared_time, separate_time, bool(np.array_equal(shared_scores, separate_scores))
+
+
+def run_multi_board_benchmark(boards=4, games=20, seed=0, answer_threshold=None, repeats=3, print_progress=True):
+    """
+    :param boards: The amount of boards played at once, such as 4 for Quordle or 8 for Octordle.
+    :param games: The amount of games to play.
+    :param seed: The seed for the random number generator, so that runs can be repeated.
+    :param answer_threshold: The answer_threshold of the answer pool the solver scores against and the underlying
+                             words are chosen from, as passed to Lexicon.get_answer_pool, or None for every word.
+    :param repeats: The amount of runs to take the fastest of when timing the kernels.
+    :param print_progress: A boolean corresponding to whether to print a line for every game.
+    :return: A dictionary summarising the run: the distribution of guess counts, the failure rate, percentiles of the
+             time taken per guess in milliseconds, and the total seconds taken by the shared scoring kernel and by
+             scoring every board separately, timed on the second turn of every game, with whether their scores
+             matched.
+
+    Games are played in this process through MultiBoardSession.choose_word, within get_multi_board_rows guesses.
+    The first suggestion is made before timing, so the first turn of every game is a ranking cache hit.
+    """
+
+    # Choose underlying words.
+    lexicon = get_lexicon()
+    rng = np.random.default_rng(seed)
+    answer_pool = lexicon.get_answer_pool(answer_threshold)
+    session = MultiBoardSession(boards, answer_threshold=answer_threshold)
+    pattern_matrix = load_pattern_matrix(lexicon, session.pattern_directory)
+    session.choose_word()
+
+    # Play every game.
+    guess_counts, solved_guesses, turn_times = {}, [], []
+    kernel_times = {"shared_s": 0.0, "separate_s": 0.0, "matching": True}
+    for game in range(games):
+        underlying_indexes = rng.choice(answer_pool, size=boards)
+        session.reset()
+        guesses = []
+        for row in range(get_multi_board_rows(boards)):
+            if row == 1 and len(session.get_unsolved_boards()) > 1:
+                shared_time, separate_time, matching = time_multi_board_kernels(session, repeats)
+                kernel_times["shared_s"] += shared_time
+                kernel_times["separate_s"] += separate_time
+                kernel_times["matching"] &= matching
+            start_time = time.perf_counter()
+            guess = session.choose_word()
+            turn_times.append(time.perf_counter() - start_time)
+            if guess == NULL_WORD:
+                break
+            guesses.append(guess)
+            session.commit_row(guess, pattern_matrix[lexicon.indexes[guess]][underlying_indexes])
+            if all(session.solved):
+                break
+        outcome = str(len(guesses)) if all(session.solved) else "failed"
+        guess_counts[outcome] = guess_counts.get(outcome, 0) + 1
+        if all(session.solved):
+            solved_guesses.append(len(guesses))
+        if print_progress:
+            print("Game", str(game + 1) + ":", [str(lexicon.words[i]) for i in underlying_indexes], guesses)
+
+    # Summarise results.
+    turn_times = np.array(turn_times) * 1000
+    return {
+        "boards": boards,
+        "games": games,
+        "seed": seed,
+        "answer_threshold": answer_threshold,
+        "guess_distribution": dict(sorted(guess_counts.items())),
+        "failure_rate": guess_counts.get("failed", 0) / max(1, games),
+        "mean_guesses": float(np.mean(solved_guesses)) if solved_guesses else None,
+        "turn_latency_ms": {name: float(np.percentile(turn_times, percentile)) if len(turn_times) else None
+                            for name, percentile in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+        "kernels": dict(kernel_times, shared_over_separate=kernel_times["separate_s"] / kernel_times["shared_s"]
+                        if kernel_times["shared_s"] else None),
+    }
+
+
+def replay_games(games_directory, clients=8, processes=None, address=None,
+                 opening_book_directory="../files/opening_book.json"):
+    """
+    :param games_directory: A string representing the pathway to games recorded by run_self_play.
+    :param clients: The amount of games played against the service at once.
+    :param processes: The amount of worker processes of the service. Ignored when address is given.
+    :param address: A (host, port) tuple of a running SolverService socket, or None to start a service in this
+                    process.
+    :param opening_book_directory: A string representing the pathway to the opening book of a service started here.
+    :return: A dictionary with the amount of requests sent, the requests answered per second, percentiles of the
+             latency seen by the clients in milliseconds, the amount of errors, and the amount of answers that differ
+             from the recorded guess. For a service started here, its statistics are included as well.
+
+    Each client replays one recorded game at a time, sending the rows of every turn and waiting for the answer before
+    sending the next turn, as a player would. Many games share their first turns, so identical requests arrive
+    together and are coalesced by the service.
+    """
+
+    # Turn every recorded game into the requests of its turns.
+    with open(games_directory, 'r') as f:
+        games = [json.loads(line) for line in f if line.strip()]
+    lexicon = get_lexicon()
+    game_queue = queue.Queue()
+    for game in games:
+        encoded_underlying_word = np.array([char_to_int(c) for c in game["word"]], dtype=np.int8)
+        rows, turns = [], []
+        for guess in game["guesses"]:
+            turns.append(({"rows": list(rows)}, guess))
+            pattern = enc_get_pattern(lexicon.encoded_words[lexicon.indexes[guess]], encoded_underlying_word)
+            rows.append([guess, pattern_to_string(pattern)])
+        game_queue.put(turns)
+
+    # Start a service, and wait for its workers to be warm.
+    service = None
+    if address is None:
+        service = SolverService(processes, opening_book_directory)
+        answered = threading.Event()
+        service.submit({"rows": []}, lambda response: answered.set())
+        answered.wait()
+        service.statistics = {"requests": 0, "coalesced": 0, "errors": 0}
+
+    # Replay the games from every client.
+    lock = threading.Lock()
+    latencies = []
+    results = {"games": len(games), "requests": 0, "clients": clients, "errors": 0, "mismatches": 0}
+
+    def run_client():
+        connection = None if service is not None else socket.create_connection(address)
+        stream = None if connection is None else connection.makefile('rw', encoding='utf-8')
+        while True:
+            try:
+                turns = game_queue.get_nowait()
+            except queue.Empty:
+                break
+            for request, guess in turns:
+                start_time = time.perf_counter()
+                if service is not None:
+                    answered, response = threading.Event(), {}
+                    service.submit(request, lambda result: (response.update(result), answered.set()))
+                    answered.wait()
+                else:
+                    stream.write(json.dumps(request) + "\n")
+                    stream.flush()
+                    response = json.loads(stream.readline())
+                latency = time.perf_counter() - start_time
+                with lock:
+                    latencies.append(latency)
+                    results["requests"] += 1
+                    results["errors"] += int("error" in response)
+                    results["mismatches"] += int(response.get("word") != guess)
+        if connection is not None:
+            connection.close()
+
+    start_time = time.perf_counter()
+    threads = [threading.Thread(target=run_client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total_time = time.perf_counter() - start_time
+
+    # Summarise results.
+    latencies = np.array(latencies) * 1000
+    results["requests_per_second"] = results["requests"] / total_time
+    results["latency_ms"] = {name: float(np.percentile(latencies, percentile)) if len(latencies) else None
+                             for name, percentile in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))}
+    results["total_time"] = total_time
+    if service is not None:
+        service.close()
+        results["processes"] = processes if processes is not None else multiprocessing.cpu_count()
+        results["service"] = service.statistics
+    return results
+
+
+def compare_self_play_results(baseline_directory, results):
+    """
+    :param baseline_directory: A string representing the pathway to a json file written by run_self_play.
+    :param results: A dictionary returned by run_self_play.
+    :return: A dictionary giving, for each headline metric, the baseline value, the new value and their difference.
+    """
+
+    with open(baseline_directory, 'r') as f:
+        baseline = json.load(f)
+    metrics = {"failure_rate": lambda r: r["failure_rate"], "mean_guesses": lambda r: r["mean_guesses"],
+               "p50_ms": lambda r: r["turn_latency_ms"]["p50"], "p99_ms": lambda r: r["turn_latency_ms"]["p99"],
+               "games_per_second": lambda r: r["games_per_second"]}
+    comparison = {}
+    for name, metric in metrics.items():
+        old, new = metric(baseline), metric(results)
+        comparison[name] = {"baseline": old, "new": new,
+                            "difference": None if old is None or new is None else new - old}
+    return comparison
+
+
+def measure_startup(warmup=True, import_start_time=None):
+    """
+    :param warmup: A boolean corresponding to whether to run warmup_kernels before the first suggestion.
+    :param import_start_time: The time.perf_counter() value from before the solver modules were first imported, or
+                              None to measure the import from now.
+    :return: A dictionary with the seconds taken to import the solver, to warm up the kernels, to make the first
+             suggestion from the opening book and to make the first suggestion that needs scoring, together with the
+             amount of kernel signatures that had to be compiled because they were not in the on-disk cache.
+
+    This is meant to be run in a fresh interpreter, see run_startup_benchmark.
+    """
+
+    start_time = time.perf_counter() if import_start_time is None else import_start_time
+    import SolverSession
+    results = {"import_time": time.perf_counter() - start_time}
+
+    start_time = time.perf_counter()
+    if warmup:
+        SolverSession.warmup_kernels()
+    results["warmup_time"] = time.perf_counter() - start_time
+
+    session = SolverSession.SolverSession()
+    start_time = time.perf_counter()
+    session.choose_word(SolverSession.Constraints())
+    results["first_book_suggestion_time"] = time.perf_counter() - start_time
+
+    # Guess a word that is not the tree's, so neither the opening book nor the decision tree has the next word.
+    start_time = time.perf_counter()
+    session.choose_word(SolverSession.rows_to_constraints([("fuzzy", 0)]))
+    results["first_scored_suggestion_time"] = time.perf_counter() - start_time
+
+    results["time_to_first_suggestion"] = sum(results.values())
+    results["compilations"] = sum(SolverSession.get_kernel_compilations().values())
+    return results
+
+
+def clear_kernel_cache():
+    """
+    :return: The amount of cached kernel files removed from __pycache__.
+    """
+
+    cache_files = glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__", "*.nb[ic]"))
+    for cache_file in cache_files:
+        os.remove(cache_file)
+    return len(cache_files)
+
+
+def run_startup_benchmark(runs=2, warmup=True, clear_cache=False):
+    """
+    :param runs: The amount of fresh interpreters to measure, one after another.
+    :param warmup: A boolean corresponding to whether to run warmup_kernels before the first suggestion.
+    :param clear_cache: A boolean corresponding to whether to delete the cached kernels before the first run, so that
+                        it measures a cold start without any cache.
+    :return: A list with the dictionary returned by measure_startup for each run.
+
+    Every run after the first should report zero compilations, since the first run leaves every kernel in the cache.
+    """
+
+    if clear_cache:
+        clear_kernel_cache()
+    code = ("import json, time; start_time = time.perf_counter(); import Benchmarks; "
+            "print(json.dumps(Benchmarks.measure_startup(" + str(warmup) + ", start_time)))")
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmarks and consistency checks for the wordle solver.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    verify_parser = subparsers.add_parser("verify", help="Compare the pattern scoring kernel against enc_get_scores.")
+    verify_parser.add_argument("--states", type=int, default=20)
+    verify_parser.add_argument("--dictionary-size", type=int, default=400)
+    verify_parser.add_argument("--seed", type=int, default=0)
+    verify_parser.add_argument("--distinct-letters", action="store_true")
+
+    scaling_parser = subparsers.add_parser("scaling", help="Time the scoring kernels on 1/2/4/8/N threads.")
+    scaling_parser.add_argument("--dictionary-sizes", type=int, nargs="+", default=[50, 100, 200])
+    scaling_parser.add_argument("--threads", type=int, nargs="+", default=None)
+    scaling_parser.add_argument("--repeats", type=int, default=3)
+    scaling_parser.add_argument("--seed", type=int, default=0)
+    scaling_parser.add_argument("--answer-counts", type=int, nargs="+", default=[100, 1000, 10000])
+
+    masks_parser = subparsers.add_parser("verify-masks", help="Compare the mask filter against pattern filtering.")
+    masks_parser.add_argument("--states", type=int, default=200)
+    masks_parser.add_argument("--seed", type=int, default=0)
+
+    pruning_parser = subparsers.add_parser("verify-pruning", help="Compare the pruned search against full scoring.")
+    pruning_parser.add_argument("--states", type=int, default=50)
+    pruning_parser.add_argument("--seed", type=int, default=0)
+
+    self_play_parser = subparsers.add_parser("self-play", help="Play the solver against every word or a sample.")
+    self_play_parser.add_argument("--sample", type=int, default=None)
+    self_play_parser.add_argument("--seed", type=int, default=0)
+    self_play_parser.add_argument("--processes", type=int, default=None)
+    self_play_parser.add_argument("--opening-book", default="../files/opening_book.json")
+    self_play_parser.add_argument("--metric", default=DEFAULT_METRIC, choices=list(SCORING_METRICS))
+    self_play_parser.add_argument("--answer-threshold", type=float, default=None,
+                                  help="Only words at least this frequent are answers, such as "
+                                       + str(ANSWER_FREQUENCY_THRESHOLD) + ".")
+    self_play_parser.add_argument("--output", default=None, help="Write the results to this json file.")
+    self_play_parser.add_argument("--baseline", default=None, help="Compare against an earlier results file.")
+    self_play_parser.add_argument("--instrument", action="store_true", help="Summarise where the time is spent.")
+    self_play_parser.add_argument("--ranking-cache", default=None,
+                                  help="Start from the rankings in this .npz file and save the new ones to it.")
+
+    multi_board_parser = subparsers.add_parser("multi-board", help="Play the solver on several boards at once.")
+    multi_board_parser.add_argument("--boards", type=int, default=4)
+    multi_board_parser.add_argument("--games", type=int, default=20)
+    multi_board_parser.add_argument("--seed", type=int, default=0)
+    multi_board_parser.add_argument("--answer-threshold", type=float, default=None)
+    multi_board_parser.add_argument("--repeats", type=int, default=3)
+
+    service_parser = subparsers.add_parser("service-load", help="Replay recorded games against a SolverService.")
+    service_parser.add_argument("--games", default="../files/recorded_games.jsonl",
+                                help="Games recorded by self-play. They are recorded first if the file is missing.")
+    service_parser.add_argument("--sample", type=int, default=200, help="The amount of games to record.")
+    service_parser.add_argument("--seed", type=int, default=0)
+    service_parser.add_argument("--clients", type=int, default=8)
+    service_parser.add_argument("--processes", type=int, default=None)
+    service_parser.add_argument("--port", type=int, default=None, help="Use the service running on this port.")
+    service_parser.add_argument("--host", default=SERVICE_HOST)
+
+    startup_parser = subparsers.add_parser("startup", help="Measure the time to the first suggestion.")
+    startup_parser.add_argument("--runs", type=int, default=2)
+    startup_parser.add_argument("--no-warmup", action="store_true")
+    startup_parser.add_argument("--clear-cache", action="store_true", help="Delete cached kernels before starting.")
+
+    arguments = parser.parse_args(arguments)
+    if arguments.command == "verify":
+        print(verify_pattern_scores(arguments.states, arguments.dictionary_size, arguments.seed,
+                                    arguments.distinct_letters))
+    elif arguments.command == "scaling":
+        run_scaling_benchmark(arguments.dictionary_sizes, arguments.threads, arguments.repeats, arguments.seed,
+                              answer_counts=arguments.answer_counts)
+    elif arguments.command == "verify-masks":
+        print(verify_constraint_masks(arguments.states, arguments.seed))
+    elif arguments.command == "verify-pruning":
+        print(verify_pruning(arguments.states, arguments.seed))
+    elif arguments.command == "self-play":
+        results = run_self_play(arguments.sample, arguments.seed, arguments.processes, arguments.opening_book,
+                                arguments.output, metric=arguments.metric, instrument=arguments.instrument,
+                                answer_threshold=arguments.answer_threshold,
+                                ranking_cache_directory=arguments.ranking_cache)
+        print(json.dumps(results, indent=2))
+        if arguments.baseline is not None:
+            print(json.dumps(compare_self_play_results(arguments.baseline, results), indent=2))
+    elif arguments.command == "multi-board":
+        print(json.dumps(run_multi_board_benchmark(arguments.boards, arguments.games, arguments.seed,
+                                                   arguments.answer_threshold, arguments.repeats), indent=2))
+    elif arguments.command == "service-load":
+        if not os.path.exists(arguments.games):
+            run_self_play(arguments.sample, arguments.seed, arguments.processes, print_progress=False,
+                          games_directory=arguments.games)
+        address = None if arguments.port is None else (arguments.host, arguments.port)
+        print(json.dumps(replay_games(arguments.games, arguments.clients, arguments.processes, address), indent=2))
+    elif arguments.command == "startup":
+        for run, results in enumerate(run_startup_benchmark(arguments.runs, not arguments.no_warmup,
+                                                            arguments.clear_cache)):
+            print("Run", str(run + 1) + ":", json.dumps(results))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,172 @@
+import zipfile
+
+from BasicStructures import *
+from Instrumentation import *
+
+# Decision trees that have already been loaded by this process, indexed by file path.
+loaded_decision_trees = {}
+
+
+# Decision tree class.
+class DecisionTree:
+
+    def __init__(self, lexicon_fingerprint, word_indexes=None, child_starts=None, child_patterns=None,
+                 child_nodes=None, answer_threshold=None, opening_book_fingerprint=None):
+        """
+        :param lexicon_fingerprint: The fingerprint of the Lexicon whose word indexes the nodes refer to.
+        :param word_indexes: A 1-D int32 array with one element per node, the lexicon index of the word to guess there.
+                             Node 0 is the empty grid.
+        :param child_starts: A 1-D int32 array size=len(word_indexes) + 1. The children of node i are elements
+                             child_starts[i] to child_starts[i + 1] of child_patterns and child_nodes.
+        :param child_patterns: A 1-D uint8 array, the pattern leading to each child, increasing within each node.
+        :param child_nodes: A 1-D int32 array, the node each child is.
+        :param answer_threshold: The answer_threshold of the answer pool the tree was built for, as passed to
+                                 Lexicon.get_answer_pool.
+        :param opening_book_fingerprint: The fingerprint of the OpeningBook whose words the tree follows, see
+                                         get_tree_opening_book, or None if it is not known.
+
+        Every node is the state reached by following the tree's own words from the empty grid, so looking up the word
+        for a game only takes one child lookup per row.
+        """
+
+        self.lexicon_fingerprint = lexicon_fingerprint
+        self.word_indexes = np.zeros(0, dtype=np.int32) if word_indexes is None else word_indexes
+        self.child_starts = np.zeros(1, dtype=np.int32) if child_starts is None else child_starts
+        self.child_patterns = np.zeros(0, dtype=np.uint8) if child_patterns is None else child_patterns
+        self.child_nodes = np.zeros(0, dtype=np.int32) if child_nodes is None else child_nodes
+        self.answer_threshold = answer_threshold
+        self.opening_book_fingerprint = opening_book_fingerprint
+
+    def __len__(self):
+        return len(self.word_indexes)
+
+    @classmethod
+    def from_nodes(cls, lexicon_fingerprint, nodes, answer_threshold=None, opening_book_fingerprint=None):
+        """
+        :param lexicon_fingerprint: The fingerprint of the Lexicon whose word indexes the nodes refer to.
+        :param nodes: A list of tuples (word_index, children), one per node with the empty grid first, where children
+                      maps each pattern to the position of the child node in the list.
+        :param answer_threshold: The answer_threshold of the answer pool the tree was built for.
+        :param opening_book_fingerprint: The fingerprint of the OpeningBook whose words the tree follows.
+        :return: The DecisionTree holding nodes.
+        """
+
+        child_counts = np.array([len(children) for _, children in nodes], dtype=np.int32)
+        children = [(pattern, node) for _, node_children in nodes for pattern, node in sorted(node_children.items())]
+        return cls(lexicon_fingerprint, np.array([word_index for word_index, _ in nodes], dtype=np.int32),
+                   np.concatenate(([0], np.cumsum(child_counts))).astype(np.int32),
+                   np.array([pattern for pattern, _ in children], dtype=np.uint8),
+                   np.array([node for _, node in children], dtype=np.int32), answer_threshold,
+                   opening_book_fingerprint)
+
+    def is_usable(self, answer_threshold, opening_book):
+        """
+        :param answer_threshold: The answer_threshold of the answer pool the caller scores against.
+        :param opening_book: The OpeningBook the caller follows, as returned by get_tree_opening_book.
+        :return: A boolean corresponding to whether the tree holds the words the caller would choose, which is only
+                 the case if it was built for the same answer pool and from the same opening book.
+        """
+
+        return (len(self) > 0 and self.answer_threshold == answer_threshold
+                and self.opening_book_fingerprint == opening_book.get_fingerprint())
+
+    def get_child(self, node, pattern):
+        """
+        :param node: A node of the tree, or NULL_INTEGER.
+        :param pattern: An integer in range(PATTERN_COUNT), the colors shown for the node's word.
+        :return: The node reached by the pattern, or NULL_INTEGER if it is not in the tree.
+        """
+
+        if node == NULL_INTEGER:
+            return NULL_INTEGER
+        start, end = self.child_starts[node], self.child_starts[node + 1]
+        i = start + np.searchsorted(self.child_patterns[start:end], pattern)
+        if i == end or self.child_patterns[i] != pattern:
+            return NULL_INTEGER
+        return int(self.child_nodes[i])
+
+    def follow(self, node, word, pattern, lexicon):
+        """
+        :param node: A node of the tree, or NULL_INTEGER.
+        :param word: The word string guessed at node.
+        :param pattern: An integer in range(PATTERN_COUNT), the colors shown for word.
+        :return: The node reached, or NULL_INTEGER if word is not the word of node or the pattern is not in the tree.
+        """
+
+        if node == NULL_INTEGER or lexicon.indexes.get(word) != self.word_indexes[node]:
+            return NULL_INTEGER
+        return self.get_child(node, pattern)
+
+    def get_node(self, rows, lexicon):
+        """
+        :param rows: A sequence of (word, pattern) tuples, one for each guess made so far.
+        :param lexicon: The Lexicon the tree was built on.
+        :return: The node reached by following rows from the empty grid, or NULL_INTEGER if a row guessed a word other
+                 than the tree's, or its pattern is not in the tree.
+        """
+
+        node = 0 if len(self) else NULL_INTEGER
+        for word, pattern in rows:
+            node = self.follow(node, word, pattern, lexicon)
+        return node
+
+    def get_word(self, node, lexicon):
+        """
+        :param node: A node of the tree.
+        :param lexicon: The Lexicon the tree was built on.
+        :return: The word string to guess at node.
+        """
+
+        return str(lexicon.words[self.word_indexes[node]])
+
+    @classmethod
+    def load(cls, decision_tree_directory, lexicon):
+        """
+        :param decision_tree_directory: A string representing the pathway to a .npz file written by save.
+        :param lexicon: The Lexicon the tree will be used with.
+        :return: The DecisionTree stored in the file. A missing or unreadable file, or one saved for a different
+                 lexicon, gives an empty DecisionTree. A file saved without the fingerprint of its opening book gives
+                 a tree that is never usable.
+        """
+
+        try:
+            with np.load(decision_tree_directory) as data:
+                if str(data['lexicon_fingerprint']) == lexicon.fingerprint:
+                    answer_threshold = float(data['answer_threshold']) if 'answer_threshold' in data else np.nan
+                    opening_book_fingerprint = (str(data['opening_book_fingerprint'])
+                                                if 'opening_book_fingerprint' in data else None)
+                    return cls(lexicon.fingerprint, data['word_indexes'], data['child_starts'],
+                               data['child_patterns'], data['child_nodes'],
+                               None if np.isnan(answer_threshold) else answer_threshold, opening_book_fingerprint)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            pass
+        return cls(lexicon.fingerprint)
+
+    def save(self, decision_tree_directory):
+        """
+        :param decision_tree_directory: A string representing the pathway to the .npz file to write.
+        :return: None
+        """
+
+        with open_for_replace(decision_tree_directory, 'wb') as f:
+            np.savez_compressed(f, lexicon_fingerprint=self.lexicon_fingerprint, word_indexes=self.word_indexes,
+                                child_starts=self.child_starts, child_patterns=self.child_patterns,
+                                child_nodes=self.child_nodes,
+                                answer_threshold=np.nan if self.answer_threshold is None else self.answer_threshold,
+                                opening_book_fingerprint="" if self.opening_book_fingerprint is None
+                                else self.opening_book_fingerprint)
+
+
+def get_decision_tree(lexicon, decision_tree_directory="../files/decision_tree.npz"):
+    """
+    :param lexicon: The Lexicon the tree will be used with.
+    :param decision_tree_directory: A string representing the pathway to a decision tree file.
+    :return: The DecisionTree stored in the file, which is empty if there is none for lexicon. It is read at most once
+             per process.
+    """
+
+    key = (decision_tree_directory, lexicon.fingerprint)
+    if key not in loaded_decision_trees:
+        with instrumentation.stage("tree_load"):
+            loaded_decision_trees[key] = DecisionTree.load(decision_tree_directory, lexicon)
+    return loaded_decision_trees[key]
@@ -0,0 +1,458 @@
+import os
+import contextlib
+
+from numba import njit, prange, config, get_num_threads, set_num_threads
+
+from BasicStructures import *
+from Instrumentation import *
+
+# Macros / Global Constants
+GREY_DIGIT = Color.GREY.value
+YELLOW_DIGIT = Color.YELLOW.value
+GREEN_DIGIT = Color.GREEN.value
+
+PATTERN_BASE = len(Color)
+PATTERN_COUNT = PATTERN_BASE ** WORD_LENGTH
+ALL_GREEN_PATTERN = PATTERN_COUNT - 1
+
+PATTERN_MATRIX_MEMORY_LIMIT = 2 ** 28
+PRUNING_CHECK_INTERVAL = 64
+
+METRIC_REMAINING = 0
+METRIC_ENTROPY = 1
+METRIC_WORST_CASE = 2
+METRIC_WEIGHTED_REMAINING = 3
+SCORING_METRICS = {"remaining": METRIC_REMAINING, "entropy": METRIC_ENTROPY, "worst_case": METRIC_WORST_CASE,
+                   "weighted_remaining": METRIC_WEIGHTED_REMAINING}
+DEFAULT_METRIC = "remaining"
+
+# Pattern matrices that have already been loaded by this process, indexed by file path.
+loaded_pattern_matrices = {}
+
+
+@contextlib.contextmanager
+def limit_threads(threads=None):
+    """
+    :param threads: The amount of threads the parallel kernels may use, or None to leave the current amount. It is
+                    clamped to the threads Numba started with.
+    :return: A context manager running its body with the parallel kernels limited to threads.
+
+    Numba keeps the amount per calling thread, so concurrent requests on different threads can each be given their
+    own share of the cores.
+    """
+
+    if threads is None:
+        yield
+        return
+    previous_threads = get_num_threads()
+    set_num_threads(max(1, min(threads, config.NUMBA_NUM_THREADS)))
+    try:
+        yield
+    finally:
+        set_num_threads(previous_threads)
+
+
+# Conversion Functions
+def colors_to_pattern(colors):
+    """
+    :param colors: An iterable of Color objects with length=WORD_LENGTH, one for each column of a row.
+    :return: An integer in range(PATTERN_COUNT) encoding the colors as a base-3 number, where the color of column i is
+             the digit multiplied by PATTERN_BASE ** i.
+    """
+
+    pattern = 0
+    for i, color in enumerate(colors):
+        pattern += color.value * PATTERN_BASE ** i
+    return pattern
+
+
+def pattern_to_colors(pattern, word_length=WORD_LENGTH):
+    """
+    :param pattern: An integer in range(PATTERN_COUNT), as returned by colors_to_pattern.
+    :param word_length: Same value as the macro WORD_LENGTH.
+    :return: A list of Color objects with length=word_length, one for each column of a row.
+    """
+
+    colors = []
+    for _ in range(word_length):
+        colors.append(Color(pattern % PATTERN_BASE))
+        pattern //= PATTERN_BASE
+    return colors
+
+
+@njit(cache=True, nogil=True)
+def enc_get_pattern(encoded_guess_word, encoded_underlying_word, word_length=WORD_LENGTH):
+    """
+    :param encoded_guess_word: A 1-D integer array size=WORD_LENGTH. This array represents a word, each element
+                               corresponds to an alphabetical letter (a=0, b=1, ..., z=25).
+    :param encoded_underlying_word: A 1-D integer array size=WORD_LENGTH. This array represents a word, each
+                                    element corresponds to an alphabetical letter (a=0, b=1, ..., z=25).
+    :param word_length: Same value as the macro WORD_LENGTH. Inputted to avoid drawing upon global variables.
+
+    :return: An integer in range(PATTERN_COUNT) encoding the colors Wordle would show for the guess word if the
+             underlying word were the answer. The color of column i is stored as the base-3 digit multiplied by
+             3 ** i (GREY=0, YELLOW=1, GREEN=2).
+
+    Repeated letters follow the rules of Wordle: greens are assigned first, then each remaining occurrence of a letter
+    in the guess word is yellow only while the underlying word still has unmatched occurrences of that letter, scanning
+    from left to right. No memory is allocated, so this is safe to call from the innermost loop of a kernel.
+    """
+
+    pattern = 0
+    power = 1
+    for i in range(word_length):
+        guess_char = encoded_guess_word[i]
+        if encoded_underlying_word[i] == guess_char:
+            digit = GREEN_DIGIT
+        else:
+
+            # Count the unmatched occurrences of this letter, and how many were used up by earlier yellows.
+            available = 0
+            for j in range(word_length):
+                if encoded_underlying_word[j] == guess_char and encoded_guess_word[j] != guess_char:
+                    available += 1
+            used = 0
+            for j in range(i):
+                if encoded_guess_word[j] == guess_char and encoded_underlying_word[j] != guess_char:
+                    used += 1
+            digit = YELLOW_DIGIT if available > used else GREY_DIGIT
+
+        pattern += digit * power
+        power *= PATTERN_BASE
+
+    return pattern
+
+
+@njit(parallel=True, cache=True, nogil=True)
+def enc_get_pattern_matrix(encoded_guess_words, encoded_underlying_words, word_length=WORD_LENGTH):
+    """
+    :param encoded_guess_words: A 2-D integer array size=(unknown, WORD_LENGTH). Each element of the first axis
+                                corresponds to an encoded guess word (a=0, b=1, ..., z=25).
+    :param encoded_underlying_words: A 2-D integer array size=(unknown, WORD_LENGTH). Each element of the first axis
+                                     corresponds to an encoded possible underlying word (a=0, b=1, ..., z=25).
+    :param word_length: Same value as the macro WORD_LENGTH. Inputted to avoid drawing upon global variables.
+
+    :return: A 2-D uint8 array size=(len(encoded_guess_words), len(encoded_underlying_words)). The element at [i][j]
+             is the pattern, as returned by enc_get_pattern, of guess word i against underlying word j.
+    """
+
+    pattern_matrix = np.empty((len(encoded_guess_words), len(encoded_underlying_words)), dtype=np.uint8)
+    for i in prange(len(encoded_guess_words)):
+        for j in range(len(encoded_underlying_words)):
+            pattern_matrix[i][j] = enc_get_pattern(encoded_guess_words[i], encoded_underlying_words[j], word_length)
+    return pattern_matrix
+
+
+@njit(parallel=True, cache=True, nogil=True)
+def enc_get_pattern_scores(pattern_matrix, answer_indexes, guess_consistency, threads, pattern_count=PATTERN_COUNT):
+    """
+    :param pattern_matrix: A 2-D uint8 array size=(number of guess words, number of underlying words), as returned by
+                           enc_get_pattern_matrix or load_pattern_matrix. This may be a memory-mapped array.
+    :param answer_indexes: A 1-D integer array listing the columns of pattern_matrix that correspond to the underlying
+                           words that are consistent with the current constraints.
+    :param guess_consistency: A 1-D boolean array size=len(pattern_matrix). The value at index i represents whether
+                              guess word i is itself consistent with the current constraints.
+    :param threads: The amount of scratch histograms, which should be the amount of threads running the kernel, as
+                    returned by get_num_threads. Any positive amount gives the same scores.
+    :param pattern_count: Same value as the macro PATTERN_COUNT. Inputted to avoid drawing upon global variables.
+
+    :return: A 1-D integer Array size=len(pattern_matrix). Each index contains the score of the corresponding guess
+             word, using the same semantics as enc_get_scores: for every possible underlying word, the number of
+             words that would remain possible after the guess, minus one, summed. Guess words which are not consistent
+             with the constraints have 1 added to their score. Smaller scores are considered better.
+
+    Words remain possible after a guess exactly when they produce the same pattern as the underlying word, so the sum
+    is computed from a histogram of the row: a bucket of size s contributes s * (s - 1). Each thread is given one
+    histogram before the loop, which is emptied as it is summed, so nothing is allocated while scoring. Thread t scores
+    guess words t, t + threads, t + 2 * threads, ..., as in the reference kernel of Benchmarks.
+    """
+
+    scores = np.empty(len(pattern_matrix), dtype=np.int32)
+    threads = max(1, min(threads, len(pattern_matrix)))
+    scratch_bucket_sizes = np.zeros((threads, pattern_count), dtype=np.int32)
+    for t in prange(threads):
+        bucket_sizes = scratch_bucket_sizes[t]
+        for i in range(t, len(pattern_matrix), threads):
+
+            # Count the size of every pattern bucket.
+            for j in answer_indexes:
+                bucket_sizes[pattern_matrix[i][j]] += 1
+
+            # Calculate score, emptying the buckets for the next guess word.
+            score = 0
+            for pattern in range(pattern_count):
+                size = bucket_sizes[pattern]
+                score += size * (size - 1)
+                bucket_sizes[pattern] = 0
+
+            # Slightly bias the score to favour consistent guess words.
+            if not guess_consistency[i]:
+                score += 1
+            scores[i] = score
+
+    return scores
+
+
+@njit(parallel=True, cache=True, nogil=True)
+def enc_get_metric_scores(pattern_matrix, answer_indexes, answer_weights, guess_consistency, metric, threads,
+                          pattern_count=PATTERN_COUNT):
+    """
+    :param pattern_matrix: A 2-D uint8 array size=(number of guess words, number of underlying words), as returned by
+                           enc_get_pattern_matrix or load_pattern_matrix. This may be a memory-mapped array.
+    :param answer_indexes: A 1-D integer array listing the columns of pattern_matrix that correspond to the underlying
+                           words that are consistent with the current constraints.
+    :param answer_weights: A 1-D float array size=len(answer_indexes), how likely each underlying word is. Only the
+                           ratios matter.
+    :param guess_consistency: A 1-D boolean array size=len(pattern_matrix). The value at index i represents whether
+                              guess word i is itself consistent with the current constraints.
+    :param metric: One of the values of SCORING_METRICS. The macros cannot be read here, so 0=METRIC_REMAINING,
+                   1=METRIC_ENTROPY, 2=METRIC_WORST_CASE and 3=METRIC_WEIGHTED_REMAINING.
+    :param threads: The amount of scratch histograms, as passed to enc_get_pattern_scores.
+    :param pattern_count: Same value as the macro PATTERN_COUNT. Inputted to avoid drawing upon global variables.
+
+    :return: A 1-D float Array size=len(pattern_matrix). Each index contains the score of the corresponding guess word
+             under metric, where smaller scores are considered better:
+             - METRIC_REMAINING: the score of enc_get_pattern_scores, including its bias of 1 for inconsistent words.
+             - METRIC_ENTROPY: minus the expected information of the pattern in bits, -sum(p * log2(p)) over buckets,
+               minus the chance of the guess word being the underlying word.
+             - METRIC_WORST_CASE: the size of the largest bucket, plus 0.5 for inconsistent words so that they lose
+               ties without losing to a larger bucket.
+             - METRIC_WEIGHTED_REMAINING: the expected amount of words left possible after a wrong guess, sum(p * s)
+               over every bucket but the all green one.
+             Here s is the amount of underlying words in a bucket and p is their share of the total weight. The chance
+             of guessing the word outright is what lets a consistent guess word win once every word splits the rest
+             equally well, as the bias of 1 does for METRIC_REMAINING.
+
+    Every metric is a function of one weighted histogram of the row, so they all cost a single pass over the patterns.
+    The histograms are reused across guess words as in enc_get_pattern_scores.
+    """
+
+    total_weight = 0.0
+    for k in range(len(answer_indexes)):
+        total_weight += answer_weights[k]
+
+    scores = np.empty(len(pattern_matrix), dtype=np.float64)
+    threads = max(1, min(threads, len(pattern_matrix)))
+    scratch_bucket_sizes = np.zeros((threads, pattern_count), dtype=np.int32)
+    scratch_bucket_weights = np.zeros((threads, pattern_count), dtype=np.float64)
+    for t in prange(threads):
+        bucket_sizes = scratch_bucket_sizes[t]
+        bucket_weights = scratch_bucket_weights[t]
+        for i in range(t, len(pattern_matrix), threads):
+
+            # Count the size and weight of every pattern bucket.
+            for k in range(len(answer_indexes)):
+                pattern = pattern_matrix[i][answer_indexes[k]]
+                bucket_sizes[pattern] += 1
+                bucket_weights[pattern] += answer_weights[k]
+
+            # Calculate score, emptying the buckets for the next guess word.
+            score = 0.0
+            for pattern in range(pattern_count):
+                size = bucket_sizes[pattern]
+                if size == 0:
+                    continue
+                share = bucket_weights[pattern] / total_weight
+                bucket_sizes[pattern] = 0
+                bucket_weights[pattern] = 0.0
+                if metric == 0:
+                    score += size * (size - 1)
+                elif metric == 1:
+                    if share > 0:
+                        score += share * np.log2(share)
+                    if pattern == pattern_count - 1:
+                        score -= share
+                elif metric == 2:
+                    score = max(score, size)
+                elif pattern != pattern_count - 1:
+                    score += share * size
+
+            # Slightly bias the score to favour consistent guess words.
+            if not guess_consistency[i]:
+                if metric == 0:
+                    score += 1
+                elif metric == 2:
+                    score += 0.5
+            scores[i] = score
+
+    return scores
+
+
+@njit(parallel=True, cache=True, nogil=True)
+def enc_get_pruned_pattern_scores(pattern_matrix, answer_indexes, guess_indexes, guess_consistency, frequencies,
+                                  bound, threads, pattern_count=PATTERN_COUNT, check_interval=PRUNING_CHECK_INTERVAL):
+    """
+    :param pattern_matrix: A 2-D uint8 array size=(number of guess words, number of underlying words), as returned by
+                           enc_get_pattern_matrix or load_pattern_matrix. This may be a memory-mapped array.
+    :param answer_indexes: A 1-D integer array listing the columns of pattern_matrix that correspond to the underlying
+                           words that are consistent with the current constraints.
+    :param guess_indexes: A 1-D integer array listing the rows of pattern_matrix to score.
+    :param guess_consistency: A 1-D boolean array size=len(pattern_matrix). The value at index i represents whether
+                              guess word i is itself consistent with the current constraints.
+    :param frequencies: A 1-D float array size=len(pattern_matrix), the word frequency of each guess word.
+    :param bound: A float. Guess words whose total would be larger than this are abandoned.
+    :param threads: The amount of scratch histograms, as passed to enc_get_pattern_scores.
+    :param pattern_count: Same value as the macro PATTERN_COUNT. Inputted to avoid drawing upon global variables.
+    :param check_interval: Same value as the macro PRUNING_CHECK_INTERVAL. Inputted to avoid drawing upon global
+                           variables.
+
+    :return: A 1-D float array size=len(guess_indexes). Each index contains the score of enc_get_pattern_scores minus
+             the frequency, for the guess word at the same index of guess_indexes, or infinity if the guess word was
+             abandoned because its total became larger than bound.
+
+    The score is accumulated one underlying word at a time: adding a word to a bucket that already holds c words adds
+    2 * c to the sum of s * (s - 1). The partial score never decreases, so a guess word can be abandoned once it exceeds
+    bound, and a total equal to bound is never abandoned. The bound is only checked after every check_interval
+    underlying words, as checking it after every word costs more than the words it saves. The histograms are reused
+    across guess words as in enc_get_pattern_scores. A histogram filled by fewer words than it has buckets is emptied
+    by visiting those words again, and otherwise by zeroing every bucket.
+    """
+
+    totals = np.empty(len(guess_indexes), dtype=np.float64)
+    threads = max(1, min(threads, len(guess_indexes)))
+    scratch_bucket_sizes = np.zeros((threads, pattern_count), dtype=np.int32)
+    for t in prange(threads):
+        bucket_sizes = scratch_bucket_sizes[t]
+        for k in range(t, len(guess_indexes), threads):
+            i = guess_indexes[k]
+            patterns = pattern_matrix[i]
+
+            # Slightly bias the score to favour consistent guess words.
+            score = 0 if guess_consistency[i] else 1
+
+            # Accumulate the score, abandoning the guess word once it cannot be the best.
+            filled = len(answer_indexes)
+            abandoned = False
+            for start in range(0, len(answer_indexes), check_interval):
+                stop = min(start + check_interval, len(answer_indexes))
+                for j in range(start, stop):
+                    pattern = patterns[answer_indexes[j]]
+                    score += 2 * bucket_sizes[pattern]
+                    bucket_sizes[pattern] += 1
+                if score - frequencies[i] > bound:
+                    filled = stop
+                    abandoned = True
+                    break
+
+            # Empty the buckets for the next guess word, by whichever of the visited words and the buckets are fewer.
+            if filled < pattern_count:
+                for j in range(filled):
+                    bucket_sizes[patterns[answer_indexes[j]]] = 0
+            else:
+                bucket_sizes[:] = 0
+
+            totals[k] = np.inf if abandoned else score - frequencies[i]
+
+    return totals
+
+
+@njit(parallel=True, cache=True, nogil=True)
+def enc_get_multi_board_scores(pattern_matrix, answer_indexes, board_starts, inconsistent_boards, threads,
+                               pattern_count=PATTERN_COUNT):
+    """
+    :param pattern_matrix: A 2-D uint8 array size=(number of guess words, number of underlying words), as returned by
+                           enc_get_pattern_matrix or load_pattern_matrix. This may be a memory-mapped array.
+    :param answer_indexes: A 1-D integer array, the columns of pattern_matrix of the possible underlying words of every
+                           board, one board after the other.
+    :param board_starts: A 1-D integer array size=boards + 1. The possible underlying words of board b are elements
+                         board_starts[b] to board_starts[b + 1] of answer_indexes.
+    :param inconsistent_boards: A 1-D integer array size=len(pattern_matrix), the amount of boards on which guess word
+                                i is not a possible underlying word.
+    :param threads: The amount of scratch histograms, as passed to enc_get_pattern_scores.
+    :param pattern_count: Same value as the macro PATTERN_COUNT. Inputted to avoid drawing upon global variables.
+
+    :return: A 1-D integer Array size=len(pattern_matrix). Each index contains the sum over the boards of the score
+             enc_get_pattern_scores gives the guess word on that board, including its bias of 1 on every board the
+             guess word is inconsistent with. Smaller scores are considered better.
+
+    Each row is read once for every possible underlying word of every board, so the cost grows with the total amount
+    of possible underlying words rather than with the amount of boards. The histogram of a row is accumulated as in
+    enc_get_pruned_pattern_scores and emptied again by visiting the same words, so one histogram per thread is reused
+    across boards and guess words.
+    """
+
+    scores = np.empty(len(pattern_matrix), dtype=np.int64)
+    threads = max(1, min(threads, len(pattern_matrix)))
+    scratch_bucket_sizes = np.zeros((threads, pattern_count), dtype=np.int32)
+    for t in prange(threads):
+        bucket_sizes = scratch_bucket_sizes[t]
+        for i in range(t, len(pattern_matrix), threads):
+            score = inconsistent_boards[i]
+            for b in range(len(board_starts) - 1):
+
+                # Accumulate the score of the board.
+                for k in range(board_starts[b], board_starts[b + 1]):
+                    pattern = pattern_matrix[i][answer_indexes[k]]
+                    score += 2 * bucket_sizes[pattern]
+                    bucket_sizes[pattern] += 1
+
+                # Empty the buckets filled by the board.
+                for k in range(board_starts[b], board_starts[b + 1]):
+                    bucket_sizes[pattern_matrix[i][answer_indexes[k]]] = 0
+
+            scores[i] = score
+
+    return scores
+
+
+def get_pattern_matrix_path(lexicon, pattern_directory="../files/"):
+    """
+    :param lexicon: An object of type Lexicon, as defined in Lexicon, whose words index both axes of the matrix.
+    :param pattern_directory: A string representing the pathway to the directory pattern matrices are stored in.
+    :return: A string representing the pathway to the pattern matrix file for this lexicon.
+    """
+
+    return os.path.join(pattern_directory, "patterns_" + lexicon.fingerprint + ".npy")
+
+
+def build_pattern_matrix(encoded_words, pattern_matrix_directory, memory_limit=PATTERN_MATRIX_MEMORY_LIMIT,
+                         print_progress=False):
+    """
+    :param encoded_words: A 2-D integer array size=(unknown, WORD_LENGTH). Each element of the first axis corresponds
+                          to an encoded word (a=0, b=1, ..., z=25).
+    :param pattern_matrix_directory: A string representing the pathway to the .npy file to create.
+    :param memory_limit: The maximum amount of bytes of patterns held in memory at once.
+    :param print_progress: A boolean corresponding to whether to print a message every time a chunk is written.
+    :return: None
+
+    This void function writes the full pattern matrix of encoded_words against itself to a .npy file. The rows are
+    computed and written in chunks small enough to fit within memory_limit. The file is written with open_for_replace,
+    so an interrupted build never leaves a truncated matrix behind, and processes building the same matrix at once
+    each write their own temporary file, the last one to finish replacing the others.
+    """
+
+    word_count = len(encoded_words)
+    chunk_size = max(1, memory_limit // max(1, word_count))
+
+    with open_for_replace(pattern_matrix_directory, 'wb') as f:
+        header = {'descr': np.lib.format.dtype_to_descr(np.dtype(np.uint8)), 'fortran_order': False,
+                  'shape': (word_count, word_count)}
+        np.lib.format.write_array_header_1_0(f, header)
+        for start in range(0, word_count, chunk_size):
+            end = min(start + chunk_size, word_count)
+            enc_get_pattern_matrix(encoded_words[start:end], encoded_words).tofile(f)
+            if print_progress:
+                print("Pattern rows written:", "(" + str(end) + "/" + str(word_count) + ")")
+
+
+def load_pattern_matrix(lexicon, pattern_directory="../files/", memory_limit=PATTERN_MATRIX_MEMORY_LIMIT):
+    """
+    :param lexicon: An object of type Lexicon, as defined in Lexicon, whose words index both axes of the matrix.
+    :param pattern_directory: A string representing the pathway to the directory pattern matrices are stored in.
+    :param memory_limit: The maximum amount of bytes of patterns held in memory at once if the file must be built.
+    :return: A read-only memory-mapped 2-D uint8 array size=(len(lexicon), len(lexicon)). The element at [i][j] is the
+             pattern of guess word i against underlying word j.
+
+    The file is named after a hash of the word list, so a change to the word list automatically leads to a new matrix
+    being built. Memory mapping means only the rows that are touched are read from disk, and every process using the
+    same file shares one physical copy of it.
+    """
+
+    pattern_matrix_directory = get_pattern_matrix_path(lexicon, pattern_directory)
+    if pattern_matrix_directory not in loaded_pattern_matrices:
+        if not os.path.exists(pattern_matrix_directory):
+            with instrumentation.stage("pattern_matrix_build"):
+                build_pattern_matrix(lexicon.encoded_words, pattern_matrix_directory, memory_limit)
+        with instrumentation.stage("pattern_matrix_load"):
+            loaded_pattern_matrices[pattern_matrix_directory] = np.load(pattern_matrix_directory, mmap_mode='r')
+    return loaded_pattern_matrices[pattern_matrix_directory]
@@ -0,0 +1,258 @@
+import os
+import time
+import threading
+import contextlib
+
+from numba.core import event
+
+# Macros / Global Constants
+HISTOGRAM_EDGES_MS = (0.01, 0.1, 1, 10, 100, 1000, 10000)
+
+
+def get_histogram_labels(edges=HISTOGRAM_EDGES_MS):
+    """
+    :param edges: An increasing tuple of bucket edges in milliseconds.
+    :return: A list of strings naming the buckets of a histogram over edges, the last one holding everything larger.
+    """
+
+    return ["<" + str(edge) + "ms" for edge in edges] + [">=" + str(edges[-1]) + "ms"]
+
+
+# Compile listener class.
+class CompileListener(event.Listener):
+
+    def __init__(self, instrumentation):
+        """
+        :param instrumentation: The Instrumentation to attribute Numba compilations to.
+        """
+
+        self.instrumentation = instrumentation
+        self.start_times = threading.local()
+
+    def on_start(self, numba_event):
+        self.start_times.time = time.perf_counter()
+
+    def on_end(self, numba_event):
+        dispatcher = numba_event.data.get("dispatcher") if numba_event.data else None
+        name = getattr(getattr(dispatcher, "py_func", None), "__name__", "unknown")
+        self.instrumentation.add_event("jit_compile", name, time.perf_counter() - self.start_times.time)
+
+
+# Instrumentation class.
+class Instrumentation:
+
+    def __init__(self):
+        """
+        Instrumentation is off until enable is called, and every stage and counter is then a no-op outside of a call.
+
+        A call is the outermost instrumented function running on a thread, such as choose_word. While it runs, stages
+        add their wall time to the call's record, counters add to its counts, and events such as Numba compilations
+        are appended to it. Nested instrumented functions add to the same record. When the call returns, its record is
+        passed to every hook and added to the aggregate histograms. Forked worker processes start outside of any call,
+        even when they are forked from inside one.
+        """
+
+        self.enabled = False
+        self.keep_records = False
+        self.records = []
+        self.hooks = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.listener = CompileListener(self)
+        self.reset()
+        os.register_at_fork(after_in_child=self.forget_calls)
+
+    def forget_calls(self):
+        """
+        :return: None
+        """
+
+        self.local = threading.local()
+
+    def enable(self, keep_records=False):
+        """
+        :param keep_records: A boolean corresponding to whether to keep every call record in self.records as well.
+        :return: None
+        """
+
+        if not self.enabled:
+            event.register("numba:compile", self.listener)
+        self.enabled = True
+        self.keep_records = keep_records
+
+    def disable(self):
+        """
+        :return: None
+        """
+
+        if self.enabled:
+            event.unregister("numba:compile", self.listener)
+        self.enabled = False
+
+    def reset(self):
+        """
+        :return: None
+
+        Forgets every kept record and every aggregate.
+        """
+
+        with self.lock:
+            self.records = []
+            self.calls = {}
+            self.stage_totals = {}
+            self.stage_histograms = {}
+            self.counter_totals = {}
+            self.event_totals = {}
+
+    def add_hook(self, hook):
+        """
+        :param hook: A function taking one call record, called on the thread of the call as it returns.
+        :return: None
+        """
+
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        :param hook: A function passed to add_hook.
+        :return: None
+        """
+
+        self.hooks.remove(hook)
+
+    def get_record(self):
+        """
+        :return: The record of the call running on this thread, or None.
+        """
+
+        return getattr(self.local, "record", None)
+
+    def take_last_record(self):
+        """
+        :return: The record of the last call that returned on this thread, or None. It is only returned once, so worker
+                 processes can send each record back to the process that aggregates them.
+        """
+
+        record = getattr(self.local, "last_record", None)
+        self.local.last_record = None
+        return record
+
+    @contextlib.contextmanager
+    def call(self, name):
+        """
+        :param name: A string naming the instrumented function.
+        :return: A context manager around the function's body. Inside another call on the same thread it only
+                 times a stage named after the function.
+        """
+
+        if not self.enabled:
+            yield
+            return
+        if self.get_record() is not None:
+            with self.stage(name):
+                yield
+            return
+
+        record = {"call": name, "time": 0.0, "stages": {}, "counters": {}, "events": []}
+        self.local.record = record
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["time"] = time.perf_counter() - start_time
+            self.local.record = None
+            self.local.last_record = record
+            self.add_record(record)
+            for hook in list(self.hooks):
+                hook(record)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        :param name: A string naming the stage.
+        :return: A context manager adding the wall time of its body to the stage of the current call record. Time
+                 spent in a stage more than once is summed.
+        """
+
+        record = self.get_record() if self.enabled else None
+        if record is None:
+            yield
+            return
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["stages"][name] = record["stages"].get(name, 0.0) + time.perf_counter() - start_time
+
+    def count(self, name, amount=1):
+        """
+        :param name: A string naming the counter, such as "candidates" or "book_hits".
+        :param amount: The amount to add to it.
+        :return: None
+        """
+
+        record = self.get_record() if self.enabled else None
+        if record is not None:
+            record["counters"][name] = record["counters"].get(name, 0) + amount
+
+    def add_event(self, kind, name, duration):
+        """
+        :param kind: A string naming the kind of event, such as "jit_compile".
+        :param name: A string naming what the event happened to, such as the compiled kernel.
+        :param duration: The seconds the event took.
+        :return: None
+
+        Events inside a call are added to the aggregates with its record, the others at once.
+        """
+
+        record = self.get_record() if self.enabled else None
+        if record is not None:
+            record["events"].append({"kind": kind, "name": name, "time": duration})
+            return
+        with self.lock:
+            count, total = self.event_totals.get(kind, (0, 0.0))
+            self.event_totals[kind] = (count + 1, total + duration)
+
+    def add_record(self, record):
+        """
+        :param record: A call record, from this process or returned by a worker process.
+        :return: None
+
+        Adds the record to the aggregates, and keeps it if keep_records is set.
+        """
+
+        with self.lock:
+            if self.keep_records:
+                self.records.append(record)
+            for name, duration in [(record["call"], record["time"])] + list(record["stages"].items()):
+                count, total = self.stage_totals.get(name, (0, 0.0))
+                self.stage_totals[name] = (count + 1, total + duration)
+                histogram = self.stage_histograms.setdefault(name, [0] * (len(HISTOGRAM_EDGES_MS) + 1))
+                histogram[sum(duration * 1000 >= edge for edge in HISTOGRAM_EDGES_MS)] += 1
+            self.calls[record["call"]] = self.calls.get(record["call"], 0) + 1
+            for name, amount in record["counters"].items():
+                self.counter_totals[name] = self.counter_totals.get(name, 0) + amount
+            for numba_event in record["events"]:
+                count, total = self.event_totals.get(numba_event["kind"], (0, 0.0))
+                self.event_totals[numba_event["kind"]] = (count + 1, total + numba_event["time"])
+
+    def get_summary(self):
+        """
+        :return: A dictionary with the amount of every call, and for every call and stage its count, total and mean
+                 time in milliseconds and a histogram of its times, together with the counter totals and the count and
+                 total time of every kind of event.
+        """
+
+        labels = get_histogram_labels()
+        with self.lock:
+            stages = {}
+            for name, (count, total) in sorted(self.stage_totals.items(), key=lambda item: -item[1][1]):
+                stages[name] = {"count": count, "total_ms": total * 1000, "mean_ms": total * 1000 / count,
+                                "histogram": {label: n for label, n in zip(labels, self.stage_histograms[name]) if n}}
+            return {"calls": dict(self.calls), "stages": stages, "counters": dict(self.counter_totals),
+                    "events": {kind: {"count": count, "total_ms": total * 1000}
+                               for kind, (count, total) in self.event_totals.items()}}
+
+
+# The instrumentation of this process.
+instrumentation = Instrumentation()
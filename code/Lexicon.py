@@ -0,0 +1,154 @@
+import zipfile
+import hashlib
+
+from wordfreq import word_frequency
+from english_words import get_english_words_set
+
+from BasicStructures import *
+from Instrumentation import *
+
+# Constraint Storage Structures
+extra_words = ["manly", "mucky", "latte", "imply", "daily", "lover", "rerun", "unfit"]
+fake_words = {'brady', 'turin', 'dylan', 'dolan', 'lanka', 'milan', 'cathy', "alton", 'mckee', 'mcgee', 'poole',
+              'della', 'dinah', 'syria', 'akron', 'tarie', 'tored', 'colan', 'nilot', 'telyn', 'topsl', 'duole'}
+
+# Suggested wordfreq frequency below which words are not expected to be underlying words, see get_answer_pool.
+ANSWER_FREQUENCY_THRESHOLD = 1e-7
+
+# Lexicons that have already been compiled or loaded by this process, indexed by file path.
+loaded_lexicons = {}
+
+
+def get_word_list():
+    """
+    :return: A sorted list of every word string that may be guessed or be the underlying word. This is the web2 word
+             set together with extra_words, keeping only alphabetic words of length WORD_LENGTH that are not fake_words.
+    """
+
+    return [word for word in sorted(list(get_english_words_set(['web2'], lower=True)) + list(extra_words))
+            if word not in fake_words and len(word) == WORD_LENGTH and word.isalpha()]
+
+
+def get_word_list_hash(words):
+    """
+    :param words: An iterable of word strings.
+    :return: A short hexadecimal string that identifies the word list, including its order.
+    """
+
+    return hashlib.sha1("\n".join(words).encode()).hexdigest()[:16]
+
+
+def get_word_source_hash():
+    """
+    :return: A short hexadecimal string that identifies the inputs of get_word_list which are defined in this module,
+             used to notice when a saved lexicon is out of date.
+    """
+
+    return get_word_list_hash([str(WORD_LENGTH)] + sorted(extra_words) + ["*"] + sorted(fake_words))
+
+
+# Lexicon class.
+class Lexicon:
+
+    def __init__(self, words, encoded_words, frequencies):
+        """
+        :param words: A sorted 1-D string array of every word.
+        :param encoded_words: A 2-D int8 array size=(len(words), WORD_LENGTH). Each element of the first axis is the
+                              word at the same index of words, encoded letter by letter (a=0, b=1, ..., z=25).
+        :param frequencies: A 1-D float array size=len(words), the wordfreq frequency of the word at the same index.
+        """
+
+        self.words = words
+        self.encoded_words = encoded_words
+        self.frequencies = frequencies
+        self.fingerprint = get_word_list_hash(words)
+        self.indexes = {word: i for i, word in enumerate(words)}
+
+    def __len__(self):
+        return len(self.words)
+
+    @classmethod
+    def from_words(cls, words):
+        """
+        :param words: A sorted iterable of word strings of length WORD_LENGTH.
+        :return: A Lexicon containing words.
+        """
+
+        words = np.array(list(words), dtype='<U' + str(WORD_LENGTH))
+        encoded_words = (np.frombuffer("".join(words).encode('ascii'), dtype=np.uint8).reshape(-1, WORD_LENGTH)
+                         - ord('a')).astype(np.int8)
+        frequencies = np.array([word_frequency(word, lang='en') for word in words], dtype=np.float64)
+        return cls(words, encoded_words, frequencies)
+
+    @classmethod
+    def load(cls, lexicon_directory):
+        """
+        :param lexicon_directory: A string representing the pathway to a .npz file written by save.
+        :return: The Lexicon stored in the file, or None if the file is missing or was saved from different word
+                 sources.
+        """
+
+        try:
+            with np.load(lexicon_directory) as data:
+                if str(data['source_hash']) != get_word_source_hash():
+                    return None
+                return cls(data['words'], data['encoded_words'], data['frequencies'])
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+
+    def save(self, lexicon_directory):
+        """
+        :param lexicon_directory: A string representing the pathway to the .npz file to write.
+        :return: None
+        """
+
+        with open_for_replace(lexicon_directory, 'wb') as f:
+            np.savez(f, words=self.words, encoded_words=self.encoded_words, frequencies=self.frequencies,
+                     source_hash=get_word_source_hash())
+
+    def get_mask(self, words):
+        """
+        :param words: An iterable of word strings. Words that are not in the lexicon are ignored.
+        :return: A 1-D boolean array size=len(self). The value at index i represents whether the word at index i is in
+                 words.
+        """
+
+        mask = np.full(len(self.words), False)
+        for word in words:
+            if word in self.indexes:
+                mask[self.indexes[word]] = True
+        return mask
+
+    def get_answer_pool(self, answer_threshold=None):
+        """
+        :param answer_threshold: The wordfreq frequency a word needs to be a possible underlying word, such as
+                                 ANSWER_FREQUENCY_THRESHOLD, or None to let every word be one.
+        :return: A sorted 1-D integer array listing the indexes of the words that may be underlying words. Every word
+                 may still be guessed.
+        """
+
+        if answer_threshold is None:
+            return np.arange(len(self.words))
+        return np.flatnonzero(self.frequencies >= answer_threshold)
+
+
+def get_lexicon(lexicon_directory="../files/lexicon.npz"):
+    """
+    :param lexicon_directory: A string representing the pathway to a .npz file the lexicon is persisted in, or None to
+                              compile it without touching the disk.
+    :return: The Lexicon of get_word_list. It is compiled at most once per process, and is loaded from
+             lexicon_directory instead when a file saved from the same word sources exists there.
+    """
+
+    if lexicon_directory not in loaded_lexicons:
+        lexicon = None
+        if lexicon_directory is not None:
+            with instrumentation.stage("lexicon_load"):
+                lexicon = Lexicon.load(lexicon_directory)
+        if lexicon is None:
+            with instrumentation.stage("lexicon_build"):
+                lexicon = Lexicon.from_words(get_word_list())
+                if lexicon_directory is not None:
+                    lexicon.save(lexicon_directory)
+        loaded_lexicons[lexicon_directory] = lexicon
+    return loaded_lexicons[lexicon_directory]
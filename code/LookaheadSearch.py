@@ -0,0 +1,290 @@
+import time
+import hashlib
+import zipfile
+
+from Lexicon import *
+from FeedbackPatterns import *
+
+# Macros / Global Constants
+LOOKAHEAD_DEPTH = 2
+LOOKAHEAD_TOP_K = 8
+LOOKAHEAD_TIME_LIMIT = 2.0
+LEAF_BRANCHING_FACTOR = 100.0
+
+
+def get_candidate_fingerprint(answer_indexes):
+    """
+    :param answer_indexes: A sorted 1-D integer array listing the indexes of the lexicon words that are still possible
+                           underlying words.
+    :return: A 64-bit integer identifying the set of possible underlying words, however the guesses leading to it were
+             ordered.
+    """
+
+    return int.from_bytes(hashlib.blake2b(np.asarray(answer_indexes, dtype=np.int32).tobytes(),
+                                          digest_size=8).digest(), 'big')
+
+
+def get_leaf_estimate(answer_count):
+    """
+    :param answer_count: The amount of possible underlying words.
+    :return: A float estimating the expected amount of guesses still needed, including the guess that finds the word.
+
+    One and two words are solved exactly. Larger sets need at least (2n - 1) / n guesses, as only one word can be found
+    by the next guess, and each further guess is assumed to split the words LEAF_BRANCHING_FACTOR ways.
+    """
+
+    if answer_count <= 2:
+        return (2 * answer_count - 1) / answer_count
+    return (2 * answer_count - 1) / answer_count + np.log(answer_count / 2) / np.log(LEAF_BRANCHING_FACTOR)
+
+
+# Transposition table class.
+class TranspositionTable:
+
+    def __init__(self, lexicon_fingerprint, entries=None):
+        """
+        :param lexicon_fingerprint: The fingerprint of the Lexicon whose word indexes the entries refer to.
+        :param entries: A dictionary mapping candidate fingerprints, as returned by get_candidate_fingerprint, to
+                        tuples (expected_guesses, word_index, depth).
+        """
+
+        self.lexicon_fingerprint = lexicon_fingerprint
+        self.entries = {} if entries is None else entries
+        self.changes = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, fingerprint, depth):
+        """
+        :param fingerprint: A candidate fingerprint, as returned by get_candidate_fingerprint.
+        :param depth: The amount of guesses the caller wants to look ahead.
+        :return: The tuple (expected_guesses, word_index, depth) stored for the candidates, or None if there is no
+                 entry searched at least depth guesses deep.
+        """
+
+        entry = self.entries.get(fingerprint)
+        if entry is None or entry[2] < depth:
+            return None
+        return entry
+
+    def set(self, fingerprint, expected_guesses, word_index, depth):
+        """
+        :param fingerprint: A candidate fingerprint, as returned by get_candidate_fingerprint.
+        :param expected_guesses: The expected amount of guesses still needed when guessing word_index next.
+        :param word_index: The lexicon index of the best word to guess.
+        :param depth: The amount of guesses that were searched to find it.
+        :return: None
+
+        An entry is only replaced by one searched at least as deep.
+        """
+
+        entry = self.entries.get(fingerprint)
+        if entry is None or entry[2] <= depth:
+            self.entries[fingerprint] = self.changes[fingerprint] = (float(expected_guesses), int(word_index), depth)
+
+    def update(self, entries):
+        """
+        :param entries: A dictionary of entries, as returned by take_changes of another table on the same lexicon.
+        :return: None
+        """
+
+        for fingerprint, (expected_guesses, word_index, depth) in entries.items():
+            self.set(fingerprint, expected_guesses, word_index, depth)
+
+    def take_changes(self):
+        """
+        :return: A dictionary of the entries set since the last call, so worker processes can send only what they
+                 added back to the process that saves the table.
+        """
+
+        changes, self.changes = self.changes, {}
+        return changes
+
+    @classmethod
+    def load(cls, table_directory, lexicon):
+        """
+        :param table_directory: A string representing the pathway to a .npz file written by save.
+        :param lexicon: The Lexicon the table will be used with.
+        :return: The TranspositionTable stored in the file. A missing or unreadable file, or one saved for a different
+                 lexicon, gives an empty TranspositionTable.
+        """
+
+        try:
+            with np.load(table_directory) as data:
+                if str(data['lexicon_fingerprint']) == lexicon.fingerprint:
+                    return cls(lexicon.fingerprint, {
+                        fingerprint: (expected_guesses, word_index, depth) for fingerprint, expected_guesses,
+                        word_index, depth in zip(data['fingerprints'].tolist(), data['expected_guesses'].tolist(),
+                                                 data['word_indexes'].tolist(), data['depths'].tolist())})
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            pass
+        return cls(lexicon.fingerprint)
+
+    def save(self, table_directory):
+        """
+        :param table_directory: A string representing the pathway to the .npz file to write.
+        :return: None
+        """
+
+        values = list(self.entries.values())
+        with open_for_replace(table_directory, 'wb') as f:
+            np.savez(f, lexicon_fingerprint=self.lexicon_fingerprint,
+                     fingerprints=np.array(list(self.entries), dtype=np.uint64),
+                     expected_guesses=np.array([value[0] for value in values], dtype=np.float64),
+                     word_indexes=np.array([value[1] for value in values], dtype=np.int32),
+                     depths=np.array([value[2] for value in values], dtype=np.int8))
+
+
+# Lookahead search class.
+class LookaheadSearch:
+
+    def __init__(self, lexicon, pattern_matrix, depth=LOOKAHEAD_DEPTH, top_k=LOOKAHEAD_TOP_K, node_limit=None,
+                 time_limit=LOOKAHEAD_TIME_LIMIT, table=None):
+        """
+        :param lexicon: An object of type Lexicon, as defined in Lexicon.
+        :param pattern_matrix: The pattern matrix of lexicon, as returned by load_pattern_matrix.
+        :param depth: The amount of guesses to look ahead. Beyond it the remaining guesses are estimated by
+                      get_leaf_estimate.
+        :param top_k: The amount of guess words searched at each state, the best ones by the one guess score.
+        :param node_limit: The maximum amount of states searched by one call to choose, or None for no limit.
+        :param time_limit: The maximum amount of seconds spent by one call to choose, or None for no limit.
+        :param table: The TranspositionTable to share results through, or None to create an empty one.
+
+        The search minimises the expected amount of guesses needed to find the underlying word, assuming every
+        possible underlying word is equally likely. Once the node or time budget runs out, the remaining states are
+        estimated instead of searched, and the results depending on them are not stored in the table.
+        """
+
+        self.lexicon = lexicon
+        self.pattern_matrix = pattern_matrix
+        self.depth = depth
+        self.top_k = top_k
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.table = TranspositionTable(lexicon.fingerprint) if table is None else table
+        self.statistics = {"nodes": 0, "table_hits": 0, "truncated": False}
+        self.deadline = None
+
+    def is_exhausted(self):
+        """
+        :return: A boolean corresponding to whether the node or time budget of the current call has run out.
+        """
+
+        if self.node_limit is not None and self.statistics["nodes"] >= self.node_limit:
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def get_top_guesses(self, answer_indexes, guess_mask=None):
+        """
+        :param answer_indexes: A sorted 1-D integer array listing the possible underlying words.
+        :param guess_mask: A 1-D boolean array size=len(lexicon), the words that are allowed to be guessed, or None to
+                           allow every word.
+        :return: A 1-D integer array of at most top_k allowed guess words, best first by the score of
+                 enc_get_pattern_scores minus the frequency, with ties going to the lowest index.
+        """
+
+        consistency = np.full(len(self.lexicon), False)
+        consistency[answer_indexes] = True
+        totals = enc_get_pattern_scores(self.pattern_matrix, answer_indexes, consistency, get_num_threads()) \
+            - self.lexicon.frequencies
+        if guess_mask is not None:
+            totals = np.where(guess_mask, totals, np.inf)
+        top_indexes = np.argsort(totals, kind='stable')[:self.top_k]
+        return top_indexes[np.isfinite(totals[top_indexes])]
+
+    def evaluate(self, answer_indexes, depth, guess_mask=None):
+        """
+        :param answer_indexes: A sorted 1-D integer array listing the possible underlying words.
+        :param depth: The amount of guesses still to look ahead.
+        :param guess_mask: A 1-D boolean array size=len(lexicon), the words that are allowed to be guessed, or None to
+                           allow every word. Results are only shared through the table when this is None.
+        :return: A tuple (expected_guesses, word_index, complete). complete is False if part of the result was
+                 estimated because the budget ran out.
+        """
+
+        answer_count = len(answer_indexes)
+        if answer_count <= 2 and guess_mask is None:
+            word_index = answer_indexes[np.argmax(self.lexicon.frequencies[answer_indexes])]
+            return get_leaf_estimate(answer_count), word_index, True
+        if depth == 0:
+            return get_leaf_estimate(answer_count), NULL_INTEGER, True
+
+        # Look up the table.
+        fingerprint = get_candidate_fingerprint(answer_indexes)
+        if guess_mask is None:
+            entry = self.table.get(fingerprint, depth)
+            if entry is not None:
+                self.statistics["table_hits"] += 1
+                return entry[0], entry[1], True
+        if self.statistics["nodes"] > 0 and self.is_exhausted():
+            self.statistics["truncated"] = True
+            return get_leaf_estimate(answer_count), NULL_INTEGER, False
+        self.statistics["nodes"] += 1
+
+        # Try the best guess words, skipping the rest of a guess word once it cannot beat the best so far.
+        best_expected, best_index, complete = np.inf, NULL_INTEGER, True
+        for guess_index in self.get_top_guesses(answer_indexes, guess_mask):
+            patterns = self.pattern_matrix[guess_index][answer_indexes]
+            order = np.argsort(patterns, kind='stable')
+            bucket_patterns, bucket_starts, bucket_sizes = np.unique(patterns[order], return_index=True,
+                                                                     return_counts=True)
+            if len(bucket_patterns) == 1 and bucket_patterns[0] != ALL_GREEN_PATTERN:
+                continue
+
+            # Every bucket needs at least (2s - 1) / s more guesses, except the underlying word just guessed.
+            bucket_bounds = np.where(bucket_patterns == ALL_GREEN_PATTERN, 0,
+                                     (2 * bucket_sizes - 1) / answer_count)
+            expected = 1 + bucket_bounds.sum()
+            for pattern, start, size, bound in zip(bucket_patterns, bucket_starts, bucket_sizes, bucket_bounds):
+                if expected >= best_expected:
+                    break
+                if pattern == ALL_GREEN_PATTERN or size == 1:
+                    continue
+                bucket_expected, _, bucket_complete = self.evaluate(answer_indexes[np.sort(order[start:start + size])],
+                                                                    depth - 1)
+                expected += size / answer_count * bucket_expected - bound
+                complete = complete and bucket_complete
+
+            if expected < best_expected:
+                best_expected, best_index = expected, guess_index
+
+        if complete and guess_mask is None:
+            self.table.set(fingerprint, best_expected, best_index, depth)
+        return best_expected, best_index, complete
+
+    def choose(self, answer_indexes, words_to_exclude=None, deadline=None):
+        """
+        :param answer_indexes: A 1-D integer array listing the indexes of the lexicon words that are still possible
+                               underlying words.
+        :param words_to_exclude: A set containing words that are not allowed to be guessed.
+        :param deadline: A time.perf_counter value to stop searching at if it comes before time_limit runs out, or
+                         None. Whether the search was cut short is recorded in statistics["truncated"].
+        :return: A tuple (word, expected_guesses), the word minimising the expected amount of guesses and that
+                 expected amount. The best guess word of get_top_guesses is returned if the search found none, and
+                 NULL_WORD if there are no possible underlying words or every word is excluded.
+        """
+
+        answer_indexes = np.sort(answer_indexes)
+        guess_mask = None
+        if words_to_exclude:
+            guess_mask = ~self.lexicon.get_mask(words_to_exclude)
+        if len(answer_indexes) == 0 or (guess_mask is not None and not np.any(guess_mask)):
+            return NULL_WORD, np.inf
+
+        self.statistics = {"nodes": 0, "table_hits": 0, "truncated": False}
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        if deadline is not None:
+            self.deadline = deadline if self.deadline is None else min(self.deadline, deadline)
+        expected_guesses, word_index, _ = self.evaluate(answer_indexes, self.depth, guess_mask)
+        self.deadline = None
+
+        # Fall back to the best one-ply guess when the search found none, such as at depth 0.
+        if word_index == NULL_INTEGER:
+            top_indexes = self.get_top_guesses(answer_indexes, guess_mask)
+            if len(top_indexes) == 0:
+                return NULL_WORD, np.inf
+            word_index = top_indexes[0]
+            if not np.isfinite(expected_guesses):
+                expected_guesses = get_leaf_estimate(len(answer_indexes))
+        return str(self.lexicon.words[word_index]), float(expected_guesses)
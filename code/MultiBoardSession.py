@@ -0,0 +1,207 @@
+import hashlib
+
+from SolverSession import *
+
+# Macros / Global Constants
+MULTI_BOARD_METRIC = "multi_board_remaining"
+
+
+def get_multi_board_rows(boards):
+    """
+    :param boards: The amount of boards played at once.
+    :return: The amount of guesses allowed, as in Dordle (7), Quordle (9) and Octordle (13).
+    """
+
+    return ROWS + boards - 1
+
+
+def get_multi_board_key(board_answers):
+    """
+    :param board_answers: A list of 1-D integer arrays, the possible underlying words of each unsolved board.
+    :return: A key identifying the boards for a RankingCache, whatever order the boards are in and however the guesses
+             leading to them were ordered.
+    """
+
+    fingerprints = np.array(sorted(get_candidate_fingerprint(np.sort(answers)) for answers in board_answers),
+                            dtype=np.uint64)
+    return int.from_bytes(hashlib.blake2b(fingerprints.tobytes(), digest_size=8).digest(), 'big'), MULTI_BOARD_METRIC
+
+
+# Multi board session class.
+class MultiBoardSession:
+
+    def __init__(self, boards, lexicon_directory="../files/lexicon.npz", pattern_directory="../files/",
+                 answer_threshold=None, threads=None, ranking_cache_directory=None):
+        """
+        :param boards: The amount of boards played at once, such as 4 for Quordle or 8 for Octordle.
+        :param lexicon_directory: A string representing the pathway to the .npz file the compiled lexicon is persisted
+                                  in, or None to keep it in memory only.
+        :param pattern_directory: A string representing the pathway to the directory the cached pattern matrix is
+                                  stored in.
+        :param answer_threshold: The answer_threshold of the answer pool to score against, as passed to
+                                 Lexicon.get_answer_pool, or None to score against every consistent word.
+        :param threads: The amount of threads the scoring kernels of this session may use, or None to use every
+                        thread. See limit_threads.
+        :param ranking_cache_directory: A string representing the pathway to the ranking cache file to start from, or
+                                        None for a cache only kept in memory. See get_ranking_cache.
+
+        Every guess is played on every board, and each board keeps its own stack of candidates like SolverSession. A
+        guess is scored by the sum of its scores on the unsolved boards, calculated by enc_get_multi_board_scores in
+        one pass over the pattern matrix. A board drops out of the scoring once it shows ALL_GREEN_PATTERN, and with
+        one board left the ranking is the one SolverSession would use.
+        """
+
+        self.boards = boards
+        self.lexicon_directory = lexicon_directory
+        self.pattern_directory = pattern_directory
+        self.answer_threshold = answer_threshold
+        self.threads = threads
+        self.ranking_cache_directory = ranking_cache_directory
+        self.lexicon = get_lexicon(lexicon_directory)
+        self.rows = []
+        candidates = np.arange(len(self.lexicon))
+        self.candidate_stacks = [[candidates] for _ in range(boards)]
+        self.answer_stacks = [[get_answer_candidates(self.lexicon, candidates, answer_threshold)]
+                              for _ in range(boards)]
+        self.solved_stack = [(False,) * boards]
+
+    @property
+    def candidates(self):
+        """
+        :return: A list with a 1-D integer array for each board, the indexes of the lexicon words consistent with every
+                 row committed on it.
+        """
+
+        return [candidate_stack[-1] for candidate_stack in self.candidate_stacks]
+
+    @property
+    def answers(self):
+        """
+        :return: A list with a 1-D integer array for each board, the possible underlying words scored against.
+        """
+
+        return [answer_stack[-1] for answer_stack in self.answer_stacks]
+
+    @property
+    def solved(self):
+        """
+        :return: A tuple with a boolean for each board, whether its underlying word has been guessed.
+        """
+
+        return self.solved_stack[-1]
+
+    def get_unsolved_boards(self):
+        """
+        :return: A list of the indexes of the boards whose underlying word has not been guessed.
+        """
+
+        return [b for b in range(self.boards) if not self.solved[b]]
+
+    def commit_row(self, word, patterns):
+        """
+        :param word: The guessed word string.
+        :param patterns: A sequence with an integer in range(PATTERN_COUNT) for each board, the colors shown for the
+                         guess on it, as returned by colors_to_pattern. The patterns of solved boards are ignored.
+        :return: None
+        """
+
+        if word in self.lexicon.indexes:
+            pattern_row = load_pattern_matrix(self.lexicon, self.pattern_directory)[self.lexicon.indexes[word]]
+        else:
+            encoded_word = np.array([[char_to_int(c) for c in word]], dtype=np.int8)
+            pattern_row = enc_get_pattern_matrix(encoded_word, self.lexicon.encoded_words)[0]
+        solved = list(self.solved)
+        for b in range(self.boards):
+            candidates = self.candidate_stacks[b][-1]
+            if not solved[b]:
+                candidates = candidates[pattern_row[candidates] == patterns[b]]
+                solved[b] = patterns[b] == ALL_GREEN_PATTERN
+            self.candidate_stacks[b].append(candidates)
+            self.answer_stacks[b].append(candidates if solved[b] else
+                                         get_answer_candidates(self.lexicon, candidates, self.answer_threshold))
+        self.solved_stack.append(tuple(solved))
+        self.rows.append((word, tuple(patterns)))
+
+    def undo(self):
+        """
+        :return: None
+
+        Removes the last committed row, restoring the candidates of every board from before it was committed.
+        """
+
+        if self.rows:
+            self.rows.pop()
+            self.solved_stack.pop()
+            for b in range(self.boards):
+                self.candidate_stacks[b].pop()
+                self.answer_stacks[b].pop()
+
+    def reset(self):
+        """
+        :return: None
+        """
+
+        while self.rows:
+            self.undo()
+
+    def rank_words(self, k=RANKING_SIZE):
+        """
+        :param k: The amount of words to rank.
+        :return: A list of at most k tuples (word, total), best first, where total is the score of
+                 enc_get_multi_board_scores minus the frequency of the word. Ties are broken towards the word that
+                 comes first in the lexicon. The list is empty once every board is solved or a board has no possible
+                 underlying words left.
+
+        Rankings are kept in the RankingCache of the process, indexed by get_multi_board_key, so boards reaching the
+        same candidates in another order or in another game are not scored again.
+        """
+
+        board_answers = [self.answers[b] for b in self.get_unsolved_boards()]
+        if not board_answers or any(len(answers) == 0 for answers in board_answers):
+            return []
+        with instrumentation.call("multi_board_rank_words"), limit_threads(self.threads):
+            if len(board_answers) == 1:
+                return rank_cached_candidates(self.lexicon, board_answers[0], k, self.pattern_directory,
+                                              ranking_cache_directory=self.ranking_cache_directory)
+
+            # Return ranking calculated earlier for the same boards.
+            ranking_cache = get_ranking_cache(self.lexicon, self.ranking_cache_directory)
+            key = get_multi_board_key(board_answers)
+            cached_ranking = ranking_cache.get(key, k)
+            if cached_ranking is not None:
+                instrumentation.count("ranking_cache_hits")
+                return [(str(self.lexicon.words[i]), float(total)) for i, total in zip(*cached_ranking)]
+            instrumentation.count("ranking_cache_misses")
+
+            # Score every word against every unsolved board at once.
+            answer_indexes = np.concatenate(board_answers)
+            board_starts = np.concatenate(([0], np.cumsum([len(answers) for answers in board_answers])))
+            inconsistent_boards = len(board_answers) - np.bincount(answer_indexes, minlength=len(self.lexicon))
+            instrumentation.count("candidates", len(answer_indexes))
+            with instrumentation.stage("scoring"):
+                totals = enc_get_multi_board_scores(load_pattern_matrix(self.lexicon, self.pattern_directory),
+                                                    answer_indexes, board_starts, inconsistent_boards,
+                                                    get_num_threads()) \
+                    - self.lexicon.frequencies
+            ranked_count = max(k, 2 * ranking_cache.get_ranked_count(key))
+            ranking = get_top_ranking(self.lexicon, totals, np.arange(len(self.lexicon)), ranked_count)
+            ranking_cache.set(key, ranked_count, [self.lexicon.indexes[word] for word, _ in ranking],
+                              [total for _, total in ranking])
+            return ranking[:k]
+
+    def choose_word(self, words_to_exclude=None):
+        """
+        :param words_to_exclude: A set containing words that are not allowed to be guessed.
+        :return: A word string, corresponding to the best word choice for the unsolved boards, or NULL_WORD if there
+                 is none.
+
+        A board with a single possible underlying word is always solved by guessing it, which the bias of
+        enc_get_multi_board_scores already favours, so no special endgame is needed.
+        """
+
+        if words_to_exclude is None:
+            words_to_exclude = set()
+        for word, _ in self.rank_words(max(len(words_to_exclude) + 1, RANKING_SIZE)):
+            if word not in words_to_exclude:
+                return word
+        return NULL_WORD
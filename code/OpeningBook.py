@@ -0,0 +1,138 @@
+import json
+import zipfile
+import hashlib
+
+from BasicStructures import *
+from Instrumentation import *
+
+# Macros / Global Constants
+BINARY_KEY_BYTES = (ROWS * COLUMNS * KEY_BITS + 7) // 8
+
+# Opening books that have already been loaded by this process, indexed by file path.
+loaded_opening_books = {}
+
+
+# Opening book class.
+class OpeningBook:
+
+    def __init__(self, entries=None):
+        """
+        :param entries: A dictionary mapping keys, as returned by Constraints.get_key, to a word string or to a list
+                        of word strings ranked best first.
+        """
+
+        self.entries = {} if entries is None else entries
+        self.fingerprint = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, constraints):
+        """
+        :param constraints: An object of type Constraints, as defined in BasicStructures.
+        :return: The best word string stored for these constraints, or None if there is no entry.
+        """
+
+        entry = self.entries.get(constraints.get_key())
+        if entry is None or isinstance(entry, str):
+            return entry
+        return entry[0]
+
+    def get_ranking(self, constraints):
+        """
+        :param constraints: An object of type Constraints, as defined in BasicStructures.
+        :return: A list of the word strings stored for these constraints, best first. It is empty if there is no
+                 entry.
+        """
+
+        entry = self.entries.get(constraints.get_key())
+        if entry is None:
+            return []
+        if isinstance(entry, str):
+            return [entry]
+        return list(entry)
+
+    def set(self, constraints, words):
+        """
+        :param constraints: An object of type Constraints, as defined in BasicStructures.
+        :param words: The word string, or list of word strings ranked best first, to store for these constraints.
+        :return: None
+        """
+
+        self.entries[constraints.get_key()] = words
+        self.fingerprint = None
+
+    def get_fingerprint(self):
+        """
+        :return: A short hexadecimal string that identifies the entries of the book, so that files built from it, such
+                 as a decision tree, can tell whether they were built from the same book.
+        """
+
+        if self.fingerprint is None:
+            entries = sorted((key_to_string(key), [word] if isinstance(word, str) else list(word))
+                             for key, word in self.entries.items())
+            self.fingerprint = hashlib.sha1(json.dumps(entries).encode()).hexdigest()[:16]
+        return self.fingerprint
+
+    @classmethod
+    def load(cls, opening_book_directory):
+        """
+        :param opening_book_directory: A string representing the pathway to an opening book. Files ending in .npz are
+                                       read in the binary format, anything else as json keyed by str(constraints).
+        :return: The OpeningBook stored in the file. A missing or unreadable file gives an empty OpeningBook.
+        """
+
+        try:
+            if opening_book_directory.endswith(".npz"):
+                with np.load(opening_book_directory) as data:
+                    key_bytes = data['keys'].tobytes()
+                    words = data['words'].tolist()
+                if words and isinstance(words[0], list):
+                    words = [[word for word in ranking if word != ""] for ranking in words]
+                keys = [int.from_bytes(key_bytes[i:i + BINARY_KEY_BYTES], 'big')
+                        for i in range(0, len(key_bytes), BINARY_KEY_BYTES)]
+                return cls(dict(zip(keys, words)))
+            with open(opening_book_directory, 'r') as f:
+                return cls({key_from_string(string): word for string, word in json.load(f).items()})
+        except json.decoder.JSONDecodeError:
+            pass
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            pass
+        return cls()
+
+    def save(self, opening_book_directory):
+        """
+        :param opening_book_directory: A string representing the pathway to save the opening book to. Files ending in
+                                       .npz are written in the binary format, anything else as json.
+        :return: None
+
+        The binary format stores every key as a fixed width big-endian byte string next to an array of words, which
+        is far smaller and quicker to load than json for deep books. Ranked entries are stored as rows of a 2-D array
+        of words, padded with empty strings. The file is written under a temporary name and
+        renamed once complete, so readers never see a partial book.
+        """
+
+        with open_for_replace(opening_book_directory, 'wb' if opening_book_directory.endswith(".npz") else 'w') as f:
+            if opening_book_directory.endswith(".npz"):
+                keys = np.frombuffer(b"".join(key.to_bytes(BINARY_KEY_BYTES, 'big') for key in self.entries),
+                                     dtype=np.uint8).reshape(-1, BINARY_KEY_BYTES)
+                words = list(self.entries.values())
+                if not all(isinstance(word, str) for word in words):
+                    rankings = [[word] if isinstance(word, str) else list(word) for word in words]
+                    width = max(len(ranking) for ranking in rankings)
+                    words = [ranking + [""] * (width - len(ranking)) for ranking in rankings]
+                np.savez(f, keys=keys, words=np.array(words, dtype='<U' + str(WORD_LENGTH)))
+            else:
+                f.write(json.dumps({key_to_string(key): word for key, word in self.entries.items()}, indent=2))
+
+
+def get_opening_book(opening_book_directory="../files/opening_book.json"):
+    """
+    :param opening_book_directory: A string representing the pathway to an opening book file.
+    :return: The OpeningBook stored in the file. It is read at most once per process.
+    """
+
+    if opening_book_directory not in loaded_opening_books:
+        with instrumentation.stage("book_load"):
+            loaded_opening_books[opening_book_directory] = OpeningBook.load(opening_book_directory)
+    return loaded_opening_books[opening_book_directory]
@@ -0,0 +1,200 @@
+import zipfile
+import collections
+
+from LookaheadSearch import *
+
+# Macros / Global Constants
+RANKING_CACHE_LIMIT = 4096
+RANKING_CACHE_MEMORY_LIMIT = 2 ** 26
+RANKING_CACHE_ENTRY_BYTES = 256
+
+# Ranking caches used by this process, indexed by file path and lexicon fingerprint.
+loaded_ranking_caches = {}
+
+
+def get_ranking_key(answer_indexes, metric):
+    """
+    :param answer_indexes: A 1-D integer array listing the indexes of the lexicon words that are still possible
+                           underlying words.
+    :param metric: A key of SCORING_METRICS, the score the words are ranked by.
+    :return: A tuple (candidate_fingerprint, metric) identifying the ranking of every guess word for answer_indexes,
+             however the grid leading to them was filled in.
+    """
+
+    return get_candidate_fingerprint(np.sort(answer_indexes)), metric
+
+
+# Ranking cache class.
+class RankingCache:
+
+    def __init__(self, lexicon_fingerprint, entry_limit=RANKING_CACHE_LIMIT, memory_limit=RANKING_CACHE_MEMORY_LIMIT):
+        """
+        :param lexicon_fingerprint: The fingerprint of the Lexicon whose word indexes the rankings refer to.
+        :param entry_limit: The most rankings kept.
+        :param memory_limit: The most bytes kept, counting the arrays of every ranking and RANKING_CACHE_ENTRY_BYTES
+                             for each entry.
+
+        Rankings are indexed by get_ranking_key, as the totals of rank_candidates only depend on the possible
+        underlying words and the metric. Words that are not allowed to be guessed are skipped by the caller, so they
+        are not part of the key either. Once a limit is exceeded, the least recently used rankings are evicted.
+        """
+
+        self.lexicon_fingerprint = lexicon_fingerprint
+        self.entry_limit = entry_limit
+        self.memory_limit = memory_limit
+        self.entries = collections.OrderedDict()
+        self.changes = {}
+        self.memory = 0
+        self.statistics = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, k):
+        """
+        :param key: A key, as returned by get_ranking_key.
+        :param k: The amount of words wanted.
+        :return: A tuple (word_indexes, totals) of the k best words, best first, or None if fewer than k words were
+                 ranked for key.
+        """
+
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < k:
+            self.statistics["misses"] += 1
+            return None
+        self.statistics["hits"] += 1
+        self.entries.move_to_end(key)
+        return entry[1][:k], entry[2][:k]
+
+    def get_ranked_count(self, key):
+        """
+        :param key: A key, as returned by get_ranking_key.
+        :return: The amount of words ranked for key, or 0 if it is not cached.
+        """
+
+        entry = self.entries.get(key)
+        return 0 if entry is None else entry[0]
+
+    def set(self, key, ranked_count, word_indexes, totals):
+        """
+        :param key: A key, as returned by get_ranking_key.
+        :param ranked_count: The amount of words that were asked to be ranked. The ranking only holds fewer when fewer
+                             words can be guessed.
+        :param word_indexes: A 1-D integer array of the lexicon indexes of the ranked words, best first.
+        :param totals: A 1-D float array of their totals.
+        :return: None
+        """
+
+        entry = (int(ranked_count), np.asarray(word_indexes, dtype=np.int32), np.asarray(totals, dtype=np.float64))
+        if key in self.entries:
+            self.memory -= self.get_entry_memory(self.entries.pop(key))
+        self.entries[key] = self.changes[key] = entry
+        self.memory += self.get_entry_memory(entry)
+        while len(self.entries) > 1 and (len(self.entries) > self.entry_limit or self.memory > self.memory_limit):
+            evicted_key, evicted_entry = self.entries.popitem(last=False)
+            self.changes.pop(evicted_key, None)
+            self.memory -= self.get_entry_memory(evicted_entry)
+            self.statistics["evictions"] += 1
+
+    @staticmethod
+    def get_entry_memory(entry):
+        """
+        :param entry: A tuple (ranked_count, word_indexes, totals) stored in entries.
+        :return: The amount of bytes the entry counts for against memory_limit.
+        """
+
+        return RANKING_CACHE_ENTRY_BYTES + entry[1].nbytes + entry[2].nbytes
+
+    def update(self, entries):
+        """
+        :param entries: A dictionary of entries, as returned by take_changes of another cache on the same lexicon.
+        :return: None
+
+        An entry only replaces one that ranked fewer words.
+        """
+
+        for key, (ranked_count, word_indexes, totals) in entries.items():
+            if ranked_count >= self.get_ranked_count(key):
+                self.set(key, ranked_count, word_indexes, totals)
+
+    def take_changes(self):
+        """
+        :return: A dictionary of the entries set since the last call and not evicted since, so worker processes can
+                 send only what they added back to the process that saves the cache.
+        """
+
+        changes, self.changes = self.changes, {}
+        return changes
+
+    def get_statistics(self):
+        """
+        :return: A dictionary with the amount of hits, misses and evictions so far, and the amount of entries and bytes
+                 currently kept.
+        """
+
+        return dict(self.statistics, entries=len(self.entries), memory=self.memory)
+
+    @classmethod
+    def load(cls, ranking_cache_directory, lexicon, entry_limit=RANKING_CACHE_LIMIT,
+             memory_limit=RANKING_CACHE_MEMORY_LIMIT):
+        """
+        :param ranking_cache_directory: A string representing the pathway to a .npz file written by save.
+        :param lexicon: The Lexicon the cache will be used with.
+        :param entry_limit: The most rankings kept.
+        :param memory_limit: The most bytes kept.
+        :return: The RankingCache stored in the file, with the most recently used rankings kept if it holds more than
+                 the limits allow. A missing or unreadable file, or one saved for a different lexicon, gives an empty
+                 RankingCache.
+        """
+
+        ranking_cache = cls(lexicon.fingerprint, entry_limit, memory_limit)
+        try:
+            with np.load(ranking_cache_directory) as data:
+                if str(data['lexicon_fingerprint']) == lexicon.fingerprint:
+                    starts = np.concatenate(([0], np.cumsum(data['lengths'])))
+                    word_indexes, totals = data['word_indexes'], data['totals']
+                    for i, (fingerprint, metric, ranked_count) in enumerate(zip(
+                            data['fingerprints'].tolist(), data['metrics'].tolist(), data['ranked_counts'].tolist())):
+                        ranking_cache.set((fingerprint, metric), ranked_count, word_indexes[starts[i]:starts[i + 1]],
+                                          totals[starts[i]:starts[i + 1]])
+                    ranking_cache.statistics["evictions"] = 0
+                    ranking_cache.changes = {}
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            pass
+        return ranking_cache
+
+    def save(self, ranking_cache_directory):
+        """
+        :param ranking_cache_directory: A string representing the pathway to the .npz file to write.
+        :return: None
+
+        Rankings are written least recently used first, so loading the file keeps their order.
+        """
+
+        keys, entries = list(self.entries), list(self.entries.values())
+        with open_for_replace(ranking_cache_directory, 'wb') as f:
+            np.savez(f, lexicon_fingerprint=self.lexicon_fingerprint,
+                     fingerprints=np.array([key[0] for key in keys], dtype=np.uint64),
+                     metrics=np.array([key[1] for key in keys], dtype=str),
+                     ranked_counts=np.array([entry[0] for entry in entries], dtype=np.int32),
+                     lengths=np.array([len(entry[1]) for entry in entries], dtype=np.int32),
+                     word_indexes=np.concatenate([entry[1] for entry in entries] + [np.zeros(0, dtype=np.int32)]),
+                     totals=np.concatenate([entry[2] for entry in entries] + [np.zeros(0, dtype=np.float64)]))
+
+
+def get_ranking_cache(lexicon, ranking_cache_directory=None):
+    """
+    :param lexicon: The Lexicon the cache will be used with.
+    :param ranking_cache_directory: A string representing the pathway to a ranking cache file, or None for a cache
+                                    that is only kept in memory.
+    :return: The RankingCache of this process for lexicon, read from the file the first time it is asked for.
+    """
+
+    key = (ranking_cache_directory, lexicon.fingerprint)
+    if key not in loaded_ranking_caches:
+        if ranking_cache_directory is None:
+            loaded_ranking_caches[key] = RankingCache(lexicon.fingerprint)
+        else:
+            with instrumentation.stage("ranking_cache_load"):
+                loaded_ranking_caches[key] = RankingCache.load(ranking_cache_directory, lexicon)
+    return loaded_ranking_caches[key]
@@ -0,0 +1,315 @@
+import io
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import socketserver
+import multiprocessing
+
+from SolverSession import *
+
+# Macros / Global Constants
+SERVICE_HOST = "127.0.0.1"
+PATTERN_CHARS = "byg"
+
+# Session used by the service worker process this module runs in.
+service_session = None
+
+
+def parse_pattern(pattern):
+    """
+    :param pattern: An integer in range(PATTERN_COUNT), as returned by colors_to_pattern, or a string of WORD_LENGTH
+                    characters from PATTERN_CHARS, one for each column (b=grey, y=yellow, g=green).
+    :return: The pattern as an integer in range(PATTERN_COUNT).
+    """
+
+    if isinstance(pattern, str):
+        if len(pattern) != WORD_LENGTH or any(c not in PATTERN_CHARS for c in pattern.lower()):
+            raise ValueError("pattern must be " + str(WORD_LENGTH) + " characters from '" + PATTERN_CHARS + "'")
+        return colors_to_pattern(Color(PATTERN_CHARS.index(c)) for c in pattern.lower())
+    if isinstance(pattern, int) and not isinstance(pattern, bool) and 0 <= pattern < PATTERN_COUNT:
+        return pattern
+    raise ValueError("pattern must be a string or an integer in range(" + str(PATTERN_COUNT) + ")")
+
+
+def pattern_to_string(pattern):
+    """
+    :param pattern: An integer in range(PATTERN_COUNT), as returned by colors_to_pattern.
+    :return: The pattern as a string of WORD_LENGTH characters from PATTERN_CHARS, as accepted by parse_pattern.
+    """
+
+    return "".join(PATTERN_CHARS[color.value] for color in pattern_to_colors(pattern))
+
+
+def parse_service_request(request):
+    """
+    :param request: A dictionary decoded from one json line. "rows" lists [word, pattern] pairs, one for each guess
+                    made so far, "exclude" optionally lists words that are not allowed to be guessed, "k" optionally
+                    asks for a ranking of that many words as well, and "time_budget" optionally limits the seconds
+                    spent searching for the word.
+    :return: A tuple (rows, words_to_exclude, k, time_budget), where rows is a tuple of (word, pattern) tuples as used
+             by rows_to_constraints, words_to_exclude is a frozenset, k is an integer or None and time_budget is a
+             float or None.
+    """
+
+    if not isinstance(request, dict):
+        raise ValueError("request must be a json object")
+    if not isinstance(request.get("rows", []), list):
+        raise ValueError("rows must be a list of [word, pattern] pairs")
+    rows = []
+    for row in request.get("rows", []):
+        if not isinstance(row, (list, tuple)) or len(row) != 2:
+            raise ValueError("each row must be a [word, pattern] pair")
+        word, pattern = row
+        if not isinstance(word, str) or len(word) != WORD_LENGTH or not word.isalpha() or not word.isascii():
+            raise ValueError("each word must be " + str(WORD_LENGTH) + " letters")
+        rows.append((word.lower(), parse_pattern(pattern)))
+    if len(rows) > ROWS:
+        raise ValueError("at most " + str(ROWS) + " rows are allowed")
+    words_to_exclude = request.get("exclude", [])
+    if not isinstance(words_to_exclude, list) or not all(isinstance(word, str) for word in words_to_exclude):
+        raise ValueError("exclude must be a list of words")
+    k = request.get("k")
+    if k is not None and (not isinstance(k, int) or isinstance(k, bool) or k <= 0):
+        raise ValueError("k must be a positive integer")
+    time_budget = request.get("time_budget")
+    if time_budget is not None and (not isinstance(time_budget, (int, float)) or isinstance(time_budget, bool)
+                                    or not time_budget >= 0):
+        raise ValueError("time_budget must be a non-negative number of seconds")
+    return tuple(rows), frozenset(word.lower() for word in words_to_exclude), k, time_budget
+
+
+def initialize_service_worker(opening_book_directory, pattern_directory, lexicon_directory, warmup, threads=None):
+    """
+    :param opening_book_directory: A string representing the pathway to the opening book to suggest words with.
+    :param pattern_directory: A string representing the pathway to the directory the cached pattern matrix is stored
+                              in.
+    :param lexicon_directory: A string representing the pathway to the .npz file the compiled lexicon is persisted in.
+    :param warmup: A boolean corresponding to whether to compile every kernel signature before serving.
+    :param threads: The amount of threads the scoring kernels of this worker may use, or None to use every thread.
+    :return: None
+
+    Creates the session of this worker and warms it up with SolverSession.warm_up, so the lexicon, pattern matrix,
+    opening book and compiled kernels are resident before the first request arrives. Interrupts are left to the
+    service process, which stops the workers once it has answered what it was sent.
+    """
+
+    global service_session
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if warmup:
+        warmup_kernels()
+    service_session = SolverSession(lexicon_directory, pattern_directory, opening_book_directory, threads=threads)
+    service_session.warm_up()
+
+
+def solve_service_request(rows, words_to_exclude, k, time_budget=None):
+    """
+    :param rows: A tuple of (word, pattern) tuples, one for each guess made so far.
+    :param words_to_exclude: An iterable of words that are not allowed to be guessed.
+    :param k: The amount of words to rank as well, or None.
+    :param time_budget: The amount of seconds to search for the word, or None for no limit.
+    :return: A dictionary with the suggested "word", which is None if no word follows the rows, the "ranking" as
+             [word, total] pairs if k is not None, and whether the search "finished" if time_budget is not None.
+
+    This function is run by the worker processes of SolverService.
+    """
+
+    constraints = rows_to_constraints(rows)
+    if time_budget is None:
+        word = service_session.choose_word(constraints, set(words_to_exclude))
+        result = {"word": None if word == NULL_WORD else word}
+    else:
+        word, finished = service_session.choose_word_within(constraints, time_budget, set(words_to_exclude))
+        result = {"word": None if word == NULL_WORD else word, "finished": finished}
+    if k is not None:
+        result["ranking"] = [[word, total] for word, total in service_session.rank_words(constraints, k)]
+    return result
+
+
+# Solver service class.
+class SolverService:
+
+    def __init__(self, processes=None, opening_book_directory="../files/opening_book.json",
+                 pattern_directory="../files/", lexicon_directory="../files/lexicon.npz", warmup=True, threads=None):
+        """
+        :param processes: The amount of worker processes to solve requests in. None uses one per CPU.
+        :param opening_book_directory: A string representing the pathway to the opening book to suggest words with.
+        :param pattern_directory: A string representing the pathway to the directory the cached pattern matrix is
+                                  stored in.
+        :param lexicon_directory: A string representing the pathway to the .npz file the compiled lexicon is persisted
+                                  in.
+        :param warmup: A boolean corresponding to whether workers compile every kernel signature before serving.
+        :param threads: The amount of threads the scoring kernels of each worker may use, or None to use every thread.
+                        Giving each worker a share of the cores keeps concurrent requests from competing for them.
+
+        Requests are solved by a pool of worker processes that each keep a warm SolverSession. Requests for the same
+        canonical constraints key, exclusions, k and time budget that arrive while an identical request is being
+        solved are coalesced onto it, so a burst of clients at the same state costs one calculation. The process
+        creating the service must not have run a parallel kernel, as the workers are forked from it.
+        """
+
+        self.pool = multiprocessing.Pool(processes, initializer=initialize_service_worker,
+                                         initargs=(opening_book_directory, pattern_directory, lexicon_directory,
+                                                   warmup, threads))
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.statistics = {"requests": 0, "coalesced": 0, "errors": 0}
+
+    def submit(self, request, respond):
+        """
+        :param request: A dictionary decoded from one json line, see parse_service_request. An "id" is copied to the
+                        response unchanged.
+        :param respond: A function taking the response dictionary. It is called from another thread once the
+                        suggestion is ready, or at once if the request is invalid.
+        :return: None
+        """
+
+        start_time = time.perf_counter()
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            rows, words_to_exclude, k, time_budget = parse_service_request(request)
+        except ValueError as error:
+            self.reject(request_id, str(error), respond)
+            return
+
+        key = (rows_to_constraints(rows).get_key(), words_to_exclude, k, time_budget)
+        with self.lock:
+            self.statistics["requests"] += 1
+            if key in self.pending:
+                self.statistics["coalesced"] += 1
+                self.pending[key].append((request_id, respond, start_time))
+                return
+            self.pending[key] = [(request_id, respond, start_time)]
+        try:
+            self.pool.apply_async(solve_service_request, (rows, sorted(words_to_exclude), k, time_budget),
+                                  callback=lambda result: self.finish(key, result),
+                                  error_callback=lambda error: self.finish(key, {"error": repr(error)}))
+        except Exception as error:
+            self.finish(key, {"error": repr(error)})
+
+    def reject(self, request_id, message, respond):
+        """
+        :param request_id: The "id" of the invalid request, or None.
+        :param message: A string describing what is wrong with the request.
+        :param respond: A function taking the response dictionary.
+        :return: None
+        """
+
+        with self.lock:
+            self.statistics["requests"] += 1
+            self.statistics["errors"] += 1
+        respond({"id": request_id, "error": message})
+
+    def finish(self, key, result):
+        """
+        :param key: The key of the finished request.
+        :param result: The dictionary returned by solve_service_request, or an "error" dictionary.
+        :return: None
+
+        Responds to every request coalesced onto key.
+        """
+
+        with self.lock:
+            waiters = self.pending.pop(key)
+            if "error" in result:
+                self.statistics["errors"] += len(waiters)
+        end_time = time.perf_counter()
+        for request_id, respond, start_time in waiters:
+            respond(dict({"id": request_id}, **result, time_ms=(end_time - start_time) * 1000))
+
+    def close(self):
+        """
+        :return: None
+
+        Waits for every submitted request to be answered, then stops the worker processes.
+        """
+
+        self.pool.close()
+        self.pool.join()
+
+
+def serve_stream(service, input_stream, output_stream):
+    """
+    :param service: The SolverService to solve requests with.
+    :param input_stream: A text stream of json lines, one request per line.
+    :param output_stream: A text stream to write the json line responses to, in the order they finish.
+    :return: The amount of requests read.
+
+    Returns once input_stream ends and every request read from it has been answered. A request that fails to be
+    submitted is answered with an error, so it never stops the requests after it.
+    """
+
+    write_lock = threading.Lock()
+    outstanding = threading.Semaphore(0)
+
+    def respond(response):
+        with write_lock:
+            output_stream.write(json.dumps(response) + "\n")
+            output_stream.flush()
+        outstanding.release()
+
+    request_count = 0
+    for line in input_stream:
+        if not line.strip():
+            continue
+        request_count += 1
+        try:
+            request = json.loads(line)
+        except json.decoder.JSONDecodeError as error:
+            service.reject(None, "invalid json: " + str(error), respond)
+            continue
+        try:
+            service.submit(request, respond)
+        except Exception as error:
+            service.reject(request.get("id") if isinstance(request, dict) else None, repr(error), respond)
+
+    for _ in range(request_count):
+        outstanding.acquire()
+    return request_count
+
+
+# Socket request handler class.
+class ServiceRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        """
+        :return: None
+
+        Serves one connection as a json lines stream, see serve_stream.
+        """
+
+        serve_stream(self.server.service, io.TextIOWrapper(self.rfile, encoding='utf-8'),
+                     io.TextIOWrapper(self.wfile, encoding='utf-8', write_through=True))
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Serve wordle suggestions as json lines, on stdin or a local socket.")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--port", type=int, default=None, help="Listen on this local port instead of stdin.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--opening-book", default="../files/opening_book.json")
+    parser.add_argument("--no-warmup", action="store_true")
+    parser.add_argument("--threads", type=int, default=None, help="The amount of threads each worker may score with.")
+    arguments = parser.parse_args(arguments)
+
+    service = SolverService(arguments.processes, arguments.opening_book, warmup=not arguments.no_warmup,
+                            threads=arguments.threads)
+    try:
+        if arguments.port is None:
+            serve_stream(service, sys.stdin, sys.stdout)
+        else:
+            with socketserver.ThreadingTCPServer((arguments.host, arguments.port), ServiceRequestHandler) as server:
+                server.daemon_threads = True
+                server.service = service
+                server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        print(json.dumps(service.statistics), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
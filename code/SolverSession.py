@@ -0,0 +1,260 @@
+from WordleSolver import *
+
+# Macros / Global Constants
+WARM_UP_ANSWERS = 64
+
+
+# Solver session class.
+class SolverSession:
+
+    def __init__(self, lexicon_directory="../files/lexicon.npz", pattern_directory="../files/",
+                 opening_book_directory="../files/opening_book.json", lookahead_depth=0,
+                 transposition_table_directory=None, metric=DEFAULT_METRIC,
+                 decision_tree_directory="../files/decision_tree.npz", answer_threshold=None, threads=None,
+                 ranking_cache_directory=None):
+        """
+        :param lexicon_directory: A string representing the pathway to the .npz file the compiled lexicon is persisted
+                                  in, or None to keep it in memory only.
+        :param pattern_directory: A string representing the pathway to the directory the cached pattern matrix is
+                                  stored in.
+        :param opening_book_directory: A string representing the pathway to a json or binary .npz opening book file.
+        :param lookahead_depth: The amount of guesses to look ahead with a LookaheadSearch when there is no opening
+                                book entry, or 0 to choose by the one guess score.
+        :param transposition_table_directory: A string representing the pathway to a .npz transposition table to start
+                                              the lookahead search from, such as one saved by construct_opening_book.
+        :param metric: A key of SCORING_METRICS, the score to choose words by. The opening book is only used with
+                       DEFAULT_METRIC.
+        :param decision_tree_directory: A string representing the pathway to a decision tree built by
+                                        construct_decision_tree. It is only used with DEFAULT_METRIC and without
+                                        looking ahead, and only if it was built for answer_threshold from the opening
+                                        book in opening_book_directory.
+        :param answer_threshold: The answer_threshold of the answer pool to score against, as passed to
+                                 Lexicon.get_answer_pool, or None to score against every consistent word. The opening
+                                 book is only used when it is None.
+        :param threads: The amount of threads the scoring kernels of this session may use, or None to use every
+                        thread. See limit_threads.
+        :param ranking_cache_directory: A string representing the pathway to the ranking cache file to start from, or
+                                        None for a cache only kept in memory. See get_ranking_cache.
+
+        A session keeps the indexes of the words that are still possible underlying words. Committing a row only
+        filters the words that survived the previous rows, and a stack of earlier candidate sets makes undoing a row
+        free, so a game only touches the whole lexicon once. The answers among the candidates, and the decision tree
+        node of the committed rows, are kept the same way, so following the tree costs one child lookup per row.
+        """
+
+        self.lexicon_directory = lexicon_directory
+        self.pattern_directory = pattern_directory
+        self.opening_book_directory = opening_book_directory
+        self.metric = metric
+        self.decision_tree_directory = decision_tree_directory
+        self.answer_threshold = answer_threshold
+        self.threads = threads
+        self.ranking_cache_directory = ranking_cache_directory
+        self.lexicon = get_lexicon(lexicon_directory)
+        self.rows = []
+        self.candidate_stack = [np.arange(len(self.lexicon))]
+        self.answer_stack = [get_answer_candidates(self.lexicon, self.candidates, answer_threshold)]
+        self.decision_tree = get_decision_tree(self.lexicon, decision_tree_directory)
+        self.tree_node_stack = [NULL_INTEGER]
+        if self.decision_tree.is_usable(answer_threshold, get_tree_opening_book(opening_book_directory,
+                                                                                answer_threshold)):
+            self.tree_node_stack = [self.decision_tree.get_node([], self.lexicon)]
+        self.lookahead = None
+        if lookahead_depth > 0:
+            table = None
+            if transposition_table_directory is not None:
+                table = TranspositionTable.load(transposition_table_directory, self.lexicon)
+            self.lookahead = LookaheadSearch(self.lexicon, load_pattern_matrix(self.lexicon, pattern_directory),
+                                             lookahead_depth, table=table)
+
+    @property
+    def candidates(self):
+        """
+        :return: A 1-D integer array listing the indexes of the lexicon words consistent with every committed row.
+        """
+
+        return self.candidate_stack[-1]
+
+    @property
+    def answers(self):
+        """
+        :return: A 1-D integer array listing the indexes of the possible underlying words scored against, as returned
+                 by get_answer_candidates for the candidates.
+        """
+
+        return self.answer_stack[-1]
+
+    def get_row_patterns(self, word, word_indexes):
+        """
+        :param word: A word string of length WORD_LENGTH.
+        :param word_indexes: A 1-D integer array of lexicon indexes.
+        :return: A 1-D uint8 array size=len(word_indexes), the pattern of word against each of the indexed words.
+        """
+
+        if word in self.lexicon.indexes:
+            pattern_matrix = load_pattern_matrix(self.lexicon, self.pattern_directory)
+            return pattern_matrix[self.lexicon.indexes[word]][word_indexes]
+        encoded_word = np.array([[char_to_int(c) for c in word]], dtype=np.int8)
+        return enc_get_pattern_matrix(encoded_word, self.lexicon.encoded_words[word_indexes])[0]
+
+    def commit_row(self, word, pattern):
+        """
+        :param word: The guessed word string.
+        :param pattern: An integer in range(PATTERN_COUNT), the colors shown for the guess, as returned by
+                        colors_to_pattern.
+        :return: None
+        """
+
+        candidates = self.candidates
+        self.candidate_stack.append(candidates[self.get_row_patterns(word, candidates) == pattern])
+        self.answer_stack.append(get_answer_candidates(self.lexicon, self.candidates, self.answer_threshold))
+        self.tree_node_stack.append(self.decision_tree.follow(self.tree_node_stack[-1], word, pattern, self.lexicon))
+        self.rows.append((word, pattern))
+
+    def undo(self):
+        """
+        :return: None
+
+        Removes the last committed row, restoring the candidates from before it was committed.
+        """
+
+        if self.rows:
+            self.rows.pop()
+            self.candidate_stack.pop()
+            self.answer_stack.pop()
+            self.tree_node_stack.pop()
+
+    def reset(self):
+        """
+        :return: None
+        """
+
+        while self.rows:
+            self.undo()
+
+    def sync(self, constraints):
+        """
+        :param constraints: An object of type Constraints, as defined in BasicStructures.
+        :return: A boolean corresponding to whether the committed rows now match the constraints. This is False when a
+                 row is only partly filled in, since a partial row does not form a guess.
+
+        Rows are compared with the committed rows from the top, rows that were edited are undone, and only the rows
+        after them are committed again.
+        """
+
+        # Read every complete row of the grid.
+        grid_rows = constraints.get_rows()
+        if grid_rows is None:
+            return False
+
+        # Undo rows that no longer match, then commit the new ones.
+        common_rows = 0
+        while common_rows < min(len(grid_rows), len(self.rows)) and grid_rows[common_rows] == self.rows[common_rows]:
+            common_rows += 1
+        while len(self.rows) > common_rows:
+            self.undo()
+        for word, pattern in grid_rows[common_rows:]:
+            self.commit_row(word, pattern)
+        return True
+
+    def choose_word(self, constraints, words_to_exclude=None, budget=None):
+        """
+        :param constraints: An object of type Constraints, as defined in BasicStructures. This stores the constraints
+                            that possible underlying words for the wordle must follow.
+        :param words_to_exclude: A set containing words that are not allowed to be guessed.
+        :param budget: A SearchBudget with the same words_to_exclude, or None, as passed to choose_word. The lookahead
+                       search stops at its deadline as well.
+        :return: A word string, corresponding to the best word choice given the inputted constraints.
+
+        The decision tree, opening book and rankings kept by rank_words are consulted exactly as in choose_word, with
+        the tree node of the committed rows kept by the session. Grids with a partly filled row are passed on to
+        choose_word, since they cannot be expressed as committed rows.
+        """
+
+        with instrumentation.call("choose_word"), limit_threads(self.threads):
+            with instrumentation.stage("sync"):
+                synced = self.sync(constraints)
+            if not synced:
+                return choose_word(constraints, self.opening_book_directory, words_to_exclude, self.pattern_directory,
+                                   self.lexicon_directory, metric=self.metric,
+                                   decision_tree_directory=self.decision_tree_directory,
+                                   answer_threshold=self.answer_threshold,
+                                   ranking_cache_directory=self.ranking_cache_directory, budget=budget)
+            if self.lookahead is None:
+                node = self.tree_node_stack[-1] if self.metric == DEFAULT_METRIC else NULL_INTEGER
+                if node != NULL_INTEGER:
+                    tree_word = self.decision_tree.get_word(node, self.lexicon)
+                    if tree_word not in (words_to_exclude or ()):
+                        instrumentation.count("tree_hits")
+                        if budget is not None:
+                            budget.improve([(tree_word, None)])
+                        return tree_word
+                return choose_word(constraints, self.opening_book_directory, words_to_exclude, self.pattern_directory,
+                                   self.lexicon_directory, self.answers, self.metric, self.decision_tree_directory,
+                                   self.answer_threshold, ranking_cache_directory=self.ranking_cache_directory,
+                                   budget=budget)
+            if self.answer_threshold is None:
+                for word in get_opening_book(self.opening_book_directory).get_ranking(constraints):
+                    if word not in (words_to_exclude or ()):
+                        instrumentation.count("book_hits")
+                        if budget is not None:
+                            budget.improve([(word, None)])
+                        return word
+                instrumentation.count("book_misses")
+            if budget is None:
+                with instrumentation.stage("lookahead"):
+                    return choose_from_candidates(self.lexicon, self.answers, words_to_exclude,
+                                                  self.pattern_directory, lookahead=self.lookahead)
+            with instrumentation.stage("lookahead"):
+                word, expected_guesses = self.lookahead.choose(self.answers, words_to_exclude, budget.deadline)
+            budget.finished = budget.finished and not self.lookahead.statistics["truncated"]
+            budget.improve([(word, expected_guesses)])
+            return word
+
+    def warm_up(self):
+        """
+        :return: None
+
+        Loads the opening book and pattern matrix, and scores every word against a spread of WARM_UP_ANSWERS words of
+        the answer pool with the kernels choose_word uses, so the first suggestion that needs scoring does not pay for
+        loading them. Suggestions read from the opening book or decision tree do no scoring, so they cannot be used
+        for this. The ranking is not kept, so the ranking cache is left as it was.
+        """
+
+        with instrumentation.call("warm_up"), limit_threads(self.threads):
+            get_opening_book(self.opening_book_directory)
+            answer_pool = self.lexicon.get_answer_pool(self.answer_threshold)
+            answer_indexes = answer_pool[::max(1, len(answer_pool) // WARM_UP_ANSWERS)]
+            rank_candidates(self.lexicon, answer_indexes, 1, None, self.pattern_directory, metric=self.metric)
+            if self.lookahead is not None:
+                self.lookahead.get_top_guesses(answer_indexes)
+
+    def choose_word_within(self, constraints, time_budget, words_to_exclude=None, on_improvement=None):
+        """
+        :param constraints: An object of type Constraints, as defined in BasicStructures.
+        :param time_budget: The amount of seconds to search for, or None for no limit.
+        :param words_to_exclude: A set containing words that are not allowed to be guessed.
+        :param on_improvement: A function taking (word, total), called with the best word found so far whenever it
+                               changes, as described by SearchBudget. None to only return the final word.
+        :return: A tuple (word, finished), the best word found within time_budget and whether the search finished.
+                 A word that finished is the word choose_word returns.
+
+        Words are scored in chunks, most promising first, so a search that runs out of time still returns a good
+        word. At least one chunk is scored however small the budget is.
+        """
+
+        budget = SearchBudget(time_budget, on_improvement, words_to_exclude)
+        word = self.choose_word(constraints, words_to_exclude, budget)
+        return word, budget.finished
+
+    def rank_words(self, constraints, k=RANKING_SIZE):
+        """
+        :param constraints: An object of type Constraints, as defined in BasicStructures.
+        :param k: The amount of words to rank.
+        :return: A list of at most k tuples (word, total), best first, as returned by rank_words.
+        """
+
+        answer_indexes = self.answers if self.sync(constraints) else None
+        return rank_words(constraints, k, self.opening_book_directory, self.pattern_directory, self.lexicon_directory,
+                          answer_indexes, self.metric, self.answer_threshold, self.threads,
+                          self.ranking_cache_directory)
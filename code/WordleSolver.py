@@ -1,36 +1,31 @@
-import json
-import itertools
+import time
+import multiprocessing
 
-from numba import njit, prange
-from wordfreq import word_frequency
-from english_words import get_english_words_set
+from numba import njit, prange, types
 
 from BasicStructures import *
+from Lexicon import *
+from FeedbackPatterns import *
+from OpeningBook import *
+from DecisionTree import *
+from LookaheadSearch import *
+from RankingCache import *
 
 # Macros / Global Constants
-WORD_LENGTH = 5
-ALPHABET_LENGTH = 26
+PRUNING_CHUNK_SIZE = 64
+PRUNING_CHUNK_SIZE_LIMIT = 2048
+PRUNING_ANSWER_CUTOFF = 4096
+RANKING_SIZE = 5
+ANSWER_WEIGHT_FLOOR = 1e-8
 
-NULL_INTEGER = -1
-NULL_WORD = NULL_CHAR * WORD_LENGTH
+# Counters of the pruned search in choose_from_candidates, accumulated over every call in this process.
+pruning_statistics = {"searches": 0, "guesses": 0, "evaluated": 0, "abandoned": 0, "collapsed": 0}
 
+# Lookahead searches used by the opening book workers of this process, indexed by their arguments.
+worker_lookahead_searches = {}
 
-# Conversion Functions
-def char_to_int(input_char):
-    return ord(input_char) - ord('a')
 
-
-def int_to_char(input_int):
-    return chr(ord('a') + input_int)
-
-
-# Constraint Storage Structures
-extra_words = ["manly", "mucky", "latte", "imply", "daily", "lover", "rerun", "unfit"]
-fake_words = {'brady', 'turin', 'dylan', 'dolan', 'lanka', 'milan', 'cathy', "alton", 'mckee', 'mcgee', 'poole',
-              'della', 'dinah', 'syria', 'akron', 'tarie', 'tored', 'colan', 'nilot', 'telyn', 'topsl', 'duole'}
-
-
-@njit
+@njit(cache=True)
 def enc_is_word_consistent(encoded_word, chars_not_present, char_placements, char_nonplacements,
                            word_length=WORD_LENGTH, alphabet_length=ALPHABET_LENGTH):
     """
@@ -86,7 +81,41 @@ def enc_is_word_consistent(encoded_word, chars_not_present, char_placements, cha
     return True
 
 
-@njit
+@njit(cache=True)
+def enc_get_consistency_mask(encoded_words, chars_not_present, char_placements, char_nonplacements,
+                             word_length=WORD_LENGTH, alphabet_length=ALPHABET_LENGTH):
+    """
+    :param encoded_words: A 2-D integer array with size=(len(words), WORD_LENGTH). Each element of this array represents
+                          a word, each element of those elements corresponds to an alphabetical letter (a=0, b=1, ...,
+                          z=25).
+    :param chars_not_present: A 1-D boolean Array size=ALPHABET_LENGTH. The index of the array corresponds to letter of
+                              alphabet (a=0, b=1, ...), the value at that index is a boolean representing whether that
+                              letter is not in the underlying word (True=letter definitely not present,
+                              False=letter may be present).
+    :param char_placements: A 2-D integer Array size=(ALPHABET_LENGTH, WORD_LENGTH). The first index corresponds to
+                            letter of alphabet (a=0, b=1, ...). The value of this index is an array listing the indexes
+                            of the underlying word that must contain that corresponding letter. NULL_INTEGER is used
+                            to initialize empty values.
+    :param char_nonplacements: A 2-D integer Array size=(ALPHABET_LENGTH, WORD_LENGTH). The first index corresponds to
+                               letter of alphabet (a=0, b=1, ...). The value of this index is an array listing the
+                               indexes of the underlying word that must not contain that corresponding letter.
+                               NULL_INTEGER is used to initialize empty values.
+    :param word_length: Same value as the macro WORD_LENGTH. Inputted to avoid drawing upon global variables.
+    :param alphabet_length: Same value as the macro ALPHABET_LENGTH. Inputted to avoid drawing upon global variables.
+
+    :return: A 1-D boolean array size=len(encoded_words). The value at index i represents whether the word at index i
+             of encoded_words is consistent with the constraints; chars_not_present, char_placements, and
+             char_nonplacements.
+    """
+
+    mask = np.full(len(encoded_words), False)
+    for i, word in enumerate(encoded_words):
+        mask[i] = enc_is_word_consistent(word, chars_not_present, char_placements, char_nonplacements, word_length,
+                                         alphabet_length)
+    return mask
+
+
+@njit(cache=True)
 def enc_get_consistent_words(encoded_words, chars_not_present, char_placements, char_nonplacements,
                              word_length=WORD_LENGTH, alphabet_length=ALPHABET_LENGTH, null_integer=NULL_INTEGER):
     """
@@ -140,7 +169,7 @@ def enc_get_consistent_words(encoded_words, chars_not_present, char_placements,
     return consistent_words
 
 
-@njit
+@njit(cache=True)
 def enc_update_constraints(encoded_guess_word, encoded_underlying_word, chars_not_present, char_placements,
                            char_nonplacements, word_length=WORD_LENGTH):
     """
@@ -200,7 +229,7 @@ def enc_update_constraints(encoded_guess_word, encoded_underlying_word, chars_no
     return
 
 
-@njit(parallel=True)
+@njit(parallel=True, cache=True)
 def enc_get_scores(encoded_words, chars_not_present, char_placements, char_nonplacements, word_length=WORD_LENGTH,
                    alphabet_length=ALPHABET_LENGTH, null_integer=NULL_INTEGER):
     """
@@ -266,118 +295,846 @@ def enc_get_scores(encoded_words, chars_not_present, char_placements, char_nonpl
     return scores
 
 
-def choose_word(constraints, opening_book_directory="../files/opening_book.json", words_to_exclude=None):
+@njit(parallel=True, cache=True, nogil=True)
+def enc_get_mask_consistency(encoded_words, allowed_masks, min_counts, max_counts, word_length=WORD_LENGTH):
+    """
+    :param encoded_words: A 2-D integer array with size=(len(words), WORD_LENGTH). Each element of this array represents
+                          a word, each element of those elements corresponds to an alphabetical letter (a=0, b=1, ...,
+                          z=25).
+    :param allowed_masks: A 1-D uint32 array size=WORD_LENGTH, as returned by Constraints.to_solver_arrays. Bit c of
+                          element i is set if letter c may be at index i of the underlying word.
+    :param min_counts: A 1-D integer array size=ALPHABET_LENGTH, the least amount of times each letter must appear.
+    :param max_counts: A 1-D integer array size=ALPHABET_LENGTH, the most amount of times each letter may appear.
+    :param word_length: Same value as the macro WORD_LENGTH. Inputted to avoid drawing upon global variables.
+
+    :return: A 1-D boolean array size=len(encoded_words). The value at index i represents whether the word at index i
+             of encoded_words is consistent with allowed_masks, min_counts and max_counts.
+
+    Only letters with a count constraint are counted, and no memory is allocated per word.
+    """
+
+    counted_chars = np.flatnonzero((min_counts > 0) | (max_counts < word_length))
+    mask = np.empty(len(encoded_words), dtype=np.bool_)
+    for i in prange(len(encoded_words)):
+        consistent = True
+
+        # Ensure consistency with allowed letters.
+        for j in range(word_length):
+            if (allowed_masks[j] >> encoded_words[i][j]) & 1 == 0:
+                consistent = False
+                break
+
+        # Ensure consistency with letter counts.
+        if consistent:
+            for c in counted_chars:
+                count = 0
+                for j in range(word_length):
+                    if encoded_words[i][j] == c:
+                        count += 1
+                if count < min_counts[c] or count > max_counts[c]:
+                    consistent = False
+                    break
+
+        mask[i] = consistent
+
+    return mask
+
+
+def get_kernel_signatures():
+    """
+    :return: A list of (kernel, signature) tuples, one for every way choose_word, SolverSession, MultiBoardSession and
+             construct_opening_book call a compiled kernel. Omitted default arguments are part of a signature, and the
+             cached pattern matrix is a read-only memory map. A search with a SearchBudget scores copied chunks of its
+             rows instead.
+    """
+
+    encoded_word = types.Array(types.int8, 1, 'C')
+    encoded_words = types.Array(types.int8, 2, 'C')
+    pattern_matrix = types.Array(types.uint8, 2, 'C', readonly=True)
+    indexes = types.Array(types.int64, 1, 'C')
+    mask = types.Array(types.boolean, 1, 'C')
+    letter_masks = types.Array(types.uint32, 1, 'C')
+    letter_counts = types.Array(types.int8, 1, 'C')
+
+    return [
+        (enc_get_pattern, (encoded_word, encoded_word, types.Omitted(WORD_LENGTH))),
+        (enc_get_pattern_matrix, (encoded_words, encoded_words, types.Omitted(WORD_LENGTH))),
+        (enc_get_pattern_scores, (pattern_matrix, indexes, mask, types.int64, types.Omitted(PATTERN_COUNT))),
+        (enc_get_metric_scores, (pattern_matrix, indexes, types.Array(types.float64, 1, 'C'), mask, types.int64,
+                                 types.int64, types.Omitted(PATTERN_COUNT))),
+        (enc_get_metric_scores, (types.Array(types.uint8, 2, 'C'), indexes, types.Array(types.float64, 1, 'C'), mask,
+                                 types.int64, types.int64, types.Omitted(PATTERN_COUNT))),
+        (enc_get_pruned_pattern_scores, (pattern_matrix, indexes, indexes, mask, types.Array(types.float64, 1, 'C'),
+                                         types.float64, types.int64, types.Omitted(PATTERN_COUNT),
+                                         types.Omitted(PRUNING_CHECK_INTERVAL))),
+        (enc_get_multi_board_scores, (pattern_matrix, indexes, indexes, indexes, types.int64,
+                                      types.Omitted(PATTERN_COUNT))),
+        (enc_get_mask_consistency, (encoded_words, letter_masks, letter_counts, letter_counts,
+                                    types.Omitted(WORD_LENGTH))),
+    ]
+
+
+def warmup_kernels():
+    """
+    :return: A dictionary mapping the name of each kernel to the seconds spent preparing it.
+
+    Compiles every signature in get_kernel_signatures ahead of the first suggestion. Kernels are cached on disk, so
+    after the first run this only loads the cached machine code instead of running the compiler.
+    """
+
+    timings = {}
+    for kernel, signature in get_kernel_signatures():
+        start_time = time.perf_counter()
+        kernel.compile(signature)
+        timings[kernel.__name__] = timings.get(kernel.__name__, 0.0) + time.perf_counter() - start_time
+    return timings
+
+
+def get_kernel_compilations():
+    """
+    :return: A dictionary mapping the name of each kernel in get_kernel_signatures to the amount of signatures this
+             process had to compile because they were not found in the on-disk cache.
+    """
+
+    return {kernel.__name__: sum(kernel.stats.cache_misses.values()) for kernel, _ in get_kernel_signatures()}
+
+
+def get_guess_order(lexicon, answer_indexes, guess_mask, collapse=True):
+    """
+    :param lexicon: An object of type Lexicon, as defined in Lexicon.
+    :param answer_indexes: A 1-D integer array listing the indexes of the words in lexicon that are still possible
+                           underlying words.
+    :param guess_mask: A 1-D boolean array size=len(lexicon), the words that are allowed to be guessed.
+    :param collapse: A boolean corresponding to whether to leave out guess words bound to score the same as another.
+    :return: A tuple (guess_indexes, collapsed). guess_indexes is a 1-D integer array of allowed guess words, most
+             promising first, and collapsed is the amount of allowed guess words left out of it.
+
+    Letters that appear in none of the possible underlying words are always grey, so guess words that only differ in
+    such letters produce identical patterns and scores. When collapsing, only the most frequent word of each such
+    group is kept, which is the one choose_from_candidates would pick among them. The remaining words are ordered by
+    how evenly their letters, and their letters at each position, split the possible underlying words.
+    """
+
+    encoded_words = lexicon.encoded_words
+    encoded_answers = encoded_words[answer_indexes]
+    answer_count = len(answer_indexes)
+
+    # Collapse guess words that only differ in letters absent from every possible underlying word.
+    guess_indexes = np.flatnonzero(guess_mask)
+    encoded_guesses = encoded_words[guess_indexes].astype(np.int64)
+    if collapse:
+        live_chars = np.full(ALPHABET_LENGTH + 1, False)
+        live_chars[np.unique(encoded_answers)] = True
+        collapsed_guesses = np.where(live_chars[encoded_guesses], encoded_guesses, ALPHABET_LENGTH)
+        keys = collapsed_guesses @ (ALPHABET_LENGTH + 1) ** np.arange(WORD_LENGTH, dtype=np.int64)
+        order = np.lexsort((guess_indexes, -lexicon.frequencies[guess_indexes], keys))
+        first_of_group = np.full(len(order), True)
+        first_of_group[1:] = keys[order][1:] != keys[order][:-1]
+        representatives = order[first_of_group]
+        guess_indexes = guess_indexes[representatives]
+        encoded_guesses = encoded_guesses[representatives]
+
+    # Count the possible underlying words containing each letter, overall and at each position.
+    contains_char = np.full((answer_count, ALPHABET_LENGTH), False)
+    contains_char[np.arange(answer_count)[:, None], encoded_answers] = True
+    char_counts = contains_char.sum(axis=0)
+    position_counts = np.array([np.bincount(encoded_answers[:, i], minlength=ALPHABET_LENGTH)
+                                for i in range(WORD_LENGTH)])
+
+    # Rate each guess word by how evenly its letters split the possible underlying words.
+    coverage = np.zeros(len(guess_indexes), dtype=np.int64)
+    for i in range(WORD_LENGTH):
+        chars = encoded_guesses[:, i]
+        first_occurrence = np.all(encoded_guesses[:, :i] != chars[:, None], axis=1)
+        coverage += first_occurrence * char_counts[chars] * (answer_count - char_counts[chars])
+        coverage += position_counts[i][chars] * (answer_count - position_counts[i][chars])
+
+    return guess_indexes[np.argsort(-coverage, kind='stable')], int(np.sum(guess_mask)) - len(guess_indexes)
+
+
+def get_answer_weights(lexicon, answer_indexes, metric=DEFAULT_METRIC):
+    """
+    :param lexicon: An object of type Lexicon, as defined in Lexicon.
+    :param answer_indexes: A 1-D integer array listing the indexes of the words in lexicon that are still possible
+                           underlying words.
+    :param metric: A key of SCORING_METRICS.
+    :return: A 1-D float array size=len(answer_indexes), how likely each possible underlying word is under metric.
+             Only weighted_remaining weighs words by their frequency, raised to ANSWER_WEIGHT_FLOOR so that words
+             wordfreq does not know remain possible. Every other metric treats them as equally likely.
+    """
+
+    if metric == "weighted_remaining":
+        return np.maximum(lexicon.frequencies[answer_indexes], ANSWER_WEIGHT_FLOOR)
+    return np.ones(len(answer_indexes), dtype=np.float64)
+
+
+def get_answer_candidates(lexicon, consistent_indexes, answer_threshold=None):
+    """
+    :param lexicon: An object of type Lexicon, as defined in Lexicon.
+    :param consistent_indexes: A 1-D integer array listing the indexes of the lexicon words that follow the
+                               constraints.
+    :param answer_threshold: The answer_threshold of the answer pool, as passed to Lexicon.get_answer_pool, or None.
+    :return: The elements of consistent_indexes in the answer pool, which are the possible underlying words scored
+             against. If none are, the underlying word is not in the answer pool, and every element is returned.
+    """
+
+    if answer_threshold is None:
+        return consistent_indexes
+    answer_indexes = consistent_indexes[lexicon.frequencies[consistent_indexes] >= answer_threshold]
+    return answer_indexes if len(answer_indexes) else consistent_indexes
+
+
+# Search budget class.
+class SearchBudget:
+
+    def __init__(self, time_budget=None, on_improvement=None, words_to_exclude=None):
+        """
+        :param time_budget: The amount of seconds a search may take from now, or None for no limit.
+        :param on_improvement: A function taking (word, total), called with the best word found so far whenever it
+                               changes. total is None for words read from the decision tree or opening book. None to
+                               only return the final word.
+        :param words_to_exclude: A set containing words that are not allowed to be guessed, which are never reported.
+
+        A budget is passed down by choose_word to every step that can take long. A step that runs out of time returns
+        the best it found so far and sets finished to False.
+        """
+
+        self.deadline = None if time_budget is None else time.perf_counter() + time_budget
+        self.on_improvement = on_improvement
+        self.words_to_exclude = set() if words_to_exclude is None else words_to_exclude
+        self.finished = True
+        self.best_word = NULL_WORD
+
+    def is_exhausted(self):
+        """
+        :return: A boolean corresponding to whether the time budget has run out.
+        """
+
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def improve(self, ranking):
+        """
+        :param ranking: A list of tuples (word, total), best first, such as the ranking of the words scored so far.
+        :return: None
+
+        Reports the first word of ranking that is not excluded, if it is not the word reported last.
+        """
+
+        for word, total in ranking:
+            if word not in self.words_to_exclude:
+                if word != self.best_word:
+                    self.best_word = word
+                    if self.on_improvement is not None:
+                        self.on_improvement(word, total)
+                return
+
+
+def get_top_ranking(lexicon, totals, guess_indexes, k):
+    """
+    :param lexicon: An object of type Lexicon, as defined in Lexicon.
+    :param totals: A 1-D float array of the totals of the guess words in guess_indexes.
+    :param guess_indexes: A 1-D integer array of lexicon indexes.
+    :param k: The amount of words to rank.
+    :return: A list of at most k tuples (word, total), best first, with ties broken towards the word that comes first
+             in the lexicon.
+    """
+
+    # Partially sort the totals, keeping every word tied with the k-th best before breaking ties.
+    if len(totals) > k:
+        selection = np.flatnonzero(totals <= np.partition(totals, k - 1)[k - 1])
+        totals, guess_indexes = totals[selection], guess_indexes[selection]
+    order = np.lexsort((guess_indexes, totals))[:k]
+    return [(str(lexicon.words[i]), float(total)) for i, total in zip(guess_indexes[order], totals[order])]
+
+
+def rank_candidates(lexicon, answer_indexes, k, words_to_exclude=None, pattern_directory="../files/", prune=True,
+                    metric=DEFAULT_METRIC, budget=None):
+    """
+    :param lexicon: An object of type Lexicon, as defined in Lexicon.
+    :param answer_indexes: A 1-D integer array listing the indexes of the words in lexicon that are still possible
+                           underlying words.
+    :param k: The amount of words to rank.
+    :param words_to_exclude: A set containing words that are not allowed to be guessed.
+    :param pattern_directory: A string representing the pathway to the directory the cached pattern matrix is stored
+                              in.
+    :param prune: A boolean corresponding to whether to search with branch and bound instead of scoring every word.
+                  Both give the same ranking. Only the remaining metric is pruned, and only with at least
+                  PRUNING_ANSWER_CUTOFF possible underlying words, below which ordering the guess words costs more
+                  than pruning saves.
+    :param metric: A key of SCORING_METRICS, the score to rank by.
+    :param budget: A SearchBudget to stop at, or None to rank every word.
+    :return: A list of at most k tuples (word, total), best first, where total is the score of enc_get_metric_scores
+             minus the frequency of the word. Ties are broken towards the word that comes first in the lexicon. The
+             list is empty if there are no possible underlying words or every word is excluded.
+
+    The pruned search scores guess words in the order of get_guess_order, in chunks starting at PRUNING_CHUNK_SIZE
+    words and doubling up to PRUNING_CHUNK_SIZE_LIMIT, so the first bound is found quickly. Each chunk abandons any
+    guess word whose partial score already exceeds the k-th best total found in earlier chunks. Only the words within
+    the k best totals so far are kept between chunks, so the bound is updated without going over earlier chunks again.
+    When only the best word is wanted, guess words that are bound to score the same as a more frequent word are left
+    out as well. The work saved is recorded in pruning_statistics. Only the k best totals are put in order, never every
+    word.
+
+    With a budget, every metric is scored chunk by chunk in that order, so the most promising words are scored first.
+    The ranking so far is passed to the budget after every chunk, and once the budget runs out the ranking of the
+    words scored so far is returned, with budget.finished set to False. At least one chunk is always scored.
+    """
+
+    if words_to_exclude is None:
+        words_to_exclude = set()
+    guess_mask = ~lexicon.get_mask(words_to_exclude)
+    if len(answer_indexes) == 0 or not np.any(guess_mask) or k <= 0:
+        return []
+
+    # Calculate scores of every word, or of the words that can still be among the best k.
+    consistency = np.full(len(lexicon), False)
+    consistency[answer_indexes] = True
+    pattern_matrix = load_pattern_matrix(lexicon, pattern_directory)
+    instrumentation.count("candidates", len(answer_indexes))
+    pruned = prune and metric == "remaining" and len(answer_indexes) >= PRUNING_ANSWER_CUTOFF
+    if budget is None and not pruned:
+        with instrumentation.stage("scoring"):
+            if metric != "remaining":
+                answer_weights = get_answer_weights(lexicon, answer_indexes, metric)
+                totals = enc_get_metric_scores(pattern_matrix, answer_indexes, answer_weights, consistency,
+                                               SCORING_METRICS[metric], get_num_threads()) - lexicon.frequencies
+            else:
+                totals = enc_get_pattern_scores(pattern_matrix, answer_indexes, consistency, get_num_threads()) \
+                    - lexicon.frequencies
+            guess_indexes = np.flatnonzero(guess_mask)
+            totals = totals[guess_indexes]
+        instrumentation.count("guesses", len(guess_indexes))
+        instrumentation.count("evaluated", len(guess_indexes))
+    else:
+        with instrumentation.stage("guess_order"):
+            ordered_indexes, collapsed = get_guess_order(lexicon, answer_indexes, guess_mask,
+                                                         collapse=pruned and k == 1)
+        answer_weights = get_answer_weights(lexicon, answer_indexes, metric)
+        totals, guess_indexes = np.empty(0, dtype=np.float64), np.empty(0, dtype=ordered_indexes.dtype)
+        bound = np.inf
+        scored, evaluated = 0, 0
+        with instrumentation.stage("pruned_scoring" if pruned else "scoring"):
+            start, chunk_size = 0, PRUNING_CHUNK_SIZE
+            while start < len(ordered_indexes):
+                if start > 0 and budget is not None and budget.is_exhausted():
+                    budget.finished = False
+                    break
+                chunk = ordered_indexes[start:start + chunk_size]
+                start, chunk_size = start + chunk_size, min(2 * chunk_size, PRUNING_CHUNK_SIZE_LIMIT)
+                if metric == "remaining":
+                    chunk_totals = enc_get_pruned_pattern_scores(pattern_matrix, answer_indexes, chunk, consistency,
+                                                                 lexicon.frequencies, bound, get_num_threads())
+                else:
+                    chunk_totals = enc_get_metric_scores(pattern_matrix[chunk], answer_indexes, answer_weights,
+                                                         consistency[chunk], SCORING_METRICS[metric],
+                                                         get_num_threads()) - lexicon.frequencies[chunk]
+                finite = np.isfinite(chunk_totals)
+                scored += len(chunk)
+                evaluated += int(np.count_nonzero(finite))
+
+                # Keep the words within the k best totals so far, ties included, whose k-th total bounds the search.
+                totals = np.concatenate((totals, chunk_totals[finite]))
+                guess_indexes = np.concatenate((guess_indexes, chunk[finite]))
+                if len(totals) >= k:
+                    threshold = np.partition(totals, k - 1)[k - 1]
+                    kept = totals <= threshold
+                    totals, guess_indexes = totals[kept], guess_indexes[kept]
+                    if pruned:
+                        bound = threshold
+                if budget is not None:
+                    budget.improve(get_top_ranking(lexicon, totals, guess_indexes, k))
+        instrumentation.count("guesses", int(np.sum(guess_mask)))
+        instrumentation.count("evaluated", evaluated)
+
+        if pruned:
+            pruning_statistics["searches"] += 1
+            pruning_statistics["guesses"] += int(np.sum(guess_mask))
+            pruning_statistics["evaluated"] += evaluated
+            pruning_statistics["abandoned"] += scored - evaluated
+            pruning_statistics["collapsed"] += collapsed
+
+    return get_top_ranking(lexicon, totals, guess_indexes, k)
+
+
+def choose_from_candidates(lexicon, answer_indexes, words_to_exclude=None, pattern_directory="../files/",
+                           prune=True, lookahead=None, metric=DEFAULT_METRIC):
+    """
+    :param lexicon: An object of type Lexicon, as defined in Lexicon.
+    :param answer_indexes: A 1-D integer array listing the indexes of the words in lexicon that are still possible
+                           underlying words.
+    :param words_to_exclude: A set containing words that are not allowed to be guessed.
+    :param pattern_directory: A string representing the pathway to the directory the cached pattern matrix is stored
+                              in.
+    :param prune: A boolean corresponding to whether to search with branch and bound instead of scoring every word.
+                  Both choose the same word.
+    :param lookahead: A LookaheadSearch on lexicon to choose the word minimising the expected amount of guesses with,
+                      or None to minimise the score of metric after the next guess.
+    :param metric: A key of SCORING_METRICS, the score to choose by.
+    :return: A word string, corresponding to the best word choice when the underlying word is one of answer_indexes.
+             NULL_WORD is returned if there are no possible underlying words or every word is excluded.
+    """
+
+    if lookahead is not None:
+        return lookahead.choose(answer_indexes, words_to_exclude)[0]
+    ranking = rank_candidates(lexicon, answer_indexes, 1, words_to_exclude, pattern_directory, prune, metric)
+    return ranking[0][0] if ranking else NULL_WORD
+
+
+def rank_cached_candidates(lexicon, answer_indexes, k, pattern_directory="../files/", metric=DEFAULT_METRIC,
+                           ranking_cache_directory=None, budget=None):
+    """
+    :param lexicon: An object of type Lexicon, as defined in Lexicon.
+    :param answer_indexes: A 1-D integer array listing the indexes of the words in lexicon that are still possible
+                           underlying words.
+    :param k: The amount of words to rank.
+    :param pattern_directory: A string representing the pathway to the directory the cached pattern matrix is stored
+                              in.
+    :param metric: A key of SCORING_METRICS, the score to rank by.
+    :param ranking_cache_directory: A string representing the pathway to the ranking cache file to start from, or
+                                    None for a cache only kept in memory. See get_ranking_cache.
+    :param budget: A SearchBudget to stop at, or None to rank every word.
+    :return: A list of at most k tuples (word, total), best first, as returned by rank_candidates without excluding
+             any word.
+
+    The ranking is kept in the RankingCache of the process, indexed by the fingerprint of answer_indexes and the
+    metric. Asking for more words than are kept ranks at least twice as many as before. A ranking cut short by the
+    budget is not kept.
+    """
+
+    ranking_cache = get_ranking_cache(lexicon, ranking_cache_directory)
+    key = get_ranking_key(answer_indexes, metric)
+    cached_ranking = ranking_cache.get(key, k)
+    if cached_ranking is not None:
+        instrumentation.count("ranking_cache_hits")
+        return [(str(lexicon.words[i]), float(total)) for i, total in zip(*cached_ranking)]
+    instrumentation.count("ranking_cache_misses")
+
+    ranked_count = max(k, 2 * ranking_cache.get_ranked_count(key))
+    with instrumentation.stage("ranking"):
+        ranking = rank_candidates(lexicon, answer_indexes, ranked_count, None, pattern_directory, metric=metric,
+                                  budget=budget)
+    if budget is None or budget.finished:
+        ranking_cache.set(key, ranked_count, [lexicon.indexes[word] for word, _ in ranking],
+                          [total for _, total in ranking])
+    return ranking[:k]
+
+
+def rank_words(constraints, k=RANKING_SIZE, opening_book_directory="../files/opening_book.json",
+               pattern_directory="../files/", lexicon_directory="../files/lexicon.npz", answer_indexes=None,
+               metric=DEFAULT_METRIC, answer_threshold=None, threads=None, ranking_cache_directory=None, budget=None):
     """
     :param constraints: An object of type Constraints, as defined in BasicStructures. This stores the constraints that
                         possible underlying words for the wordle must follow.
-    :param opening_book_directory: A string representing the pathway to a json file. This file constraints directions
-           for what words are the best choice for certain constraints.
+    :param k: The amount of words to rank.
+    :param opening_book_directory: A string representing the pathway to a json or binary .npz opening book file.
+    :param pattern_directory: A string representing the pathway to the directory the cached pattern matrix is stored
+                              in.
+    :param lexicon_directory: A string representing the pathway to the .npz file the compiled lexicon is persisted
+                              in, or None to keep it in memory only.
+    :param answer_indexes: A 1-D integer array listing the indexes of the possible underlying words, as returned by
+                           get_answer_candidates, or None to filter the lexicon here.
+    :param metric: A key of SCORING_METRICS, the score to rank by.
+    :param answer_threshold: The answer_threshold of the answer pool to score against, as passed to
+                             Lexicon.get_answer_pool, or None to score against every consistent word.
+    :param threads: The amount of threads the scoring kernels may use, or None to use every thread. See limit_threads.
+    :param ranking_cache_directory: A string representing the pathway to the ranking cache file to start from, or
+                                    None for a cache only kept in memory. See get_ranking_cache.
+    :param budget: A SearchBudget to stop ranking at, or None to rank every word.
+    :return: A list of at most k tuples (word, total), best first, as returned by rank_candidates. The total is None
+             for words taken from the opening book, which only stores the words.
+
+    The opening book ranking is used when it holds at least k words, unless a metric other than DEFAULT_METRIC or an
+    answer pool, neither of which the opening book was built with, is asked for. Otherwise the ranking is taken from
+    rank_cached_candidates, so reaching the same possible underlying words again, through any grid, or asking for fewer
+    words costs nothing. Every step is timed by instrumentation when it is enabled.
+    """
+
+    with instrumentation.call("rank_words"), limit_threads(threads):
+
+        # Return ranking in opening book if long enough.
+        if metric == DEFAULT_METRIC and answer_threshold is None:
+            opening_book = get_opening_book(opening_book_directory)
+            with instrumentation.stage("book_lookup"):
+                book_ranking = opening_book.get_ranking(constraints)
+            if len(book_ranking) >= k:
+                instrumentation.count("book_hits")
+                return [(word, None) for word in book_ranking[:k]]
+            instrumentation.count("book_misses")
+
+        # Filter the candidates.
+        lexicon = get_lexicon(lexicon_directory)
+        if answer_indexes is None:
+            with instrumentation.stage("constraint_masks"):
+                allowed_masks, min_counts, max_counts = constraints.to_solver_arrays()
+            with instrumentation.stage("filter"):
+                answer_indexes = get_answer_candidates(lexicon, np.flatnonzero(enc_get_mask_consistency(
+                    lexicon.encoded_words, allowed_masks, min_counts, max_counts)), answer_threshold)
+
+        # Return ranking calculated earlier for the same candidates, or rank them.
+        return rank_cached_candidates(lexicon, answer_indexes, max(k, RANKING_SIZE), pattern_directory, metric,
+                                      ranking_cache_directory, budget)[:k]
+
+
+def get_tree_opening_book(opening_book_directory="../files/opening_book.json", answer_threshold=None):
+    """
+    :param opening_book_directory: A string representing the pathway to an opening book file.
+    :param answer_threshold: The answer_threshold of the answer pool, as passed to Lexicon.get_answer_pool, or None.
+    :return: The OpeningBook whose words a decision tree for answer_threshold follows. The opening book is only
+             followed when answer_threshold is None, and an empty OpeningBook is returned otherwise.
+    """
+
+    return get_opening_book(opening_book_directory) if answer_threshold is None else OpeningBook()
+
+
+def choose_word(constraints, opening_book_directory="../files/opening_book.json", words_to_exclude=None,
+                pattern_directory="../files/", lexicon_directory="../files/lexicon.npz", answer_indexes=None,
+                metric=DEFAULT_METRIC, decision_tree_directory="../files/decision_tree.npz", answer_threshold=None,
+                threads=None, ranking_cache_directory=None, budget=None):
+    """
+    :param constraints: An object of type Constraints, as defined in BasicStructures. This stores the constraints that
+                        possible underlying words for the wordle must follow.
+    :param opening_book_directory: A string representing the pathway to a json or binary .npz file. This file
+           constraints directions for what words are the best choice for certain constraints.
+    :param pattern_directory: A string representing the pathway to the directory the cached pattern matrix is stored
+                              in. The matrix is built there on first use.
+    :param lexicon_directory: A string representing the pathway to the .npz file the compiled lexicon is persisted
+                              in, or None to keep it in memory only.
     :param words_to_exclude: A set containing words that are not allowed to be guessed.
+    :param answer_indexes: A 1-D integer array listing the indexes of the possible underlying words, as returned by
+                           get_answer_candidates, or None to filter the lexicon here.
+    :param metric: A key of SCORING_METRICS, the score to choose by.
+    :param decision_tree_directory: A string representing the pathway to a decision tree built by
+                                    construct_decision_tree for DEFAULT_METRIC. It is only used if it was built for
+                                    answer_threshold from the opening book in opening_book_directory.
+    :param answer_threshold: The answer_threshold of the answer pool to score against, as passed to
+                             Lexicon.get_answer_pool, or None to score against every consistent word.
+    :param threads: The amount of threads the scoring kernels may use, or None to use every thread. See limit_threads.
+    :param ranking_cache_directory: A string representing the pathway to the ranking cache file to start from, or
+                                    None for a cache only kept in memory. See get_ranking_cache.
+    :param budget: A SearchBudget with the same words_to_exclude, to report every improvement to and stop at, or None
+                   to search until the best word is found. The word returned is reported to it as well.
     :return: A word string, corresponding to the best word choice given the inputted constraints.
+
+    When the rows of the grid follow the decision tree, and its word is not excluded, the word is read from the tree.
+    Otherwise the best word that is not excluded is taken from rank_words. Excluding a word therefore moves on to the
+    next word of the opening book or of the ranking kept for these constraints, instead of scoring every word again.
     """
 
-    # Return result in opening book if present.
     if words_to_exclude is None:
         words_to_exclude = set()
-    if not words_to_exclude:
-        try:
-            with open(opening_book_directory, 'r') as openfile:
-                opening_book = dict(json.load(openfile))
-            if str(constraints) in opening_book:
-                return opening_book[str(constraints)]
-        except json.decoder.JSONDecodeError:
-            pass
-        except FileNotFoundError:
-            pass
-
-    # Convert constraints into relevant data structures.
-    chars_not_present = np.full(ALPHABET_LENGTH, False, dtype=np.int8)
-    char_placements = np.full((ALPHABET_LENGTH, WORD_LENGTH), NULL_INTEGER, dtype=np.int8)
-    char_nonplacements = np.full((ALPHABET_LENGTH, WORD_LENGTH), NULL_INTEGER, dtype=np.int8)
-
-    for r in range(ROWS):
-        for c in range(COLUMNS):
-            if constraints.grid[r][c].char != NULL_CHAR:
-                color = constraints.grid[r][c].color
-                char_int = char_to_int(constraints.grid[r][c].char)
-
-                if color == Color.GREY:
-                    if char_placements[char_int][0] != NULL_INTEGER:
-                        color = Color.YELLOW
-                    else:
-                        chars_not_present[char_int] = True
-
-                if color == Color.GREEN:
-                    for i in range(WORD_LENGTH):
-                        if char_placements[char_int][i] == NULL_INTEGER:
-                            char_placements[char_int][i] = c
-                            break
+    with instrumentation.call("choose_word"):
 
-                if color == Color.YELLOW:
-                    for i in range(WORD_LENGTH):
-                        if char_nonplacements[char_int][i] == NULL_INTEGER:
-                            char_nonplacements[char_int][i] = c
-                            break
+        # Return word in decision tree if the rows follow it.
+        if metric == DEFAULT_METRIC:
+            rows = constraints.get_rows()
+            if rows is not None:
+                lexicon = get_lexicon(lexicon_directory)
+                decision_tree = get_decision_tree(lexicon, decision_tree_directory)
+                node = NULL_INTEGER
+                if decision_tree.is_usable(answer_threshold,
+                                           get_tree_opening_book(opening_book_directory, answer_threshold)):
+                    with instrumentation.stage("tree_lookup"):
+                        node = decision_tree.get_node(rows, lexicon)
+                if node != NULL_INTEGER and decision_tree.get_word(node, lexicon) not in words_to_exclude:
+                    instrumentation.count("tree_hits")
+                    if budget is not None:
+                        budget.improve([(decision_tree.get_word(node, lexicon), None)])
+                    return decision_tree.get_word(node, lexicon)
+            instrumentation.count("tree_misses")
 
-    # Calculate scores and choose best word.
-    words = np.array([word for word in sorted(list(get_english_words_set(['web2'], lower=True)) + list(extra_words))
-                      if word not in fake_words and len(word) == WORD_LENGTH and word.isalpha() and
-                      word not in words_to_exclude])
-    int_words = np.array([[char_to_int(c) for c in word] for word in words], dtype=np.int8)
-    options = enc_get_consistent_words(int_words, chars_not_present, char_placements, char_nonplacements)
-    if len(options) == 0:
+        # Return best word in ranking that is not excluded.
+        for word, total in rank_words(constraints, len(words_to_exclude) + 1, opening_book_directory,
+                                      pattern_directory, lexicon_directory, answer_indexes, metric, answer_threshold,
+                                      threads, ranking_cache_directory, budget):
+            if word not in words_to_exclude:
+                if budget is not None:
+                    budget.improve([(word, total)])
+                return word
         return NULL_WORD
-    word_scores_array = enc_get_scores(int_words, chars_not_present, char_placements, char_nonplacements)
-    word_score_dict = {words[i]: word_scores_array[i] - word_frequency(words[i], lang='en') for i in range(len(words))}
-    return min(words, key=word_score_dict.get)
 
 
-def construct_opening_book(opening_book_directory="../files/opening_book.json", print_progress=True):
+def rows_to_constraints(rows):
+    """
+    :param rows: A sequence of (word, pattern) tuples, one for each guess made so far.
+    :return: An object of type Constraints with one row filled in for each element of rows.
+    """
+
+    constraints = Constraints()
+    for r, (word, pattern) in enumerate(rows):
+        constraints.set_row(r, word, pattern_to_colors(pattern))
+    return constraints
+
+
+def get_worker_lookahead(pattern_directory, lexicon_directory, lookahead_depth, transposition_table_directory):
+    """
+    :param pattern_directory: A string representing the pathway to the directory the cached pattern matrix is stored
+                              in.
+    :param lexicon_directory: A string representing the pathway to the .npz file the compiled lexicon is persisted in.
+    :param lookahead_depth: The amount of guesses to look ahead.
+    :param transposition_table_directory: A string representing the pathway to a transposition table to start from,
+                                          or None to start from an empty one.
+    :return: A LookaheadSearch without a time limit. It is created at most once per process for each argument set.
+    """
+
+    key = (pattern_directory, lexicon_directory, lookahead_depth, transposition_table_directory)
+    if key not in worker_lookahead_searches:
+        lexicon = get_lexicon(lexicon_directory)
+        table = None
+        if transposition_table_directory is not None:
+            table = TranspositionTable.load(transposition_table_directory, lexicon)
+        worker_lookahead_searches[key] = LookaheadSearch(lexicon, load_pattern_matrix(lexicon, pattern_directory),
+                                                         lookahead_depth, time_limit=None, table=table)
+    return worker_lookahead_searches[key]
+
+
+def solve_opening_book_state(state):
+    """
+    :param state: A tuple (rows, answer_indexes, ranking_size, pattern_directory, lexicon_directory, lookahead_depth,
+                  transposition_table_directory, ranking_cache_directory), where rows is a tuple of (word, pattern)
+                  tuples, answer_indexes lists the lexicon words still possible after them and ranking_size is the
+                  amount of words to rank.
+    :return: A tuple (rows, words, table_changes, cache_changes, record), where words lists the best word choices after
+             rows, best first, table_changes and cache_changes are the transposition table and ranking cache entries
+             added while searching for them, and record is the instrumentation record of the search, or None if
+             instrumentation is disabled.
+
+    This function is run by the worker processes of construct_opening_book. The lexicon, pattern matrix, ranking cache
+    and lookahead search are cached by each worker, so they are only loaded once per process, and states that leave
+    the same words possible as an earlier state of the worker are not ranked again.
+    """
+
+    rows, answer_indexes, ranking_size, pattern_directory, lexicon_directory, lookahead_depth, \
+        transposition_table_directory, ranking_cache_directory = state
+    lexicon = get_lexicon(lexicon_directory)
+    table_changes = {}
+    with instrumentation.call("solve_opening_book_state"):
+        ranking = [word for word, _ in rank_cached_candidates(lexicon, answer_indexes, ranking_size, pattern_directory,
+                                                              ranking_cache_directory=ranking_cache_directory)]
+
+        # Put the word found by looking ahead first.
+        if lookahead_depth > 0 and ranking:
+            lookahead = get_worker_lookahead(pattern_directory, lexicon_directory, lookahead_depth,
+                                             transposition_table_directory)
+            with instrumentation.stage("lookahead"):
+                lookahead_word = lookahead.choose(answer_indexes)[0]
+            instrumentation.count("lookahead_nodes", lookahead.statistics["nodes"])
+            instrumentation.count("table_hits", lookahead.statistics["table_hits"])
+            ranking = [lookahead_word] + [word for word in ranking if word != lookahead_word][:ranking_size - 1]
+            table_changes = lookahead.table.take_changes()
+    return rows, ranking, table_changes, get_ranking_cache(lexicon, ranking_cache_directory).take_changes(), \
+        instrumentation.take_last_record()
+
+
+def construct_opening_book(opening_book_directory="../files/opening_book.json", print_progress=True, depth=2,
+                           processes=None, checkpoint_interval=25, pattern_directory="../files/",
+                           lexicon_directory="../files/lexicon.npz", lookahead_depth=0,
+                           transposition_table_directory=None, ranking_size=RANKING_SIZE,
+                           ranking_cache_directory=None):
     """
     :param opening_book_directory: A directory on where to save the opening book file.
     :param print_progress: A boolean corresponding to whether to print a message every time a solution is calculated.
+    :param depth: The amount of guesses the opening book covers. Depth 2 covers the first word and every second word.
+    :param processes: The amount of worker processes to calculate solutions in. None uses one per CPU.
+    :param checkpoint_interval: The amount of solutions calculated between each save of the opening book file.
+    :param pattern_directory: A string representing the pathway to the directory the cached pattern matrix is stored
+                              in.
+    :param lexicon_directory: A string representing the pathway to the .npz file the compiled lexicon is persisted
+                              in, or None to keep it in memory only.
+    :param lookahead_depth: The amount of guesses to look ahead with a LookaheadSearch when choosing each word, or 0
+                            to choose by the one guess score.
+    :param transposition_table_directory: A string representing the pathway to a .npz transposition table. When
+                                          looking ahead, the search starts from the table stored there, and the
+                                          entries it adds are saved back to it alongside the opening book.
+    :param ranking_size: The amount of words stored for each state, best first, so that excluding the best word
+                         still finds an answer in the opening book.
+    :param ranking_cache_directory: A string representing the pathway to a .npz ranking cache. The workers start from
+                                    the rankings stored there, and the rankings they add are saved back to it
+                                    alongside the opening book.
     :return: None
 
-    This void function constructs a json file in the inputted directory that corresponds to an opening book for wordle
-    at depth 2.
+    This void function constructs a json file (or a binary file, if the directory ends in .npz) in the inputted
+    directory that corresponds to an opening book for wordle at the given depth. Each level of the book holds every
+    state reachable by following the book's own words, skipping patterns that no word could produce. The file is
+    saved every checkpoint_interval solutions, and states already in the file are not calculated again, so an
+    interrupted construction resumes where it stopped. When instrumentation is enabled, the records of the worker
+    processes are merged into it, and a summary is printed at the end if print_progress is set.
     """
 
-    # Open opening book file and setup data structures.
-    opening_book = {}
-    try:
-        with open(opening_book_directory, 'r') as f:
-            json_object = json.load(f)
-            opening_book = dict(json_object)
-    except json.decoder.JSONDecodeError:
-        pass
-    except FileNotFoundError:
-        pass
-    constraints = Constraints()
+    with instrumentation.call("construct_opening_book"):
 
-    # Determine first word choice.
-    first_word = choose_word(constraints, opening_book_directory)
-    opening_book[str(constraints)] = first_word
-    for i in range(WORD_LENGTH):
-        constraints.grid[0][i].char = first_word[i]
-    print("First word chosen:", first_word, "(1/1)")
-
-    # Determine second word choice given first word choice.
-    m = 0
-    color_possibilities = [iter(Color) for _ in range(WORD_LENGTH)]
-    for color_choice in itertools.product(*color_possibilities):
-        for i, c in enumerate(color_choice):
-            constraints.grid[0][i].color = c
-        choice_word = choose_word(constraints)
-        if choice_word != NULL_WORD and choice_word != first_word:
-            opening_book[str(constraints)] = choice_word
-        for i, c in enumerate(color_choice):
-            constraints.grid[0][i].color = Color.GREY
-
-        m += 1
-        if print_progress:
-            print("Second word chosen:", choice_word, "(" + str(m) + "/" + str(len(Color) ** WORD_LENGTH) + ")")
-
-    # Add obtained information to json files.
-    with open(opening_book_directory, 'w') as f:
-        json_object = json.dumps(opening_book, indent=2)
-        f.write(json_object)
+        # Open opening book file and setup data structures.
+        opening_book = OpeningBook.load(opening_book_directory)
+        lexicon = get_lexicon(lexicon_directory)
+        pattern_matrix = load_pattern_matrix(lexicon, pattern_directory)
+        table = None
+        if lookahead_depth > 0 and transposition_table_directory is not None:
+            table = TranspositionTable.load(transposition_table_directory, lexicon)
+        ranking_cache = None
+        if ranking_cache_directory is not None:
+            ranking_cache = get_ranking_cache(lexicon, ranking_cache_directory)
+        level_states = [((), np.arange(len(lexicon)))]
+
+        with multiprocessing.Pool(processes) as pool:
+            for level in range(depth):
+
+                # Look up states that are already in the opening book.
+                level_words = {}
+                pending_states = []
+                with instrumentation.stage("book_lookup"):
+                    for rows, answer_indexes in level_states:
+                        book_word = opening_book.get(rows_to_constraints(rows))
+                        if book_word is None:
+                            pending_states.append((rows, answer_indexes, ranking_size, pattern_directory,
+                                                   lexicon_directory, lookahead_depth, transposition_table_directory,
+                                                   ranking_cache_directory))
+                        else:
+                            level_words[rows] = book_word
+                instrumentation.count("book_hits", len(level_states) - len(pending_states))
+                instrumentation.count("book_misses", len(pending_states))
+
+                # Calculate the remaining states, saving the opening book periodically.
+                m = 0
+                with instrumentation.stage("solve"):
+                    for rows, ranking, table_changes, cache_changes, record in pool.imap_unordered(
+                            solve_opening_book_state, pending_states):
+                        choice_word = ranking[0] if ranking else NULL_WORD
+                        if choice_word != NULL_WORD:
+                            opening_book.set(rows_to_constraints(rows), ranking)
+                            level_words[rows] = choice_word
+                        if table is not None:
+                            table.update(table_changes)
+                        if ranking_cache is not None:
+                            ranking_cache.update(cache_changes)
+                        if record is not None:
+                            instrumentation.add_record(record)
+
+                        m += 1
+                        if m % checkpoint_interval == 0:
+                            with instrumentation.stage("checkpoint"):
+                                opening_book.save(opening_book_directory)
+                                if table is not None:
+                                    table.save(transposition_table_directory)
+                                if ranking_cache is not None:
+                                    ranking_cache.save(ranking_cache_directory)
+                        if print_progress:
+                            print("Word " + str(level + 1) + " chosen:", choice_word,
+                                  "(" + str(m) + "/" + str(len(pending_states)) + ")")
+                with instrumentation.stage("checkpoint"):
+                    opening_book.save(opening_book_directory)
+                    if table is not None:
+                        table.save(transposition_table_directory)
+                    if ranking_cache is not None:
+                        ranking_cache.save(ranking_cache_directory)
+                if print_progress:
+                    print("Level", level + 1, "complete:", len(level_words), "states,",
+                          len(level_states) - len(pending_states), "already in the opening book.")
+
+                # Expand every state by every pattern its word can produce.
+                next_level_states = []
+                if level + 1 < depth:
+                    with instrumentation.stage("expand"):
+                        for rows, answer_indexes in level_states:
+                            if rows in level_words:
+                                choice_word = level_words[rows]
+                                patterns = pattern_matrix[lexicon.indexes[choice_word]][answer_indexes]
+                                for pattern in np.unique(patterns):
+                                    if pattern != ALL_GREEN_PATTERN:
+                                        next_level_states.append((rows + ((choice_word, int(pattern)),),
+                                                                  answer_indexes[patterns == pattern]))
+                level_states = next_level_states
+
+    loaded_opening_books[opening_book_directory] = opening_book
+    if print_progress and instrumentation.enabled:
+        print(json.dumps(instrumentation.get_summary(), indent=2))
+
+
+def construct_decision_tree(decision_tree_directory="../files/decision_tree.npz", print_progress=True, processes=None,
+                            opening_book_directory="../files/opening_book.json", pattern_directory="../files/",
+                            lexicon_directory="../files/lexicon.npz", answer_threshold=None,
+                            ranking_cache_directory=None):
+    """
+    :param decision_tree_directory: A directory on where to save the decision tree file.
+    :param print_progress: A boolean corresponding to whether to print a message after every level of the tree.
+    :param processes: The amount of worker processes to calculate solutions in. None uses one per CPU.
+    :param opening_book_directory: A string representing the pathway to the opening book whose words the tree follows
+                                   where it has an entry.
+    :param pattern_directory: A string representing the pathway to the directory the cached pattern matrix is stored
+                              in.
+    :param lexicon_directory: A string representing the pathway to the .npz file the compiled lexicon is persisted
+                              in, or None to keep it in memory only.
+    :param answer_threshold: The answer_threshold of the answer pool the tree covers, as passed to
+                             Lexicon.get_answer_pool, or None to cover every lexicon word. The opening book is only
+                             followed when it is None.
+    :param ranking_cache_directory: A string representing the pathway to a .npz ranking cache. The workers start from
+                                    the rankings stored there, and the rankings they add are saved back to it along
+                                    with the tree.
+    :return: None
+
+    This void function saves the complete decision tree of the solver with DEFAULT_METRIC, covering every word of the
+    answer pool as the underlying word, to a binary .npz file in the inputted directory. Each node holds the word
+    choose_word would guess, the opening book's word if it has one. The tree is expanded one level at a time, like
+    construct_opening_book, until every underlying word is found or ROWS guesses are used. A pattern that does not
+    narrow down the possible underlying words is left out, so choose_word searches such states instead.
+    """
+
+    opening_book = get_tree_opening_book(opening_book_directory, answer_threshold)
+    lexicon = get_lexicon(lexicon_directory)
+    pattern_matrix = load_pattern_matrix(lexicon, pattern_directory)
+    level_states = [((), lexicon.get_answer_pool(answer_threshold))]
+    nodes = {}
+
+    with instrumentation.call("construct_decision_tree"), multiprocessing.Pool(processes) as pool:
+        for level in range(ROWS):
+            if not level_states:
+                break
+
+            # Look up states that are in the opening book and calculate the rest.
+            level_words = {}
+            pending_states = []
+            for rows, answer_indexes in level_states:
+                book_word = opening_book.get(rows_to_constraints(rows))
+                if book_word is None:
+                    pending_states.append((rows, answer_indexes, 1, pattern_directory, lexicon_directory, 0, None,
+                                           ranking_cache_directory))
+                else:
+                    level_words[rows] = book_word
+            with instrumentation.stage("solve"):
+                for rows, ranking, _, cache_changes, record in pool.imap_unordered(solve_opening_book_state,
+                                                                                   pending_states, chunksize=16):
+                    if ranking:
+                        level_words[rows] = ranking[0]
+                    if ranking_cache_directory is not None:
+                        get_ranking_cache(lexicon, ranking_cache_directory).update(cache_changes)
+                    if record is not None:
+                        instrumentation.add_record(record)
+
+            # Expand every state by every pattern its word can produce.
+            next_level_states = []
+            with instrumentation.stage("expand"):
+                for rows, answer_indexes in level_states:
+                    if rows in level_words:
+                        choice_word = level_words[rows]
+                        nodes[rows] = (lexicon.indexes[choice_word], {})
+                        patterns = pattern_matrix[lexicon.indexes[choice_word]][answer_indexes]
+                        for pattern in np.unique(patterns):
+                            child_indexes = answer_indexes[patterns == pattern]
+                            if pattern != ALL_GREEN_PATTERN and len(child_indexes) < len(answer_indexes):
+                                child_rows = rows + ((choice_word, int(pattern)),)
+                                nodes[rows][1][int(pattern)] = child_rows
+                                next_level_states.append((child_rows, child_indexes))
+            level_states = next_level_states
+            if print_progress:
+                print("Level", level + 1, "complete:", len(level_words), "nodes,", len(pending_states), "calculated.")
+
+    # Number the nodes in the order they were expanded, leaving out children that were never reached.
+    node_numbers = {rows: n for n, rows in enumerate(nodes)}
+    decision_tree = DecisionTree.from_nodes(lexicon.fingerprint, [
+        (word_index, {pattern: node_numbers[child_rows] for pattern, child_rows in children.items()
+                      if child_rows in node_numbers}) for word_index, children in nodes.values()], answer_threshold,
+        opening_book.get_fingerprint())
+    decision_tree.save(decision_tree_directory)
+    if ranking_cache_directory is not None:
+        get_ranking_cache(lexicon, ranking_cache_directory).save(ranking_cache_directory)
+    loaded_decision_trees[(decision_tree_directory, lexicon.fingerprint)] = decision_tree
+    if print_progress:
+        print("Decision tree saved:", len(decision_tree), "nodes.")
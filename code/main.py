@@ -2,7 +2,7 @@ import pygame
 import sys
 import string
 
-from WordleSolver import *
+from BackgroundSolver import *
 
 # Define Static Parameters
 BOX_SIZE = 100
@@ -11,51 +11,117 @@ DIMENSIONS = (COLUMNS * BOX_SIZE, (ROWS + 1) * BOX_SIZE)
 NULL_WORD = [NULL_CHAR for _ in range(ROWS)]
 ALPHABET = string.ascii_lowercase
 
+WARMUP_KERNELS = True
+SOLVER_TIME_BUDGET = 2.0
+SOLVER_EVENT = pygame.USEREVENT
+
+
+# Helper functions.
+def is_grid_row_complete(grid_constraints):
+    """
+    :param grid_constraints: An object of type Constraints, as defined in BasicStructures.
+    :return: A boolean corresponding to whether at least one row is filled in and no row is partly filled in.
+    """
+
+    first_blank = grid_constraints.get_first_blank()
+    return first_blank is None or (first_blank[0] > 0 and first_blank[1] == 0)
+
+
+def draw_square(row, column, square):
+    """
+    :param row: The row of the square.
+    :param column: The column of the square.
+    :param square: A tuple (color, char, selected) describing how the square should look.
+    :return: The pygame.Rect of the screen that was drawn over.
+    """
+
+    color, char, selected = square
+    position = (column * BOX_SIZE, row * BOX_SIZE)
+    screen.blit(color_image_dict[color], position)
+    if char != NULL_CHAR:
+        screen.blit(char_image_dict[char], position)
+    if selected:
+        screen.blit(SELECTED_IMAGE, position)
+    return pygame.Rect(position, (BOX_SIZE, BOX_SIZE))
+
+
+def draw_choice_word(word):
+    """
+    :param word: The word string to display under the grid, or NULL_WORD to display an empty textbox.
+    :return: The pygame.Rect of the screen that was drawn over.
+    """
+
+    screen.blit(TEXTBOX_IMAGE, (0, ROWS * BOX_SIZE))
+    if word != NULL_WORD:
+        for column in range(COLUMNS):
+            screen.blit(char_image_dict[word[column]], (column * BOX_SIZE, ROWS * BOX_SIZE))
+    return pygame.Rect((0, ROWS * BOX_SIZE), (COLUMNS * BOX_SIZE, BOX_SIZE))
+
+
 # Initialize Game
 pygame.init()
 screen = pygame.display.set_mode(DIMENSIONS)
 pygame.display.set_caption("Wordle Solver")
 pygame.display.set_icon(pygame.image.load('../skins/Icon.png'))
 
-# Load Images
-GREEN_IMAGE = pygame.image.load('../skins/colors/Green.png')
-GREY_IMAGE = pygame.image.load('../skins/colors/Grey.png')
-YELLOW_IMAGE = pygame.image.load('../skins/colors/Yellow.png')
+# Load Images, converted to the display format once so blitting them needs no conversion. Letters and the selection
+# overlay are transparent, the rest are opaque.
+GREEN_IMAGE = pygame.image.load('../skins/colors/Green.png').convert()
+GREY_IMAGE = pygame.image.load('../skins/colors/Grey.png').convert()
+YELLOW_IMAGE = pygame.image.load('../skins/colors/Yellow.png').convert()
 
-SELECTED_IMAGE = pygame.image.load('../skins/misc/Selected.png')
-TEXTBOX_IMAGE = pygame.image.load('../skins/misc/Textbox.png')
+SELECTED_IMAGE = pygame.image.load('../skins/misc/Selected.png').convert_alpha()
+TEXTBOX_IMAGE = pygame.image.load('../skins/misc/Textbox.png').convert()
 
 char_image_dict = {}
 for c in ALPHABET:
-    char_image_dict[c] = pygame.image.load('../skins/letters/' + c + '.png')
-char_image_dict[NULL_CHAR] = pygame.image.load('../skins/letters/null.png')
+    char_image_dict[c] = pygame.image.load('../skins/letters/' + c + '.png').convert_alpha()
+char_image_dict[NULL_CHAR] = pygame.image.load('../skins/letters/null.png').convert_alpha()
 color_image_dict = {Color.GREEN: GREEN_IMAGE, Color.GREY: GREY_IMAGE, Color.YELLOW: YELLOW_IMAGE}
 
+# Compile solver kernels before the first suggestion is requested.
+if WARMUP_KERNELS:
+    warmup_kernels()
+
 # Initialize dynamic variables.
 selected_row = 0
 selected_column = 0
 choice_word = NULL_WORD
 constraints = Constraints()
 words_to_exclude = set()
+solver = BackgroundSolver(on_result=lambda: pygame.event.post(pygame.event.Event(SOLVER_EVENT)),
+                          time_budget=SOLVER_TIME_BUDGET)
 
-# Main loop.
+# What is currently on screen, so only what changed is drawn again.
+drawn_squares = {}
+drawn_choice_word = None
+
+# Main loop. It sleeps until there is an event, such as a key press or the solver finishing.
 while True:
-    for event in pygame.event.get():
+    grid_edited = False
+    for event in [pygame.event.wait()] + pygame.event.get():
 
         # Exit Game.
         if event.type == pygame.QUIT:
             sys.exit()
 
+        # Draw everything again once the window was covered.
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            drawn_squares.clear()
+            drawn_choice_word = None
+
         # Select different cell with mouse.
         if event.type == pygame.MOUSEBUTTONDOWN:
             clicked_row = event.pos[1] // BOX_SIZE
             clicked_column = event.pos[0] // BOX_SIZE
             if clicked_row == selected_row and clicked_column == selected_column:
-                if constraints.grid[selected_row][selected_column].char != NULL_CHAR:
-                    color = constraints.grid[selected_row][selected_column].color.next_color()
-                    constraints.grid[selected_row][selected_column].color = color
+                if constraints.get_char(selected_row, selected_column) != NULL_CHAR:
+                    color = constraints.get_color(selected_row, selected_column).next_color()
+                    constraints.set_color(selected_row, selected_column, color)
                     choice_word = NULL_WORD
                     words_to_exclude.clear()
+                    solver.cancel()
+                    grid_edited = True
             elif 0 <= clicked_row < ROWS and 0 <= clicked_column < COLUMNS:
                 selected_row = clicked_row
                 selected_column = clicked_column
@@ -69,11 +135,13 @@ while True:
 
             # Change cell color.
             if event.key == pygame.K_SPACE:
-                if constraints.grid[selected_row][selected_column].char != NULL_CHAR:
-                    color = constraints.grid[selected_row][selected_column].color.next_color()
-                    constraints.grid[selected_row][selected_column].color = color
+                if constraints.get_char(selected_row, selected_column) != NULL_CHAR:
+                    color = constraints.get_color(selected_row, selected_column).next_color()
+                    constraints.set_color(selected_row, selected_column, color)
                     choice_word = NULL_WORD
                     words_to_exclude.clear()
+                    solver.cancel()
+                    grid_edited = True
 
             # Select different cell with arrows.
             if event.key == pygame.K_UP:
@@ -94,18 +162,21 @@ while True:
             if char != NULL_CHAR:
                 if constraints.get_first_blank() is not None:
                     selected_row, selected_column = constraints.get_first_blank()
-                    constraints.grid[selected_row][selected_column].char = char
+                    constraints.set_square(selected_row, selected_column, char)
                     choice_word = NULL_WORD
                     words_to_exclude.clear()
+                    solver.cancel()
+                    grid_edited = True
 
             # Delete letter.
             if event.key == pygame.K_BACKSPACE:
                 if constraints.get_last_char() is not None:
                     selected_row, selected_column = constraints.get_last_char()
-                    constraints.grid[selected_row][selected_column].char = NULL_CHAR
-                    constraints.grid[selected_row][selected_column].color = Color.GREY
+                    constraints.set_square(selected_row, selected_column, NULL_CHAR)
                     choice_word = NULL_WORD
                     words_to_exclude.clear()
+                    solver.cancel()
+                    grid_edited = True
                     if constraints.get_last_char() is not None:
                         selected_row, selected_column = constraints.get_last_char()
                     else:
@@ -113,35 +184,47 @@ while True:
 
             # Calculate the best choice word.
             if event.key == pygame.K_RETURN:
-                choice_word = choose_word(constraints, words_to_exclude=words_to_exclude)
+                solver.submit(constraints, words_to_exclude)
 
             # Exclude current choice word from possible guess words.
             if event.key == pygame.K_RSHIFT or event.key == pygame.K_LSHIFT:
                 if choice_word not in words_to_exclude and choice_word != NULL_WORD:
                     words_to_exclude.add(choice_word)
-                choice_word = choose_word(constraints, words_to_exclude=words_to_exclude)
+                choice_word = NULL_WORD
+                solver.submit(constraints, words_to_exclude)
 
             # Clear list of excluded guess words.
             if event.key == pygame.K_TAB:
                 words_to_exclude.clear()
-                choice_word = choose_word(constraints, words_to_exclude=words_to_exclude)
-
-    # Display wordle grid.
+                choice_word = NULL_WORD
+                solver.submit(constraints, words_to_exclude)
+
+    # Start calculating for a completed row ahead of time. Calculations for the old grid were abandoned at each edit,
+    # so a request made after the last edit still stands.
+    if grid_edited and is_grid_row_complete(constraints):
+        solver.submit(constraints, speculative=True)
+
+    # Collect a finished calculation, reporting a calculation that failed.
+    solver_word = solver.poll()
+    if solver_word is not None:
+        choice_word = solver_word
+        if solver.error is not None:
+            print("Solver failed: " + repr(solver.error), file=sys.stderr)
+
+    # Display the squares of the wordle grid that changed.
+    dirty_rects = []
     for row in range(ROWS):
         for column in range(COLUMNS):
-            color = constraints.grid[row][column].color
-            if color in color_image_dict:
-                screen.blit(color_image_dict[color], (column * BOX_SIZE, row * BOX_SIZE))
-            char = constraints.grid[row][column].char
-            if char != NULL_CHAR:
-                screen.blit(char_image_dict[char], (column * BOX_SIZE, row * BOX_SIZE))
-    screen.blit(SELECTED_IMAGE, (selected_column * BOX_SIZE, selected_row * BOX_SIZE))
-
-    # Display solution word.
-    screen.blit(TEXTBOX_IMAGE, (0, ROWS * BOX_SIZE))
-    for column in range(COLUMNS):
-        if choice_word != NULL_WORD:
-            char = choice_word[column]
-            screen.blit(char_image_dict[char], (column * BOX_SIZE, ROWS * BOX_SIZE))
-
-    pygame.display.update()
+            square = (constraints.get_color(row, column), constraints.get_char(row, column),
+                      (row, column) == (selected_row, selected_column))
+            if drawn_squares.get((row, column)) != square:
+                drawn_squares[(row, column)] = square
+                dirty_rects.append(draw_square(row, column, square))
+
+    # Display solution word if it changed.
+    if choice_word != drawn_choice_word:
+        drawn_choice_word = choice_word
+        dirty_rects.append(draw_choice_word(choice_word))
+
+    if dirty_rects:
+        pygame.display.update(dirty_rects)